@@ -1,56 +1,86 @@
-from random import randint
-import pygame
-from pygame.sprite import Sprite
-import os
+from assets import assets
+from pool import PooledSprite
+from timestep import interpolate
 
-# Change the current working directory of a Python script to the directory where the script itself is
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-
-class Alien(Sprite):
+class Alien(PooledSprite):
     """
-    A class to represent a single alien
+    A class to represent a single alien. Aliens are recycled through a Pool, so an alien that was shot or got past the
+    ship is reset and reused for a later spawn.
 
     Attributes:
-    - screen :    :class:`pygame.surface.Surface` --> The screen of the game on which to draw.
-    - settings :    :class:`settings.Settings` --> Game settings that control aspects of the game
-    - image :    :class:`tuple` --> Bitmap image of the alien
+    - image :    :class:`pygame.surface.Surface` --> Bitmap image of the alien, shared by every alien
     - rect :    :class:`pygame.rect.Rect` --> The rect object that stores rectangular coordinates of the alien.
     - x :    :class:`float` --> The horizontal position of the alien.
+    - previous_x :    :class:`float` --> The horizontal position of the alien before the last update.
+    - speed :    :class:`float` --> How many pixels per second the alien moves, before the speed factor.
 
     Methods:
+    -reset() --> Place the alien on the right side of the screen, at a random height unless one is given. Returns None.
     -update() --> Move the alien across the screen. Returns None.
+    -interpolated_rect() --> The alien's rect between its previous and current position. Returns a Rect.
     """
 
-    def __init__(self, game):
+    __slots__ = ('image', 'rect', 'x', 'previous_x', 'speed')
+
+    def __init__(self, game=None, pool=None):
         """
         Initialize the alien
-        :param game:
+        :param game: The game the alien belongs to, or None to create an unplaced alien for a pool
+        :param pool: The pool the alien returns to once it is removed from its group
         """
-        super().__init__()
-        self.screen = game.screen
-        self.settings = game.settings
+        super().__init__(pool)
 
-        # Load the alien image and set its rect
+        # Use the shared alien image and set its rect
         # Image from https://kenney.nl/assets/space-shooter-redux
         # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-        self.image = pygame.image.load(os.path.join(os.getcwd(), 'assets/images/enemy.bmp'))
+        self.image = assets.image('enemy.bmp')
         self.rect = self.image.get_rect()
+        self.x = self.previous_x = 0.0
+        self.speed = 0.0
+        if game is not None:
+            self.reset(game)
+
+    def reset(self, game, top=None, speed=None):
+        """
+        Place the alien on the right side of the screen, at a random height unless one is given
+        :param game: The game the alien belongs to. Its per-game RNG decides where the alien starts.
+        :param top: The top of the alien, e.g. from a wave's schedule. None picks a random height.
+        :param speed: How many pixels per second the alien moves. None uses the settings' alien_speed.
+        :return None:
+        """
+        self.speed = game.settings.alien_speed if speed is None else speed
 
         # Start each new alien at a random position on the right side of the screen.
-        self.rect.left = self.screen.get_rect().right
-        # The farthest down the screen to place the alien is the height of the screen, minus the height of the alien.
-        alien_top_max = self.settings.screen_height - self.rect.height
-        self.rect.top = randint(0, alien_top_max)
+        self.rect.left = game.screen.get_width()
+        if top is None:
+            # The farthest down the screen to place the alien is the height of the screen, minus the height of the alien.
+            alien_top_max = game.settings.screen_height - self.rect.height
+            top = game.rng.randint(0, alien_top_max)
+        self.rect.top = top
 
         # Store the alien's exact horizontal position.
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
-    def update(self, speed_factor):
+    def update(self, speed_factor, dt):
         """
         Move the alien towards the left side of the screen
         :param speed_factor: a float greater than 1 that will increase the speed at which the alien moves
+        :param dt: The length of the simulation tick in seconds
         :return:
         """
-        self.x -= self.settings.alien_speed * speed_factor
+        self.previous_x = self.x
+        # speed is in pixels per second
+        self.x -= self.speed * speed_factor * dt
         self.rect.x = self.x
+
+    def interpolated_rect(self, alpha):
+        """
+        The alien's rect between its position at the previous and the current simulation tick
+        :param alpha: How far between the two ticks, from 0 to 1
+        :return pygame.Rect:
+        """
+        rect = self.rect.copy()
+        rect.x = interpolate(self.previous_x, self.x, alpha)
+        return rect
@@ -0,0 +1,161 @@
+import os
+
+import pygame
+
+# Resolve every asset relative to this file so the game doesn't depend on the current working directory
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+
+class SilentSound:
+    """
+    A stand-in for :class:`pygame.mixer.Sound` that is handed out when the mixer isn't running, e.g. in headless games.
+
+    Methods:
+
+    - play() --> Do nothing. Returns None.
+    """
+
+    def play(self, *args, **kwargs):
+        """
+        Do nothing
+        :return None:
+        """
+        return None
+
+
+class Assets:
+    """
+    A process-wide registry that loads each image and sound exactly once and hands out shared copies.
+
+    Attributes:
+
+    - root :    :class:`str` --> The directory that all asset names are resolved against.
+    - images :    :class:`dict` --> Loaded image surfaces keyed by file name.
+    - sounds :    :class:`dict` --> Loaded sounds keyed by file name.
+
+    Methods:
+
+    - path() --> Build the absolute path of an asset. Returns a str.
+    - image() --> Return the shared surface for an image, loading it on first use and converting it on the main thread. Returns a Surface.
+    - sound() --> Return the shared sound for a sound effect, loading it on first use. Returns a Sound, or a SilentSound when the mixer isn't initialized.
+    - music_path() --> Return the path of a music file if it exists. Returns a str or None.
+    - preload() --> Load every image and sound used by the game, optionally on a loader's worker threads. Returns a list of futures.
+    - convert_all() --> Convert every loaded image to the display's pixel format. Returns None.
+    """
+
+    # Images from https://kenney.nl/assets/space-shooter-redux
+    # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
+    IMAGES = ('enemy.bmp', 'ship2.bmp', 'star.bmp', 'meteor_small.bmp', 'meteor_medium.bmp', 'life.bmp', 'x.bmp')
+    # Sounds from https://kenney.nl/assets/space-shooter-redux
+    # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
+    SOUNDS = ('sfx_laser1.ogg', 'sfx_zap.ogg', 'sfx_twoTone.ogg', 'sfx_lose.ogg')
+
+    def __init__(self, root=ASSETS_DIR):
+        """
+        Create an empty registry
+        :param root: The directory that holds the images/ and sfx/ folders
+        """
+        self.root = root
+        self.images = {}
+        self.sounds = {}
+        # Names of the images that have already been converted to the display format
+        self._converted = set()
+
+    def path(self, *parts):
+        """
+        Build the absolute path of an asset
+        :param parts: Path components relative to the assets directory
+        :return str:
+        """
+        return os.path.join(self.root, *parts)
+
+    def image(self, name, convert=True):
+        """
+        Return the shared surface for an image, loading it from disk the first time it is asked for
+        :param name: The file name of the image inside assets/images
+        :param convert: False on a worker thread, which must leave converting to the main thread
+        :return pygame.Surface:
+        """
+        if name not in self.images:
+            self._load_image(name)
+        # Convert as soon as a display exists, so surfaces loaded before set_mode() or on a worker thread are fixed up
+        # on their next use on the main thread
+        if convert and name not in self._converted and pygame.display.get_surface() is not None:
+            self._convert(name)
+        return self.images[name]
+
+    def _load_image(self, name):
+        """
+        Read an image from disk without converting it, which is safe to do on a worker thread
+        :param name: The file name of the image inside assets/images
+        :return None:
+        """
+        self.images[name] = pygame.image.load(self.path('images', name))
+
+    def sound(self, name):
+        """
+        Return the shared sound for a sound effect, loading it from disk the first time it is asked for
+        :param name: The file name of the sound inside assets/sfx
+        :return pygame.mixer.Sound:
+        """
+        # Without a mixer (headless games) nothing can be decoded or played. The stand-in isn't cached so a later game
+        # with audio still gets the real sound.
+        if pygame.mixer.get_init() is None:
+            return SilentSound()
+        if name not in self.sounds:
+            self.sounds[name] = pygame.mixer.Sound(self.path('sfx', name))
+        return self.sounds[name]
+
+    def music_path(self, name):
+        """
+        Return the path of a music file. The music isn't distributed with the repository, so it may be missing.
+        :param name: The file name of the music inside assets/sfx
+        :return str or None:
+        """
+        file_path = self.path('sfx', name)
+        return file_path if os.path.isfile(file_path) else None
+
+    def preload(self, loader=None):
+        """
+        Load every image and sound used by the game so nothing is read from disk inside the frame loop. With a loader
+        the files are read and decoded on its worker threads, and convert_all() converts them to the display format on
+        the main thread once they are loaded.
+        :param loader: A loader.Loader to load on, or None to load right away
+        :return list: The futures of the image loads, or an empty list without a loader
+        """
+        if loader is None:
+            for name in self.IMAGES:
+                self.image(name)
+            for name in self.SOUNDS:
+                self.sound(name)
+            return []
+        images = [loader.submit(self._load_image, name) for name in self.IMAGES]
+        for name in self.SOUNDS:
+            loader.submit(self.sound, name)
+        return images
+
+    def convert_all(self):
+        """
+        Convert every loaded image to the pixel format of the display. Must be called after set_mode().
+        :return None:
+        """
+        for name in self.images:
+            if name not in self._converted:
+                self._convert(name)
+
+    def _convert(self, name):
+        """
+        Convert a single image in place, keeping per-pixel alpha when the bitmap has it
+        :param name: The file name of the image
+        :return None:
+        """
+        surface = self.images[name]
+        if surface.get_flags() & pygame.SRCALPHA:
+            self.images[name] = surface.convert_alpha()
+        else:
+            self.images[name] = surface.convert()
+        self._converted.add(name)
+
+
+# The single registry shared by the ship, aliens, stars and the game
+assets = Assets()
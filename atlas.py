@@ -0,0 +1,66 @@
+import pygame
+
+
+class Atlas:
+    """
+    A texture atlas: many small images packed into one surface, so a frame's sprites can all be drawn from the same
+    surface in a single Surface.blits() call. Each image keeps its own region of the atlas, and a sprite is drawn by
+    blitting its region. Images are packed onto shelves, tallest first, left to right.
+
+    Attributes:
+
+    - image :    :class:`pygame.surface.Surface` --> The atlas, transparent between the images.
+    - regions :    :class:`dict` --> The Rect of the atlas each image was packed into, keyed by name.
+
+    Methods:
+
+    - region() --> The region of an image. Returns a Rect.
+    - blit_sequence() --> The blits that draw an image at a number of positions. Returns a list of tuples.
+    """
+
+    def __init__(self, images, max_width=512, padding=1):
+        """
+        Pack images into a new atlas
+        :param images: The images to pack, as a dict of name -> Surface. They should have per-pixel alpha.
+        :param max_width: The width of a shelf, unless an image is wider
+        :param padding: The transparent pixels left between images
+        """
+        width = max([max_width] + [image.get_width() for image in images.values()])
+        self.regions = {}
+        x = y = shelf_height = 0
+        for name, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+            image_width, image_height = image.get_size()
+            if x + image_width > width:
+                # Start a new shelf below the tallest image of this one
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            self.regions[name] = pygame.Rect(x, y, image_width, image_height)
+            x += image_width + padding
+            shelf_height = max(shelf_height, image_height)
+
+        self.image = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            self.image = self.image.convert_alpha()
+        self.image.fill((0, 0, 0, 0))
+        # Nothing overlaps, so each image is copied onto transparent pixels unchanged
+        self.image.blits([(images[name], region) for name, region in self.regions.items()], doreturn=False)
+
+    def region(self, name):
+        """
+        The region of the atlas an image was packed into
+        :param name: The name of the image
+        :return pygame.Rect:
+        """
+        return self.regions[name]
+
+    def blit_sequence(self, name, positions):
+        """
+        The blits that draw an image at a number of positions, for Surface.blits()
+        :param name: The name of the image
+        :param positions: The top left corners, as (x, y) pairs or Rects
+        :return list: (atlas, position, region) tuples
+        """
+        image = self.image
+        region = self.regions[name]
+        return [(image, position, region) for position in positions]
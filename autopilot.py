@@ -0,0 +1,109 @@
+from random import Random
+
+
+class RandomPilot:
+    """
+    Plays like someone mashing keys: it holds a random direction for a random number of ticks and fires at random.
+    Passed to Game.simulate() as its policy.
+
+    Attributes:
+
+    - rng :    :class:`random.Random` --> The pilot's own random number generator, so it doesn't shift the game's.
+    - fire_chance :    :class:`float` --> The chance of trying to fire on each tick.
+    - hold_ticks :    :class:`int` --> The most ticks a direction is held before a new one is picked.
+    - remaining :    :class:`int` --> The ticks left before a new direction is picked.
+
+    Methods:
+
+    - __call__() --> Steer the ship and maybe fire before a tick. Returns None.
+    """
+
+    def __init__(self, seed=None, fire_chance=0.02, hold_ticks=120):
+        """
+        Create the pilot
+        :param seed: Seed for the pilot's random number generator
+        :param fire_chance: The chance of trying to fire on each tick
+        :param hold_ticks: The most ticks a direction is held before a new one is picked
+        """
+        self.rng = Random(seed)
+        self.fire_chance = fire_chance
+        self.hold_ticks = hold_ticks
+        self.remaining = 0
+
+    def __call__(self, game):
+        """
+        Steer the ship and maybe fire before a tick
+        :param game: The game being played
+        :return None:
+        """
+        if self.remaining <= 0:
+            direction = self.rng.choice((-1, 0, 1))
+            game.ship.moving_up = direction < 0
+            game.ship.moving_down = direction > 0
+            self.remaining = self.rng.randint(1, self.hold_ticks)
+        self.remaining -= 1
+        if self.rng.random() < self.fire_chance:
+            game._fire_bullet()
+
+
+class ScriptedPilot:
+    """
+    Plays a simple, steady strategy: it lines the ship up with the alien closest to the left edge, which is the one
+    about to cost a life, and fires whenever the alien is in front of the ship. Passed to Game.simulate() as its policy.
+
+    Attributes:
+
+    - tolerance :    :class:`int` --> How many pixels the ship's center may be off the alien's center and still fire.
+
+    Methods:
+
+    - __call__() --> Steer the ship and maybe fire before a tick. Returns None.
+    """
+
+    def __init__(self, seed=None, tolerance=20):
+        """
+        Create the pilot
+        :param seed: Unused. The scripted pilot always plays the same way, but takes a seed like RandomPilot.
+        :param tolerance: How many pixels off the alien's center the ship may be and still fire
+        """
+        self.tolerance = tolerance
+
+    def __call__(self, game):
+        """
+        Steer the ship towards the leftmost alien and fire when it is lined up
+        :param game: The game being played
+        :return None:
+        """
+        target = self._target(game)
+        ship = game.ship
+        if target is None:
+            ship.moving_up = ship.moving_down = False
+            return
+        offset = target - ship.rect.centery
+        ship.moving_up = offset < -self.tolerance
+        ship.moving_down = offset > self.tolerance
+        if abs(offset) <= self.tolerance:
+            game._fire_bullet()
+
+    @staticmethod
+    def _target(game):
+        """
+        Find the vertical center of the alien closest to the left edge of the screen
+        :param game: The game being played
+        :return float: The alien's center, or None if there are no aliens
+        """
+        aliens = game.aliens
+        if game.array_entities:
+            if not aliens.count:
+                return None
+            nearest = aliens.x[:aliens.count].argmin()
+            return aliens.y[nearest] + aliens.height[nearest] / 2
+        nearest = min(aliens, key=lambda alien: alien.x, default=None)
+        return None if nearest is None else nearest.rect.centery
+
+
+# Policy name -> pilot class, for the command line tools
+PILOTS = {
+    'random': RandomPilot,
+    'scripted': ScriptedPilot,
+}
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+"""
+Benchmarks the hot paths of one iteration of Game.run_game(). Each scenario builds a scripted scene, runs a number of
+frames and records how long every instrumented method took. The results are written as JSON with p50/p95/p99 timings,
+and can be compared against a saved baseline to flag regressions.
+
+Runs under the SDL dummy video and audio drivers, so no display or sound card is needed:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.10
+    python benchmark.py --scene horde.state --entity-engine numpy
+"""
+
+# Libraries to be imported
+import os
+
+# The dummy drivers must be selected before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import ast
+import json
+import platform
+import sys
+import time
+from random import Random
+
+import pygame
+
+from myshooter import Game
+from profiler import summarize
+from savestate import SavedGame
+from settings import Settings
+from starfield import Starfield
+
+# The Game methods that are timed. _check_collision runs inside _update_bullets and _check_collision_left runs inside
+# _update_aliens, so the time of those two is also part of their caller's time.
+PHASES = ('_check_events', '_update_bullets', '_check_collision', '_update_aliens', '_check_collision_left',
+          '_update_screen')
+
+# Scenario name -> (description, number of frames to run). Scenarios with quadratic work get fewer frames.
+SCENARIOS = {
+    'menu': ("Start menu with the play button and high score, drawn once and then left on the display", 300),
+    'game_over': ("Game over screen, drawn once and then left on the display", 300),
+    'menu_redraw': ("Start menu with the play button and high score, drawn again every frame", 300),
+    'game_over_redraw': ("Game over screen, drawn again every frame", 300),
+    'entities_10': ("10 live aliens and 10 live bullets", 300),
+    'entities_100': ("100 live aliens and 100 live bullets", 200),
+    'entities_1000': ("1,000 live aliens and 1,000 live bullets", 20),
+    'entities_10000': ("10,000 live aliens and 10,000 live bullets", 3),
+    'dense_starfield': ("Playing with a star or meteor in every cell of five starfield layers", 100),
+    'scene': ("A game saved by savestate.py, given with --scene, left to play on from where it was saved", 100),
+}
+
+
+class FrameBenchmark:
+    """
+    Runs a scripted scenario against a real Game and records per-method frame timings
+
+    Attributes:
+
+    - game :    :class:`myshooter.Game` --> The game being measured
+    - rng :    :class:`random.Random` --> The generator used to place the scripted entities
+    - timings :    :class:`dict` --> Lists of durations in milliseconds, keyed by phase name (plus 'frame')
+    - aliens :    :class:`int` --> The number of aliens the scenario keeps alive
+    - bullets :    :class:`int` --> The number of bullets the scenario keeps alive
+    - frame_index :    :class:`int` --> The number of frames run so far, used to script the player's input
+    - scene :    :class:`savestate.SavedGame` --> The saved game the 'scene' scenario starts from, or None
+    - redraw :    :class:`bool` --> Whether the menu or game over screen is forced to be drawn again every frame
+
+    Methods:
+
+    - setup() --> Build the scene for a scenario. Returns None.
+    - run() --> Run the scenario for a number of frames. Returns None.
+    - summary() --> Summarize the recorded timings. Returns a dict.
+    """
+
+    def __init__(self, seed=0, overrides=None, scene=None):
+        """
+        Create a game to benchmark and instrument its hot paths
+        :param seed: Seed for the game and for the placement of scripted entities
+        :param overrides: Settings attributes to change from their defaults, e.g. {'entity_engine': 'numpy'}
+        :param scene: A savestate.SavedGame for the 'scene' scenario. The game is created with its settings, before the
+        overrides.
+        """
+        self.scene = scene
+        settings = Settings() if scene is None else scene.make_settings()
+        for name, value in (overrides or {}).items():
+            setattr(settings, name, value)
+        self.game = Game(seed=seed, settings=settings)
+        # Startup isn't benchmarked, so wait for the assets to load instead of showing the loading screen
+        self.game._finish_loading()
+        # Benchmark rounds don't belong on the player's leaderboard
+        self.game.save_high_score = False
+        self.rng = Random(seed)
+        self.timings = {phase: [] for phase in PHASES + ('frame',)}
+        self.aliens = 0
+        self.bullets = 0
+        self.frame_index = 0
+        self.redraw = False
+        for phase in PHASES:
+            self._instrument(phase)
+
+    def _instrument(self, name):
+        """
+        Replace a Game method with a wrapper that records its duration. The wrapper is set on the instance, so calls
+        made from inside other Game methods are timed too.
+        :param name: The name of the Game method
+        :return None:
+        """
+        method = getattr(self.game, name)
+        durations = self.timings[name]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            durations.append((time.perf_counter() - start) * 1000)
+            return result
+
+        setattr(self.game, name, timed)
+
+    def setup(self, scenario):
+        """
+        Build the scene for a scenario
+        :param scenario: A key of SCENARIOS
+        :return None:
+        """
+        game = self.game
+        # The _redraw scenarios show the same screens, but keep drawing them so the draw path itself is measured
+        self.redraw = scenario.endswith('_redraw')
+        scenario = scenario[:-len('_redraw')] if self.redraw else scenario
+        if scenario == 'menu':
+            return
+        if scenario == 'scene':
+            # Start from the saved game and let it play on, without topping anything up
+            self.scene.restore(game)
+            return
+        game._restart_game_state()
+        if scenario == 'game_over':
+            game._end_game()
+            return
+        if scenario.startswith('entities_'):
+            self.aliens = self.bullets = int(scenario.split('_')[1])
+        elif scenario == 'dense_starfield':
+            self.aliens = self.bullets = 10
+            game.settings.star_layers = [(60.0, 1.0), (120.0, 1.0), (180.0, 1.0), (240.0, 1.0), (360.0, 1.0)]
+            game._draw_background(Starfield(game.settings))
+        self._replenish()
+
+    def _replenish(self):
+        """
+        Keep the scene steady between frames: top the aliens and bullets back up to the scenario's counts, move aliens
+        that got close to the ship back to the right, and undo any score or life changes. This runs outside the timed
+        region.
+        :return None:
+        """
+        game = self.game
+        game.score = 0
+        game.alien_speed_factor = 1.0
+        game.lives = game.settings.lives
+        game.lives_images = [game.life_image] * game.settings.lives
+        if game.array_entities:
+            self._replenish_arrays()
+            return
+        for alien in game.aliens:
+            if alien.rect.x < 200:
+                self._place_alien(alien)
+        # The aliens were moved by hand, so re-file them in the collision grid
+        game.aliens.refresh()
+        while len(game.aliens) < self.aliens:
+            alien = game.alien_pool.acquire(game)
+            self._place_alien(alien)
+            game.aliens.add(alien)
+        while len(game.bullets) < self.bullets:
+            bullet = game.bullet_pool.acquire(game)
+            bullet.rect.x = self.rng.randint(game.ship.rect.right, game.settings.screen_width - 1)
+            bullet.rect.y = self.rng.randint(0, game.settings.screen_height - bullet.rect.height)
+            bullet.x = bullet.previous_x = float(bullet.rect.x)
+            game.bullets.add(bullet)
+
+    def _replenish_arrays(self):
+        """
+        The same as _replenish() for the numpy entity engine
+        :return None:
+        """
+        game = self.game
+        settings = game.settings
+        aliens, bullets = game.aliens, game.bullets
+        width, height = aliens.image.get_size()
+        for i in range(aliens.count):
+            if aliens.x[i] < 200:
+                aliens.x[i] = self.rng.randint(400, settings.screen_width - 1)
+                aliens.y[i] = self.rng.randint(0, settings.screen_height - height)
+                aliens.px[i] = aliens.x[i]
+        while len(aliens) < self.aliens:
+            aliens.add(self.rng.randint(400, settings.screen_width - 1),
+                       self.rng.randint(0, settings.screen_height - height), width, height, -settings.alien_speed)
+        while len(bullets) < self.bullets:
+            bullets.add(self.rng.randint(game.ship.rect.right, settings.screen_width - 1),
+                        self.rng.randint(0, settings.screen_height - settings.bullet_height),
+                        settings.bullet_width, settings.bullet_height, settings.bullet_speed)
+
+    def _place_alien(self, alien):
+        """
+        Put an alien somewhere in the right-hand part of the screen, out of reach of the ship
+        :param alien: The alien to move
+        :return None:
+        """
+        settings = self.game.settings
+        alien.rect.x = self.rng.randint(400, settings.screen_width - 1)
+        alien.rect.y = self.rng.randint(0, settings.screen_height - alien.rect.height)
+        alien.x = alien.previous_x = float(alien.rect.x)
+
+    def _post_input(self):
+        """
+        Script the player: alternate between holding up and holding down every 30 frames
+        :return None:
+        """
+        if self.frame_index % 30 == 0:
+            up = (self.frame_index // 30) % 2 == 0
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=pygame.K_DOWN if up else pygame.K_UP))
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_UP if up else pygame.K_DOWN))
+
+    def run(self, frames):
+        """
+        Run one iteration of the main loop per frame, mirroring Game.run_game() without the frame cap. Every frame
+        simulates exactly one tick and draws at the current positions, so the work per frame doesn't depend on the
+        speed of the machine.
+        :param frames: The number of frames to run
+        :return None:
+        """
+        game = self.game
+        for _ in range(frames):
+            self._post_input()
+            if self.redraw:
+                # Forget the screen on the display, as if something on it changed
+                game.shown_screen = None
+                if game.renderer is not None:
+                    game.renderer.invalidate()
+            start = time.perf_counter()
+            game._check_events()
+            if not game.game_over and game.game_started:
+                game.step()
+            game._update_screen()
+            self.timings['frame'].append((time.perf_counter() - start) * 1000)
+            self.frame_index += 1
+            if self.aliens or self.bullets:
+                self._replenish()
+
+    def summary(self):
+        """
+        Summarize the recorded timings
+        :return dict: Statistics in milliseconds for every phase that ran at least once
+        """
+        return {phase: summarize(durations) for phase, durations in self.timings.items() if durations}
+
+
+def parse_setting(text):
+    """
+    Parse a NAME=VALUE command line argument into a Settings override. The value is read as a Python literal when
+    possible, and as a string otherwise.
+    :param text: The argument, e.g. 'bullets_allowed=50' or 'render_mode=dirty'
+    :return tuple: (name, value)
+    """
+    name, _, value = text.partition('=')
+    if not hasattr(Settings(), name):
+        raise argparse.ArgumentTypeError(f"unknown setting: {name}")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def run_benchmarks(scenarios, frames=None, seed=0, overrides=None, scene_path=None):
+    """
+    Run each scenario in a fresh game
+    :param scenarios: The names of the scenarios to run
+    :param frames: Frames per scenario. None uses each scenario's default.
+    :param seed: Seed for the games and the scripted entities
+    :param overrides: Settings attributes to change from their defaults
+    :param scene_path: The state file the 'scene' scenario starts from
+    :return dict: The results document
+    """
+    scene = SavedGame.load(scene_path) if scene_path is not None else None
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+            'seed': seed,
+            'settings': overrides or {},
+            'scene': scene_path,
+        },
+        'scenarios': {},
+    }
+    for name in scenarios:
+        description, default_frames = SCENARIOS[name]
+        bench = FrameBenchmark(seed, overrides, scene if name == 'scene' else None)
+        bench.setup(name)
+        bench.run(frames or default_frames)
+        results['scenarios'][name] = {'description': description, 'phases': bench.summary(),
+                                      'pools': bench.game.pool_stats()}
+        print(f"{name}: frame p50 {results['scenarios'][name]['phases']['frame']['p50_ms']:.3f} ms", file=sys.stderr)
+    return results
+
+
+def compare(baseline, current, threshold=0.10, floor_ms=0.05):
+    """
+    Find the phases that got slower than the baseline
+    :param baseline: A results document to compare against
+    :param current: The new results document
+    :param threshold: The relative slowdown that counts as a regression, e.g. 0.10 for 10%
+    :param floor_ms: Slowdowns smaller than this many milliseconds are treated as noise
+    :return list: One (scenario, phase, statistic, baseline_ms, current_ms) tuple per regression
+    """
+    regressions = []
+    for scenario, result in current['scenarios'].items():
+        old_phases = baseline['scenarios'].get(scenario, {}).get('phases', {})
+        for phase, stats in result['phases'].items():
+            if phase not in old_phases:
+                continue
+            for statistic in ('p50_ms', 'p95_ms', 'p99_ms'):
+                old, new = old_phases[phase][statistic], stats[statistic]
+                if new > old * (1 + threshold) and new - old > floor_ms:
+                    regressions.append((scenario, phase, statistic, old, new))
+    return regressions
+
+
+def main():
+    """
+    Run the benchmarks from the command line. Exits with status 1 when a comparison finds regressions.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of the Alien Defense frame loop")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=None,
+                        help="scenarios to run (default: all but 'scene', or only 'scene' with --scene)")
+    parser.add_argument('--frames', type=int, default=None, help="frames per scenario (default: per scenario)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the games and scripted entities")
+    parser.add_argument('--entity-engine', choices=('sprite', 'numpy'), default='sprite',
+                        help="how aliens and bullets are stored")
+    parser.add_argument('--setting', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="override a Settings attribute, e.g. --setting render_mode=dirty (repeatable)")
+    parser.add_argument('--scene', default=None, metavar='PATH',
+                        help="a state file from savestate.py for the 'scene' scenario to start from")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--input', help="compare this results file instead of running the benchmarks")
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+    if args.scenarios is None:
+        args.scenarios = ['scene'] if args.scene else [name for name in SCENARIOS if name != 'scene']
+    elif 'scene' in args.scenarios and not args.scene:
+        parser.error("the 'scene' scenario needs --scene")
+
+    if args.input:
+        with open(args.input) as file:
+            results = json.load(file)
+    else:
+        overrides = {'entity_engine': args.entity_engine}
+        overrides.update(args.setting)
+        results = run_benchmarks(args.scenarios, args.frames, args.seed, overrides, args.scene)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    elif not args.baseline:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, results, args.threshold)
+        for scenario, phase, statistic, old, new in regressions:
+            print(f"REGRESSION {scenario} {phase} {statistic}: {old:.3f} ms -> {new:.3f} ms "
+                  f"(+{(new / old - 1) * 100 if old else float('inf'):.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
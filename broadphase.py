@@ -0,0 +1,244 @@
+import math
+
+import pygame
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """
+    A sprite group that also files its sprites into a uniform grid (a spatial hash) by the cells their rects cover, so a
+    collision check only has to look at the sprites near the rect being tested instead of every sprite in the group. The
+    grid is kept up to date incrementally: sprites are filed when they are added, unfiled when they are removed or
+    killed, and only re-filed by update() when their rect has moved into a different set of cells.
+
+    Attributes:
+
+    - cell_size :    :class:`int` --> The width and height of a grid cell in pixels.
+    - cells :    :class:`dict` --> The sprites in each cell, keyed by (column, row). Each value is a dict used as an
+      insertion-ordered set.
+    - spans :    :class:`dict` --> The (first column, first row, last column, last row) each sprite is filed under.
+
+    Methods:
+
+    - update() --> Call update() on every sprite, then re-file the sprites that moved to other cells. Returns None.
+    - refresh() --> Re-file the sprites whose rects moved to other cells. Returns None.
+    - candidates() --> Find the sprites filed in the cells a rect covers. Returns a list.
+    - spritecollide() --> Find, and optionally kill, the sprites that collide with a sprite, now or at any moment of
+      the tick. Returns a list.
+    """
+
+    def __init__(self, *sprites, cell_size=128):
+        """
+        Create the group
+        :param sprites: Sprites to add straight away
+        :param cell_size: The width and height of a grid cell in pixels
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.spans = {}
+        super().__init__(*sprites)
+
+    def _span(self, rect):
+        """
+        The range of cells a rect covers
+        :param rect: The rect to locate
+        :return tuple: (first column, first row, last column, last row)
+        """
+        size = self.cell_size
+        # A rect covers the pixels up to, but not including, its right and bottom edges
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size if rect.width > 0 else rect.left // size,
+                (rect.bottom - 1) // size if rect.height > 0 else rect.top // size)
+
+    def _file(self, sprite, span):
+        """
+        File a sprite under every cell of a span
+        :param sprite: The sprite to file
+        :param span: The cells to file it under
+        :return None:
+        """
+        self.spans[sprite] = span
+        cells = self.cells
+        for column in range(span[0], span[2] + 1):
+            for row in range(span[1], span[3] + 1):
+                cell = cells.get((column, row))
+                if cell is None:
+                    cell = cells[(column, row)] = {}
+                cell[sprite] = None
+
+    def _unfile(self, sprite):
+        """
+        Take a sprite out of every cell it is filed under
+        :param sprite: The sprite to take out
+        :return None:
+        """
+        span = self.spans.pop(sprite)
+        cells = self.cells
+        for column in range(span[0], span[2] + 1):
+            for row in range(span[1], span[3] + 1):
+                cell = cells[(column, row)]
+                del cell[sprite]
+                if not cell:
+                    del cells[(column, row)]
+
+    def add_internal(self, sprite, layer=None):
+        """
+        Add a sprite to the group and file it in the grid
+        :param sprite: The sprite being added
+        :param layer: Unused, kept for compatibility with pygame's groups
+        :return None:
+        """
+        super().add_internal(sprite, layer)
+        self._file(sprite, self._span(sprite.rect))
+
+    def remove_internal(self, sprite):
+        """
+        Remove a sprite from the group and from the grid. pygame calls this for remove(), empty() and sprite.kill().
+        :param sprite: The sprite being removed
+        :return None:
+        """
+        super().remove_internal(sprite)
+        self._unfile(sprite)
+
+    def update(self, *args, **kwargs):
+        """
+        Call update() on every sprite, then re-file the sprites that moved into other cells
+        :return None:
+        """
+        super().update(*args, **kwargs)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-file the sprites whose rects now cover a different set of cells. Call this after moving rects by hand.
+        :return None:
+        """
+        span_of = self._span
+        for sprite, span in list(self.spans.items()):
+            new_span = span_of(sprite.rect)
+            if new_span != span:
+                self._unfile(sprite)
+                self._file(sprite, new_span)
+
+    def candidates(self, rect):
+        """
+        Find the sprites filed in any of the cells a rect covers. Every sprite that collides with the rect is included.
+        :param rect: The rect to look around
+        :return list: The candidate sprites, each listed once
+        """
+        first_column, first_row, last_column, last_row = self._span(rect)
+        cells = self.cells
+        if first_column == last_column and first_row == last_row:
+            return list(cells.get((first_column, first_row), ()))
+        found = {}
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                cell = cells.get((column, row))
+                if cell:
+                    found.update(cell)
+        return list(found)
+
+    def spritecollide(self, sprite, dokill, reach=None):
+        """
+        The same as pygame.sprite.spritecollide(sprite, self, dokill), but only tests the sprites near sprite.rect
+        :param sprite: The sprite to test against the group
+        :param dokill: A boolean to indicate the colliding sprites should be killed
+        :param reach: None to test where the sprites are now. Otherwise the sprites are swept from where they were at
+        the start of the tick, and reach is the farthest any sprite of the group moved, so the grid search can't miss one.
+        :return list: The sprites of this group that collide with sprite
+        """
+        if reach is None:
+            collide = sprite.rect.colliderect
+            crashed = [candidate for candidate in self.candidates(sprite.rect) if collide(candidate.rect)]
+        else:
+            start, end = sprite.interpolated_rect(0.0), sprite.rect
+            # Any sprite the swept sprite touched is now within reach of the ground the swept sprite covered
+            area = start.union(end).inflate(2 * reach, 2 * reach)
+            crashed = [candidate for candidate in self.candidates(area)
+                       if swept_colliderect(start, end, candidate.interpolated_rect(0.0), candidate.rect)]
+        if dokill:
+            for candidate in crashed:
+                candidate.kill()
+        return crashed
+
+
+def _overlap_times(start, end, low, high):
+    """
+    The part of a tick during which an offset that moves steadily from start to end lies strictly between two bounds
+    :param start: The offset at the start of the tick
+    :param end: The offset at the end of the tick
+    :param low: The lower bound
+    :param high: The upper bound
+    :return tuple: The (entry, exit) fractions of the tick. They can lie outside 0 to 1, and entry >= exit if never.
+    """
+    if start == end:
+        return (-math.inf, math.inf) if low < start < high else (math.inf, -math.inf)
+    entry = (low - start) / (end - start)
+    exit_ = (high - start) / (end - start)
+    return (entry, exit_) if entry < exit_ else (exit_, entry)
+
+
+def swept_colliderect(start_a, end_a, start_b, end_b):
+    """
+    Whether two rects overlap at any moment of a tick, while each moves in a straight line from its rect at the start of
+    the tick to its rect at the end. Overlapping follows the rules of Rect.colliderect, so whenever the rects collide at
+    the end of the tick they collide here too, but a small fast rect can no longer pass through another between ticks.
+    :param start_a: The first rect at the start of the tick
+    :param end_a: The first rect at the end of the tick, the same size
+    :param start_b: The second rect at the start of the tick
+    :param end_b: The second rect at the end of the tick, the same size
+    :return bool:
+    """
+    # Like Rect.colliderect, rects without an area never collide
+    if end_a.width <= 0 or end_a.height <= 0 or end_b.width <= 0 or end_b.height <= 0:
+        return False
+    # Watch the first rect from the second: the rects overlap while the offset between their corners is strictly
+    # between minus the first's size and the second's size, on both axes
+    entry_x, exit_x = _overlap_times(start_a.x - start_b.x, end_a.x - end_b.x, -end_a.width, end_b.width)
+    entry_y, exit_y = _overlap_times(start_a.y - start_b.y, end_a.y - end_b.y, -end_a.height, end_b.height)
+    entry, exit_ = max(entry_x, entry_y), min(exit_x, exit_y)
+    return entry < exit_ and entry < 1 and exit_ > 0
+
+
+def spritecollide(sprite, group, dokill, reach=None):
+    """
+    Drop-in for pygame.sprite.spritecollide() that uses the group's grid when it is a SpatialGroup
+    :param sprite: The sprite to test
+    :param group: The group to test it against
+    :param dokill: A boolean to indicate the colliding sprites of the group should be killed
+    :param reach: None to test where the sprites are now, or the farthest any sprite of the group moved this tick to
+    sweep them over the tick with swept_colliderect(). Swept sprites need an interpolated_rect() method.
+    :return list: The sprites of the group that collide with sprite
+    """
+    if isinstance(group, SpatialGroup):
+        return group.spritecollide(sprite, dokill, reach)
+    if reach is None:
+        return pygame.sprite.spritecollide(sprite, group, dokill)
+    start, end = sprite.interpolated_rect(0.0), sprite.rect
+    crashed = [other for other in group if swept_colliderect(start, end, other.interpolated_rect(0.0), other.rect)]
+    if dokill:
+        for other in crashed:
+            other.kill()
+    return crashed
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, reach=None):
+    """
+    Drop-in for pygame.sprite.groupcollide() that uses groupb's grid when it is a SpatialGroup. Sprites of groupa are
+    checked in order, and a sprite of groupb that was killed by an earlier sprite can't be hit again, exactly like
+    pygame's version.
+    :param groupa: The group whose sprites are tested one at a time, e.g. the bullets
+    :param groupb: The group they are tested against, e.g. the aliens
+    :param dokilla: A boolean to indicate colliding sprites of groupa should be killed
+    :param dokillb: A boolean to indicate colliding sprites of groupb should be killed
+    :param reach: None to test where the sprites are now, or the farthest any sprite of groupb moved this tick to sweep
+    both groups over the tick
+    :return dict: The colliding sprites of groupa, each mapped to the list of sprites of groupb it hit
+    """
+    crashed = {}
+    for sprite in groupa.sprites():
+        collision = spritecollide(sprite, groupb, dokillb, reach)
+        if collision:
+            crashed[sprite] = collision
+            if dokilla:
+                sprite.kill()
+    return crashed
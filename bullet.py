@@ -1,56 +1,92 @@
 import pygame
-from pygame.sprite import Sprite
 
+from pool import PooledSprite
+from timestep import interpolate
 
-class Bullet(Sprite):
+
+class Bullet(PooledSprite):
     """
-    A class to manage bullets fired from the ship
+    A class to manage bullets fired from the ship. Bullets are recycled through a Pool, so a bullet that left the screen
+    or hit an alien is reset and reused for a later shot.
 
     Attributes:
 
-    - screen :    :class:`pygame.surface.Surface` --> The screen of the game on which to draw.
-    - settings :    :class:`settings.Settings` --> Game settings that control aspects of the game, such as bullet speed, color, and size.
     - color :    :class:`tuple` --> The RGB color value of the bullet.
     - rect :    :class:`pygame.rect.Rect` --> The rect object that stores rectangular coordinates of the bullet.
     - x :    :class:`float` --> The horizontal position of the bullet.
+    - previous_x :    :class:`float` --> The horizontal position of the bullet before the last update.
+    - speed :    :class:`float` --> How many pixels per second the bullet moves.
 
     Methods:
 
+    - reset() --> Place the bullet in front of the ship. Returns None.
     - update() --> Move the bullet across the screen. Returns None.
-    - draw_bullet() --> Draw the bullet to the screen. Returns None.
+    - interpolated_rect() --> The bullet's rect between its previous and current position. Returns a Rect.
+    - draw_bullet() --> Draw the bullet to the screen. Returns the Rect that was drawn on.
     """
 
-    def __init__(self, game):
+    __slots__ = ('color', 'rect', 'x', 'previous_x', 'speed')
+
+    def __init__(self, game=None, pool=None):
         """
         Create a new Bullet object at the ship's position
-        :param game:
+        :param game: The game the bullet is fired in, or None to create an unplaced bullet for a pool
+        :param pool: The pool the bullet returns to once it is removed from its group
+        """
+        super().__init__(pool)
+        self.color = (255, 255, 255)
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.x = self.previous_x = 0.0
+        self.speed = 0.0
+        if game is not None:
+            self.reset(game)
+
+    def reset(self, game):
+        """
+        Place the bullet in front of the ship, with the size, color and speed from the settings
+        :param game: The game the bullet is fired in
+        :return None:
         """
-        super().__init__()
-        self.screen = game.screen
-        self.settings = game.settings
-        self.color = self.settings.bullet_color
+        settings = game.settings
+        self.color = settings.bullet_color
+        self.speed = settings.bullet_speed
 
-        # Create a bullet rect at (0,0) and then set the correct position
-        self.rect = pygame.Rect(0, 0, self.settings.bullet_width, self.settings.bullet_height)
+        # Size the bullet rect and then set the correct position
+        self.rect.size = (settings.bullet_width, settings.bullet_height)
         # Align the left side of the bullet with the right side of the ship
         self.rect.midleft = game.ship.rect.midright
 
         # Store the bullet's position as a decimal value
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
-    def update(self):
+    def update(self, dt):
         """
         Move the bullet up the screen
+        :param dt: The length of the simulation tick in seconds
         :return None:
         """
-        # Update the decimal place position of the bullet
-        self.x += self.settings.bullet_speed
+        self.previous_x = self.x
+        # Update the decimal place position of the bullet. speed is in pixels per second.
+        self.x += self.speed * dt
         # Update the rect position
         self.rect.x = self.x
 
-    def draw_bullet(self):
+    def interpolated_rect(self, alpha):
+        """
+        The bullet's rect between its position at the previous and the current simulation tick
+        :param alpha: How far between the two ticks, from 0 to 1
+        :return pygame.Rect:
+        """
+        rect = self.rect.copy()
+        rect.x = interpolate(self.previous_x, self.x, alpha)
+        return rect
+
+    def draw_bullet(self, surface, alpha=1.0):
         """
         Draw the bullet to the screen
-        :return None:
+        :param surface: The surface to draw on
+        :param alpha: How far between the previous and current simulation tick to draw the bullet, from 0 to 1
+        :return pygame.Rect: The area of the surface that was drawn on
         """
-        pygame.draw.rect(self.screen, self.color, self.rect)
+        return pygame.draw.rect(surface, self.color, self.interpolated_rect(alpha))
@@ -0,0 +1,375 @@
+import numpy as np
+import pygame
+
+
+def _overlap_times(start, end, low, high):
+    """
+    The part of a tick during which offsets that move steadily from start to end lie strictly between two bounds, like
+    broadphase.swept_colliderect() works out for a single pair of rects
+    :param start: The offsets at the start of the tick, as an ndarray
+    :param end: The offsets at the end of the tick
+    :param low: The lower bounds
+    :param high: The upper bounds
+    :return tuple: Two ndarrays, the entry and exit fractions of the tick. Entry >= exit where the offset never fits.
+    """
+    moving = end != start
+    inside = (low < start) & (start < high)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_low = (low - start) / (end - start)
+        to_high = (high - start) / (end - start)
+    entry = np.where(moving, np.minimum(to_low, to_high), np.where(inside, -np.inf, np.inf))
+    exit_ = np.where(moving, np.maximum(to_low, to_high), np.where(inside, np.inf, -np.inf))
+    return entry, exit_
+
+
+def round_half_away(values):
+    """
+    Round like pygame does when a float is assigned to a Rect coordinate: halves go away from zero
+    :param values: A NumPy array of floats
+    :return numpy.ndarray: The rounded values as integers
+    """
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+class EntityArrays:
+    """
+    A struct-of-arrays store for many entities of the same kind, such as all aliens or all bullets. Positions, sizes and
+    velocities live in contiguous NumPy arrays, so moving, culling and collision checks run as a handful of vectorized
+    operations instead of one Python call per sprite. Entities keep the order they were added in, like a sprite group.
+
+    Attributes:
+
+    - x :    :class:`numpy.ndarray` --> The exact horizontal position of each entity's left edge.
+    - y :    :class:`numpy.ndarray` --> The vertical position of each entity's top edge.
+    - width :    :class:`numpy.ndarray` --> The width of each entity.
+    - height :    :class:`numpy.ndarray` --> The height of each entity.
+    - px :    :class:`numpy.ndarray` --> The horizontal position of each entity before the last update, used for drawing
+      between simulation ticks.
+    - vx :    :class:`numpy.ndarray` --> How many pixels per second each entity moves horizontally, before the speed
+      factor.
+    - count :    :class:`int` --> The number of live entities. Only the first count slots of each array are in use.
+    - image :    :class:`pygame.surface.Surface` --> The image drawn for every entity, or None to draw filled rects.
+    - color :    :class:`tuple` --> The RGB color of the filled rects drawn when there is no image.
+    - cell_size :    :class:`int` --> The smallest grid cell used when other stores are checked against this one.
+
+    Methods:
+
+    - add() --> Add an entity. Returns None.
+    - empty() --> Remove every entity. Returns None.
+    - update() --> Move every entity by its velocity. Returns None.
+    - lefts() --> The integer left edge of each entity, as its Rect would have it. Returns an ndarray.
+    - remove() --> Remove the entities selected by a mask. Returns the number removed.
+    - reach() --> The farthest any entity moved in the last update. Returns an int.
+    - overlapping() --> Find the entities that overlap a Rect, now or at any moment of the tick. Returns a boolean
+      ndarray.
+    - overlapping_pairs() --> Find the overlapping pairs between two stores with a grid broadphase, now or at any moment
+      of the tick. Returns two ndarrays.
+    - collide() --> Remove every pair of overlapping entities between two stores. Returns the number of hits.
+    - positions() --> The top left corner every entity is drawn at. Returns (x, y) pairs.
+    - draw() --> Draw every entity to a surface. Returns the list of Rects that were drawn on.
+    """
+
+    def __init__(self, capacity=64, image=None, color=(255, 255, 255), cell_size=128):
+        """
+        Create an empty store
+        :param capacity: The number of entities to allocate room for. The arrays grow when it runs out.
+        :param image: The image to draw for every entity, or None to draw filled rects
+        :param color: The RGB color of the filled rects
+        :param cell_size: The smallest grid cell used when other stores are checked against this one
+        """
+        self.x = np.zeros(capacity)
+        self.px = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.count = 0
+        self.image = image
+        self.color = color
+        self.cell_size = cell_size
+
+    def __len__(self):
+        """
+        The number of live entities, so the store can stand in for a sprite group
+        :return int:
+        """
+        return self.count
+
+    def _grow(self):
+        """
+        Double the capacity of every array
+        :return None:
+        """
+        for name in ('x', 'px', 'y', 'width', 'height', 'vx'):
+            old = getattr(self, name)
+            new = np.zeros(max(1, len(old) * 2))
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, x, y, width, height, vx):
+        """
+        Add an entity at the end of the store
+        :param x: The horizontal position of the left edge
+        :param y: The vertical position of the top edge
+        :param width: The width of the entity
+        :param height: The height of the entity
+        :param vx: How many pixels per second the entity moves horizontally
+        :return None:
+        """
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = x
+        self.px[i] = x
+        self.y[i] = y
+        self.width[i] = width
+        self.height[i] = height
+        self.vx[i] = vx
+        self.count += 1
+
+    def empty(self):
+        """
+        Remove every entity
+        :return None:
+        """
+        self.count = 0
+
+    def update(self, speed_factor=1.0, dt=1.0):
+        """
+        Move every entity by its velocity
+        :param speed_factor: A multiplier applied to every velocity
+        :param dt: The length of the simulation tick in seconds
+        :return None:
+        """
+        n = self.count
+        self.px[:n] = self.x[:n]
+        self.x[:n] += self.vx[:n] * speed_factor * dt
+
+    def lefts(self):
+        """
+        The integer left edge of each live entity, rounded the same way a Rect rounds a float position
+        :return numpy.ndarray:
+        """
+        return round_half_away(self.x[:self.count])
+
+    def remove(self, mask):
+        """
+        Remove the entities selected by a mask and close the gaps, keeping the remaining entities in order
+        :param mask: A boolean array with one entry per live entity, True for the entities to remove
+        :return int: The number of entities removed
+        """
+        removed = int(np.count_nonzero(mask))
+        if removed:
+            keep = ~mask
+            n = self.count
+            remaining = n - removed
+            for array in (self.x, self.px, self.y, self.width, self.height, self.vx):
+                array[:remaining] = array[:n][keep]
+            self.count = remaining
+        return removed
+
+    def reach(self):
+        """
+        The farthest any live entity moved in the last update, in whole pixels, rounded up
+        :return int:
+        """
+        n = self.count
+        if not n:
+            return 0
+        return int(np.ceil(np.abs(self.x[:n] - self.px[:n]).max())) + 1
+
+    def _bounds(self):
+        """
+        The integer left, top, right and bottom edges of each live entity
+        :return tuple: Four ndarrays
+        """
+        n = self.count
+        left = self.lefts()
+        top = self.y[:n].astype(np.int64)
+        return left, top, left + self.width[:n].astype(np.int64), top + self.height[:n].astype(np.int64)
+
+    def overlapping(self, rect, start=None):
+        """
+        Find the live entities that overlap a Rect, with the same rules as Rect.colliderect
+        :param rect: A pygame Rect, e.g. the ship's rect
+        :param start: None to test where the entities are now. Otherwise the Rect rect was at the start of the tick: the
+        Rect and the entities are swept from where they were then, and every entity they overlapped at any moment of the
+        tick is found, like broadphase.swept_colliderect().
+        :return numpy.ndarray: A boolean array with one entry per live entity
+        """
+        left, top, right, bottom = self._bounds()
+        if rect.width <= 0 or rect.height <= 0:
+            return np.zeros(self.count, dtype=bool)
+        if start is None:
+            return ((left < rect.right) & (rect.left < right) & (top < rect.bottom) & (rect.top < bottom)
+                    & (right > left) & (bottom > top))
+        # Watch the Rect from each entity: they overlap while the offset between their corners is strictly between
+        # minus the Rect's size and the entity's size. Entities only move sideways.
+        width, height = right - left, bottom - top
+        previous_left = round_half_away(self.px[:self.count])
+        entry_x, exit_x = _overlap_times(start.x - previous_left, rect.x - left, -rect.width, width)
+        entry_y, exit_y = _overlap_times(np.full(self.count, start.y - top), rect.y - top, -rect.height, height)
+        entry, exit_ = np.maximum(entry_x, entry_y), np.minimum(exit_x, exit_y)
+        return (entry < exit_) & (entry < 1) & (exit_ > 0) & (width > 0) & (height > 0)
+
+    def overlapping_pairs(self, other, swept=False):
+        """
+        Find every pair of overlapping entities between this store and another, with the same rules as
+        Rect.colliderect. The other store is bucketed into a uniform grid by sorting the entities on their cell, and each
+        entity of this store is only tested against the few cells around it, so the cost grows with the number of
+        entities and their density rather than with the product of the two counts.
+        :param other: The store to check against, e.g. the aliens when this store holds bullets
+        :param swept: Sweep the entities of both stores from their positions before the last update, and find the
+        pairs that overlapped at any moment of the tick, like broadphase.swept_colliderect(). A fast entity then can't
+        pass through another between ticks. Pairs that overlap now are always found.
+        :return tuple: Two integer ndarrays of the same length, the indices into this store and into the other store
+        """
+        a_left, a_top, a_right, a_bottom = self._bounds()
+        b_left, b_top, b_right, b_bottom = other._bounds()
+        # Like Rect.colliderect, entities without an area never collide
+        a_index = np.flatnonzero((a_right > a_left) & (a_bottom > a_top))
+        b_index = np.flatnonzero((b_right > b_left) & (b_bottom > b_top))
+        if not len(a_index) or not len(b_index):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        a_left, a_top, a_right, a_bottom = a_left[a_index], a_top[a_index], a_right[a_index], a_bottom[a_index]
+
+        if swept:
+            # The offset between the left edges of each pair at the start of the tick, less the offset now, is how far
+            # the pair closed in during the tick
+            a_start = round_half_away(self.px[a_index])
+            b_start = round_half_away(other.px[:other.count])
+            a_end, a_width, b_width = a_left, a_right - a_left, b_right - b_left
+
+            def test(i, j):
+                # Entities only move sideways, so the rows must overlap and the left edges must pass within range
+                start = a_start[i] - b_start[j]
+                end = a_end[i] - b_left[j]
+                return ((a_top[i] < b_bottom[j]) & (b_top[j] < a_bottom[i])
+                        & (np.minimum(start, end) < b_width[j]) & (np.maximum(start, end) > -a_width[i]))
+
+            # Search the ground each entity covered during the tick, widened by the farthest the other entities moved
+            reach = other.reach()
+            a_left = np.minimum(a_left, a_start) - reach
+            a_right = np.maximum(a_right, a_start + a_width) + reach
+        else:
+            def test(i, j):
+                return ((a_left[i] < b_right[j]) & (b_left[j] < a_right[i])
+                        & (a_top[i] < b_bottom[j]) & (b_top[j] < a_bottom[i]))
+
+        # With only a few entities, testing every pair at once is cheaper than building the grid
+        if len(a_index) * len(b_index) <= 4096:
+            rows, columns = np.nonzero(test(np.arange(len(a_index))[:, None], b_index))
+            return a_index[rows], b_index[columns]
+
+        # File each entity of the other store under the cell of its top left corner. Cells are at least as big as those
+        # entities, so an entity can only reach from its own cell into the next column and row.
+        cell = max(other.cell_size, int((b_right - b_left)[b_index].max()), int((b_bottom - b_top)[b_index].max()))
+        b_column = b_left[b_index] // cell
+        b_row = b_top[b_index] // cell
+        min_column, max_column = b_column.min(), b_column.max()
+        min_row, max_row = b_row.min(), b_row.max()
+        columns = max_column - min_column + 1
+        keys = (b_row - min_row) * columns + (b_column - min_column)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # The cells whose entities could overlap each entity of this store
+        first_column = (a_left - cell + 1) // cell
+        last_column = (a_right - 1) // cell
+        first_row = (a_top - cell + 1) // cell
+        last_row = (a_bottom - 1) // cell
+
+        pairs_a = []
+        pairs_b = []
+        for column_offset in range(int((last_column - first_column).max()) + 1):
+            column = first_column + column_offset
+            for row_offset in range(int((last_row - first_row).max()) + 1):
+                row = first_row + row_offset
+                # Skip cells past an entity's own range, and cells outside the grid so keys can't wrap around
+                usable = ((column <= last_column) & (row <= last_row) & (column >= min_column) & (column <= max_column)
+                          & (row >= min_row) & (row <= max_row))
+                query = (row[usable] - min_row) * columns + (column[usable] - min_column)
+                low = np.searchsorted(sorted_keys, query, 'left')
+                counts = np.searchsorted(sorted_keys, query, 'right') - low
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Expand each (entity, cell) query into one candidate pair per entity filed in that cell
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                pairs_a.append(np.repeat(np.flatnonzero(usable), counts))
+                pairs_b.append(order[np.repeat(low, counts) + offsets])
+        if not pairs_a:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        candidate_a = np.concatenate(pairs_a)
+        candidate_b = b_index[np.concatenate(pairs_b)]
+
+        # The exact test on the candidates only
+        overlap = test(candidate_a, candidate_b)
+        return a_index[candidate_a[overlap]], candidate_b[overlap]
+
+    def collide(self, other, centers=False, swept=False):
+        """
+        Remove every entity of this store that overlaps an entity of the other store, together with the entities it hit.
+        Matches pygame.sprite.groupcollide(self, other, True, True): entities are checked in order, and an entity of the
+        other store that was already hit can't be hit again. That makes each hit entity of the other store belong to the
+        first entity of this store that overlaps it, and an entity of this store only counts as a hit if it is the first
+        one to reach at least one entity.
+        :param other: The store to check against, e.g. the aliens when this store holds bullets
+        :param centers: Also return where the hit entities of the other store were
+        :param swept: Count the pairs that overlapped at any moment of the tick, see overlapping_pairs()
+        :return int: The number of entities of this store that hit something. With centers, a tuple of that number and
+        the centers of the hit entities of the other store, as (x, y) pairs.
+        """
+        pairs_a, pairs_b = self.overlapping_pairs(other, swept)
+        if not len(pairs_a):
+            return (0, []) if centers else 0
+        first = np.full(other.count, self.count, dtype=np.int64)
+        np.minimum.at(first, pairs_b, pairs_a)
+        victims = first < self.count
+        hits = np.zeros(self.count, dtype=bool)
+        hits[first[victims]] = True
+        if centers:
+            left, top, right, bottom = (edges[victims] for edges in other._bounds())
+            hit_centers = list(zip(((left + right) // 2).tolist(), ((top + bottom) // 2).tolist()))
+        self.remove(hits)
+        other.remove(victims)
+        if centers:
+            return int(np.count_nonzero(hits)), hit_centers
+        return int(np.count_nonzero(hits))
+
+    def _drawn_bounds(self, alpha):
+        """
+        The edges every live entity is drawn at
+        :param alpha: How far between the previous and current simulation tick to draw the entities, from 0 to 1
+        :return tuple: Four ndarrays
+        """
+        left, top, right, bottom = self._bounds()
+        if alpha != 1.0:
+            # Draw each entity between its previous and current position, keeping its width
+            n = self.count
+            width = right - left
+            left = round_half_away(self.px[:n] + (self.x[:n] - self.px[:n]) * alpha)
+            right = left + width
+        return left, top, right, bottom
+
+    def positions(self, alpha=1.0):
+        """
+        The top left corner every live entity is drawn at, e.g. to draw them from a texture atlas
+        :param alpha: How far between the previous and current simulation tick to draw the entities, from 0 to 1
+        :return zip: (x, y) pairs of ints
+        """
+        left, top, _, _ = self._drawn_bounds(alpha)
+        return zip(left.tolist(), top.tolist())
+
+    def draw(self, surface, alpha=1.0):
+        """
+        Draw every live entity to a surface, as its image or as a filled rect
+        :param surface: The surface to draw on
+        :param alpha: How far between the previous and current simulation tick to draw the entities, from 0 to 1
+        :return list: The Rects of the surface that were drawn on
+        """
+        left, top, right, bottom = self._drawn_bounds(alpha)
+        if self.image is not None:
+            return surface.blits([(self.image, (x, y)) for x, y in zip(left.tolist(), top.tolist())])
+        return [pygame.draw.rect(surface, self.color, (x, y, w, h))
+                for x, y, w, h in zip(left.tolist(), top.tolist(), (right - left).tolist(), (bottom - top).tolist())]
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    A least-recently-used cache of rendered text, so a string only has to be rasterized by the font once
+
+    Attributes:
+
+    - maxsize :    :class:`int` --> The number of rendered surfaces to keep.
+    - surfaces :    :class:`collections.OrderedDict` --> The rendered surfaces keyed by (font, text, color, antialias),
+      least recently used first.
+    - hits :    :class:`int` --> The number of renders served from the cache.
+    - misses :    :class:`int` --> The number of renders that had to be rasterized.
+
+    Methods:
+
+    - render() --> Return the rendered surface of a string. Returns a Surface.
+    """
+
+    def __init__(self, maxsize=64):
+        """
+        Create an empty cache
+        :param maxsize: The number of rendered surfaces to keep
+        """
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """
+        Return the rendered surface of a string, rasterizing it only if it isn't cached. The surface is shared, so it
+        must not be drawn on.
+        :param font: The pygame Font to render with
+        :param text: The string to render
+        :param color: The RGB color of the text
+        :param antialias: A boolean to indicate the text should be antialiased
+        :return pygame.Surface:
+        """
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class Hud:
+    """
+    The in-game heads-up display. The lives in the top left and the score and high score in the top right are
+    composited into a single surface, which is only rebuilt when one of them changes. Each frame just blits the parts
+    of that surface that hold something.
+
+    Attributes:
+
+    - font :    :class:`pygame.font.Font` --> The font of the score and high score.
+    - text_cache :    :class:`hud.TextCache` --> The cache the score and high score text is rendered through.
+    - color :    :class:`tuple` --> The RGB color of the text.
+    - width :    :class:`int` --> The width of the screen.
+    - image :    :class:`pygame.surface.Surface` --> The composited HUD, transparent where nothing is shown.
+    - regions :    :class:`list` --> The rects of image that hold something, in screen coordinates.
+    - rebuilds :    :class:`int` --> The number of times the HUD was composited.
+
+    Methods:
+
+    - blit_sequence() --> The blits that draw the HUD, rebuilding it first if what it shows changed. Returns a list.
+    - draw() --> Draw the HUD, rebuilding it first if what it shows changed. Returns the list of Rects drawn on.
+    """
+
+    def __init__(self, settings, font, text_cache, color=(0, 0, 0)):
+        """
+        Create the HUD
+        :param settings: The game settings. Uses screen_width.
+        :param font: The font of the score and high score
+        :param text_cache: The cache to render text through
+        :param color: The RGB color of the text
+        """
+        self.font = font
+        self.text_cache = text_cache
+        self.color = color
+        self.width = settings.screen_width
+        self.image = pygame.Surface((self.width, 1), pygame.SRCALPHA)
+        self.regions = []
+        self.rebuilds = 0
+        self._state = None
+
+    def _rebuild(self, lives_images, score, high_score):
+        """
+        Composite the lives, score and high score into the HUD surface
+        :param lives_images: The images that show the remaining and lost lives
+        :param score: The score to show, or None to leave it out
+        :param high_score: The high score to show, or None to leave it out
+        :return None:
+        """
+        # Where each element goes: (image, (x, y))
+        items = [(image, (i * 40, 10)) for i, image in enumerate(lives_images)]
+        if score is not None:
+            items.append((self.text_cache.render(self.font, f"Score: {score}", self.color), (self.width - 200, 10)))
+        if high_score is not None:
+            items.append((self.text_cache.render(self.font, f"High Score: {high_score}", self.color),
+                          (self.width - 200, 35)))
+
+        rects = [image.get_rect(topleft=position) for image, position in items]
+        height = max((rect.bottom for rect in rects), default=1)
+        if height > self.image.get_height():
+            self.image = pygame.Surface((self.width, height), pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 0))
+        # Nothing overlaps, so each element is copied onto transparent pixels unchanged
+        self.image.blits(items, doreturn=False)
+
+        # Group the lives and the scores into one region each, so drawing takes at most two blits
+        lives = rects[:len(lives_images)]
+        scores = rects[len(lives_images):]
+        self.regions = [group[0].unionall(group[1:]) for group in (lives, scores) if group]
+        self.rebuilds += 1
+
+    def blit_sequence(self, lives_images, score=None, high_score=None):
+        """
+        The blits that draw the HUD, for Surface.blits(), rebuilding it first if the lives, score or high score changed
+        since the last frame
+        :param lives_images: The images that show the remaining and lost lives
+        :param score: The score to show in the top right, or None to leave it out
+        :param high_score: The high score to show in the top right, or None to leave it out
+        :return list: (image, position, area) tuples
+        """
+        state = (tuple(lives_images), score, high_score)
+        if state != self._state:
+            self._rebuild(lives_images, score, high_score)
+            self._state = state
+        image = self.image
+        return [(image, region, region) for region in self.regions]
+
+    def draw(self, surface, lives_images, score=None, high_score=None):
+        """
+        Draw the HUD, rebuilding it first if the lives, score or high score changed since the last frame
+        :param surface: The surface to draw on
+        :param lives_images: The images that show the remaining and lost lives
+        :param score: The score to show in the top right, or None to leave it out
+        :param high_score: The high score to show in the top right, or None to leave it out
+        :return list: The Rects of the surface that were drawn on
+        """
+        return surface.blits(self.blit_sequence(lives_images, score, high_score))
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class Loader:
+    """
+    Runs the slow parts of startup, such as reading and decoding assets and painting the starfield, on a pool of worker
+    threads, so the window can show its loading screen in the meantime instead of staying blank.
+
+    Attributes:
+
+    - executor :    :class:`concurrent.futures.ThreadPoolExecutor` --> The worker threads.
+    - futures :    :class:`list` --> The futures of every task submitted so far, in the order they were submitted.
+    - started :    :class:`float` --> The time.perf_counter() reading the loader was created at.
+    - finished :    :class:`float` --> The time.perf_counter() reading every task was found to be done at, or None.
+
+    Methods:
+
+    - submit() --> Run a function on a worker thread. Returns a Future.
+    - progress --> The share of the submitted tasks that are done, from 0 to 1.
+    - done --> A boolean to indicate every submitted task is done.
+    - wait() --> Block until every task is done and shut the workers down. Returns None.
+    """
+
+    def __init__(self, workers=4):
+        """
+        Start the worker threads
+        :param workers: The number of worker threads
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loader')
+        self.futures = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def submit(self, function, *args):
+        """
+        Run a function on a worker thread. Tasks start in the order they are submitted.
+        :param function: The function to run
+        :param args: The arguments to call it with
+        :return concurrent.futures.Future:
+        """
+        future = self.executor.submit(function, *args)
+        self.futures.append(future)
+        return future
+
+    @property
+    def progress(self):
+        """
+        The share of the submitted tasks that are done
+        :return float:
+        """
+        if not self.futures:
+            return 1.0
+        return sum(future.done() for future in self.futures) / len(self.futures)
+
+    @property
+    def done(self):
+        """
+        A boolean to indicate every submitted task is done
+        :return bool:
+        """
+        return all(future.done() for future in self.futures)
+
+    def wait(self):
+        """
+        Block until every task is done and shut the workers down. An exception raised by a task is raised again here,
+        on the calling thread.
+        :return None:
+        """
+        wait(self.futures)
+        if self.finished is None:
+            self.finished = time.perf_counter()
+        self.executor.shutdown()
+        for future in self.futures:
+            future.result()
@@ -13,19 +13,38 @@ the player loses a life. When 3 lives has been lost, the game will end. The game
 """
 
 # Libraries to be imported
+import argparse
+import math
 import os
+import struct
 import sys
+import time
+from collections import deque
+from concurrent.futures import wait
+
 import pygame
 
+from assets import assets
+from atlas import Atlas
+from broadphase import SpatialGroup, groupcollide, spritecollide
+from hud import Hud, TextCache
+from loader import Loader
+from pool import Pool
+from profiler import FrameProfiler
+from renderer import DirtyRectRenderer
 from ship import Ship
-from stars import Stars
+from starfield import Starfield
+import telemetry
+from timestep import FixedTimestep
+from waves import WaveDirector
 from alien import Alien
 from bullet import Bullet
-from random import random, randint
+from random import Random, SystemRandom
+from replay import InputRecorder
+from savestate import Autosaver, SavedGame, SnapshotRing
+from scores import ScoreStore, settings_profile
 from settings import Settings
-
-# Change the current working directory of a Python script to the directory where the script itself is
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
+from simthread import SimulationThread, blend_positions, ship_position
 
 
 # Classes
@@ -35,65 +54,153 @@ class Game:
 
     Attributes:
 
-    - aliens :    :class:`pygame.sprite.Group` --> The group of alien sprites
-    - bullets :    :class:`pygame.sprite.Group` --> The group of bullet sprites
-    - clock :    :class:`pygame.time.Clock` --> The clock object to help track time
+    - alien_pool :    :class:`pool.Pool` --> Recycles the alien sprites, or None with the numpy engine
+    - aliens :    :class:`broadphase.SpatialGroup` --> The group of alien sprites, or an EntityArrays with the numpy engine
+    - array_entities :    :class:`bool` --> A boolean to indicate aliens and bullets are stored in NumPy arrays
+    - bullet_pool :    :class:`pool.Pool` --> Recycles the bullet sprites, or None with the numpy engine
+    - bullets :    :class:`pygame.sprite.Group` --> The group of bullet sprites, or an EntityArrays with the numpy engine
+    - clock :    :class:`pygame.time.Clock` --> The clock object that caps the frame rate
+    - director :    :class:`waves.WaveDirector` --> Schedules the spawns in the wave modes, or None in the classic mode
+    - dt :    :class:`float` --> The length of a simulation tick in seconds
+    - fastest_alien :    :class:`float` --> The speed of the fastest alien spawned this round, before the speed factor, which bounds how far an alien moves in a tick
+    - swept :    :class:`bool` --> A boolean to indicate collisions are swept over each tick, so nothing passes through anything between ticks, instead of only tested at the end of it
+    - simulation :    :class:`simthread.SimulationThread` --> Simulates rounds on a worker thread, or None when they are simulated between frames
     - font :    :class:`pygame.font.Font` --> The font used to write game over
+    - frame_cap :    :class:`int` --> The most frames drawn per second, or 0 for no cap
     - game_over :    :class:`bool` --> A boolean to indicate if the game state should stop
+    - headless :    :class:`bool` --> A boolean to indicate the game runs without a window or audio
+    - hud :    :class:`hud.Hud` --> The cached surface showing the lives, score and high score
     - lives :    :class:`int` --> The number of lives the player has before the game ends
     - lives_images :    :class:`list` --> A list of images to indicate how many lives the player has left
-    - screen :    :class:`pygame.surface.Surface` --> The game screen
+    - loader :    :class:`loader.Loader` --> Loads the assets on worker threads during startup, or None once they are loaded
+    - profiler :    :class:`profiler.FrameProfiler` --> Times the phases of every frame. F3 shows its overlay.
+    - particles :    :class:`particles.ParticleSystem` --> The explosions, impacts and engine trails, or None when they are off or NumPy is missing
+    - effects :    :class:`collections.deque` --> The bursts of particles queued by the simulation for the render loop, as (name, x, y) tuples
+    - recorder :    :class:`replay.InputRecorder` --> Writes every input to a replay log, or None when not recording
+    - telemetry :    :class:`telemetry.TelemetryWriter` --> Streams gameplay events to a file, or None
+    - autosaver :    :class:`savestate.Autosaver` --> Keeps the round being played in a file to resume it from, or None
+    - history :    :class:`savestate.SnapshotRing` --> Recent snapshots of the game to roll back to with F9, or None
+    - renderer :    :class:`renderer.DirtyRectRenderer` --> Tracks the changed regions of the screen, or None to redraw it in full
+    - life_image :    :class:`pygame.surface.Surface` --> The shared image of a remaining life
+    - lost_life_image :    :class:`pygame.surface.Surface` --> The shared image of a lost life
+    - rng :    :class:`random.Random` --> The per-game random number generator that drives the simulation
+    - save_high_score :    :class:`bool` --> A boolean to indicate finished games are recorded in the score store
+    - scores :    :class:`scores.ScoreStore` --> The leaderboard of the best scores, or None in headless games
+    - screen :    :class:`pygame.surface.Surface` --> The fixed-size framebuffer the game draws into
+    - screen_rect :    :class:`pygame.rect.Rect` --> The rect of the framebuffer
+    - seed :    :class:`int` --> The seed of rng. A random one is picked when no seed is given, so every game can be replayed.
     - settings :    :class:`settings.Settings` --> An instance of Settings that will control the game
     - ship :    :class:`ship.Ship` --> An instance of Ship
+    - shown_screen :    :class:`tuple` --> What the menu or game over screen on the display shows, or None when it has to
+      be drawn
+    - starfield :    :class:`starfield.Starfield` --> The scrolling, pre-rendered background of stars and meteors, or None
+      until it has been painted
+    - atlas :    :class:`atlas.Atlas` --> Every image and the bullet tile, packed into the one surface sprites are drawn
+      from, or None until the images are loaded
+    - start_time :    :class:`float` --> The time.perf_counter() reading the game was created at
+    - startup :    :class:`dict` --> The seconds from start_time to the first frame and to the assets being ready
+    - text_cache :    :class:`hud.TextCache` --> The cache every piece of text is rendered through
+    - ticks :    :class:`int` --> The number of simulation ticks run since the game was created
+    - timestep :    :class:`timestep.FixedTimestep` --> Turns the real time between frames into fixed simulation ticks
 
     Methods:
 
     - _init_game_assets() --> Initialize/store the main game assets, such as settings, fonts, sounds, etc.
-    - _draw_background() --> Create a grid of stars and meteors to give a space vibe. For each cell of the grid, there will be 18% chance of generating a star/meteor. Upon creating the meteor/star, it will be added to the stars sprite group :return None:
+    - _open_display() --> Open the window with a fixed-size framebuffer that SDL scales to the window or display :param size: The size of the framebuffer
+    - _init_gameplay_assets() --> Create the ship, the aliens and bullets, and store the images and sounds they use
+    - _paint_starfield() --> Paint the starfield on a worker thread once its images are loaded :param images: The futures of the image loads
+    - _finish_loading() --> Wait for the worker threads and finish setting up the game with what they loaded
+    - _build_atlas() --> Pack every image and a bullet tile into the texture atlas the sprites are drawn from
+    - _wait_for_assets() --> Show the loading screen until the assets are loaded, then finish setting up the game
+    - _draw_loading_screen() --> Draw the menu with a loading bar in place of the play button
+    - _draw_background() --> Store the starfield and, in dirty-rect mode, create the renderer's cached background :param starfield: The painted Starfield
     - run_game() --> Start the main loop for the game
-    - _display_lives() --> For each image in lives_images, display them in the top left
-    - _read_high_score() --> Read high_score.txt to access the stored highest score. If no file is found, set the high score to 0
-    - _write_high_score() --> Write the highest score to the highscore file
+    - _run_threaded() --> The main loop when rounds are simulated on a worker thread
+    - step() --> Advance the simulation by a single tick
+    - _checkpoint() --> Save the round for resuming and take a snapshot for rolling back, when their intervals are up
+    - _ticks_between() --> The number of ticks in an interval :param interval: The interval in seconds
+    - _resume() --> Pick up the round saved to resume_path when the game last stopped. Returns a boolean.
+    - _open_logs() --> Open the replay log and the telemetry file, once the game's seed is settled :param resumed: True if a saved round was resumed
+    - simulate() --> Play a whole game without rendering, as fast as possible :param max_ticks: Stop after this many ticks :param policy: A callable that steers the ship before each tick
+    - _display_hud() --> Display the lives in the top left and, during a round, the score and high score in the top right
+    - pool_stats() --> Report how the bullet and alien pools have been used
+    - _read_high_score() --> Take the high score from the loaded leaderboard
+    - _record_score() --> Put the score on the leaderboard if it made it
     - _display_high_score() --> Display the highest score on the screen
     - _display_score() --> Display the score on the screen
-    - _check_events() --> Respond to key presses and mouse events
+    - _check_events() --> Respond to key presses and mouse events, recording them if a replay log is being written :param block: Sleep until an event arrives if none are waiting
+    - _handle_event() --> Respond to a single event, recording it if a replay log is being written :param event: The event
+    - _quit() --> Finish the replay log, if one is being written, and exit
     - _check_keydown_events() --> Respond to keypresses :param event: The event that was triggered
     - _check_keyup_events() --> Respond to key releases :param event: The event that was triggered
     - _fire_bullet() --> Create a new bullet and add it to the bullets group
     - _update_bullets() --> Update the position of bullets and get rid of old bullets
     - _check_collision() --> Check to see if a bullet collides with an alien. If they do collide, remove both sprites from their groups
     - _create_alien() --> Create an alien instance and add it the game's alien sprite group
+    - _spawn_alien() --> Add an alien at a given height and speed :param top: The top of the alien :param speed: Its speed
     - _update_aliens() --> Update the position of the aliens and check for collisions
+    - _alien_reach() --> How far an alien can have moved in the last tick, for swept collision checks. Returns an int, or None.
     - _check_collision_left() --> For each of the aliens on the screen, check the horizontal position to see if any aliens have collided with the left side of the screen.
     - _lose_life() --> Decrease the number of remaining lives, display an X in place of the life indicator, and - if no lives remain - set the game_over flag to True.
+    - _effect() --> Queue a burst of particles :param name: The effect :param x: Where :param y: Where
+    - _end_game() --> Stop the music, record a new high score, and set the game_over flag to True.
+    - _emit() --> Record a gameplay event if telemetry is on :param kind: The event kind :param value: Its value
     - _game_over() --> Render text on the screen to indicate the game has ended.
     - _draw_play_button() --> Draw the play button on the screen
     - _check_play_button() --> Check to see if the play button has been clicked :param mouse_pos: The position of the mouse cursor
     - _restart_game_state() --> Restart the game state to the initial state
+    - _blit() --> Draw an image on the screen and record the area for the dirty-rect renderer
+    - _track() --> Record an area that was drawn on for the dirty-rect renderer
+    - _track_all() --> Record several areas that were drawn on for the dirty-rect renderer
+    - _static_screen() --> Describe what the menu or game over screen shows, or None while a round is being played
     - _fresh_screen() --> Draw the elements that will be drawn on each new screen
+    - _draw_particles() --> Create, move and draw the particles :param elapsed: The seconds since the last frame
+    - _sprite_batch() --> Collect the blits of everything drawn during a round :param alpha: How far between ticks to draw
+    - _snapshot_batch() --> Collect the blits of a snapshot from the simulation thread :param snapshot: The snapshot
     - _update_screen() --> Update images on the screen and flip to the new screen
     """
 
-    def __init__(self):
+    def __init__(self, headless=False, seed=None, settings=None):
         """
         Initialize the game and create game resources
+        :param headless: Run the simulation without opening a window or starting the audio mixer
+        :param seed: Seed for the game's random number generator. Games with the same seed play out the same way.
+        :param settings: The Settings to play with. None uses the default settings.
         """
-        pygame.init()
-        pygame.mixer.init()
+        # Startup is timed from here to the first frame and to the moment the assets are ready
+        self.start_time = time.perf_counter()
+        self.startup = {}
+        self.headless = headless
+        self.settings = settings if settings is not None else Settings()
+        # Every random decision the simulation makes comes from this generator, so a seeded game is reproducible. The
+        # starfield is purely cosmetic and keeps using the module-level generator so it doesn't shift the sequence.
+        # Without a seed one is drawn from the OS, and kept so the game can still be recorded and replayed.
+        self.seed = seed if seed is not None else SystemRandom().getrandbits(63)
+        self.rng = Random(self.seed)
+        # Simulation ticks are the clock replay logs are keyed on
+        self.ticks = 0
+        # Simulated and replayed games never overwrite the player's high score
+        self.save_high_score = not headless
+
+        if not self.headless:
+            pygame.init()
+            pygame.mixer.init()
 
-        pygame.display.set_caption("Alien Defense")
+            pygame.display.set_caption("Alien Defense")
 
         # Initialize game assets
         self._init_game_assets()
 
-        # Read in the high score from high_score.txt
-        self._read_high_score()
+        # The high score is taken from the leaderboard once it is loaded. Headless games start from 0.
+        self.high_score = 0
 
         # Flags to indicate the game state
         # game_over indicates that a game has ended
         self.game_over = False
         # game_started indicates that no game has been played since the program was run
         self.game_started = False
+        # The menu and game over screens are drawn once, then left on the display until something on them changes
+        self.shown_screen = None
 
     def _init_game_assets(self):
         """
@@ -102,179 +209,582 @@ class Game:
         """
         # Store the clock
         self.clock = pygame.time.Clock()
-
-        # Draw the game's background
-        self._draw_background()
+        # The simulation always advances in ticks of the same length, however often frames are drawn
+        self.timestep = FixedTimestep(self.settings.tick_rate, self.settings.max_frame_time)
+        self.dt = self.timestep.dt
+        # The worker thread rounds are simulated on, when the simulation_thread setting is on. It is started by
+        # run_game().
+        self.simulation = None
+        # Every frame is timed, so the overlay can be opened at any point and field reports can include a profile
+        self.profiler = FrameProfiler(path=self.settings.profile_path)
+        # The replay log and the telemetry are opened by _open_logs() once the game knows which round it starts from
+        self.recorder = None
+        self.telemetry = None
+        # The round is saved every so many ticks, so it can be resumed after the game stops, and recent snapshots can
+        # be kept in memory to roll back to
+        self.autosaver = None
+        if self.settings.resume_path is not None:
+            self.autosaver = Autosaver(self.settings.resume_path)
+        self.history = None
+        if self.settings.history_size:
+            self.history = SnapshotRing(self.settings.history_size)
 
         # Store game settings
-        self.settings = Settings()
         self.lives = self.settings.lives
         self.score = self.settings.score
         self.alien_speed_factor = self.settings.alien_speed_factor
-        self.screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
+        self.fastest_alien = self.settings.alien_speed
+        # Swept collisions stay correct when a tick moves things farther than they are wide, so the tick rate can drop
+        self.swept = self.settings.collision_mode == 'swept'
+        size = (self.settings.screen_width, self.settings.screen_height)
+        self.frame_cap = 0
+        if self.headless:
+            # A headless game never draws, but the ship, aliens and bullets still measure themselves against the screen
+            self.screen = pygame.Surface(size)
+        else:
+            self.screen = self._open_display(size)
+        # Everything on the menu and game over screens is laid out around the middle of the framebuffer
+        self.screen_rect = self.screen.get_rect()
 
-        # Store the fonts used for displaying text
-        self.font = pygame.font.Font(None, 74)
-        self.small_font = pygame.font.Font(None, 36)
+        # Only the dirty-rect render mode tracks which parts of the screen changed. The renderer is created along with the
+        # starfield, once it has been painted.
+        self.renderer = None
+        self.starfield = None
+        # The sprites are drawn from a texture atlas, which is packed once the images are loaded
+        self.atlas = None
+
+        if not self.headless:
+            # Store the fonts used for displaying text
+            self.font = pygame.font.Font(None, 74)
+            self.small_font = pygame.font.Font(None, 36)
+            # Text is only rasterized the first time it is shown, and the HUD is only rebuilt when it changes
+            self.text_cache = TextCache(self.settings.text_cache_size)
+            self.hud = Hud(self.settings, self.small_font, self.text_cache)
 
         # Initialize the play button
-        self.play_button = pygame.Rect((1280 / 2) - 50, 720 / 2, 100, 50)
+        self.play_button = pygame.Rect(0, 0, 100, 50)
+        self.play_button.midtop = self.screen_rect.center
+
+        # Scores are read on a loader thread and committed by the store's own writer thread, never on the frame loop.
+        # Simulated games neither read nor write the player's scores.
+        self.scores = None
+        if self.headless:
+            # Nothing is drawn, so there is no point in loading in the background
+            self.loader = None
+            assets.preload()
+            self._init_gameplay_assets()
+        else:
+            # Reading and decoding the images and sounds and painting the starfield are the slow part of startup, so a
+            # pool of worker threads does them while run_game() shows the loading screen. _finish_loading() sets up the
+            # rest of the game once they are done.
+            self.loader = Loader(self.settings.loader_threads)
+            self.scores = ScoreStore(self.settings.scores_path or assets.path('scores.db'),
+                                     self.settings.leaderboard_size, legacy_path=assets.path('high_score.txt'))
+            self.loader.submit(self.scores.load)
+            images = assets.preload(self.loader)
+            self._starfield_future = self.loader.submit(self._paint_starfield, images)
+
+    def _open_display(self, size):
+        """
+        Open the window. The game always draws into a framebuffer of the given size, which SDL scales to the window or
+        the whole display on the GPU, so a bigger display doesn't make a frame any more expensive to draw.
+        :param size: The (width, height) of the framebuffer
+        :return pygame.Surface: The framebuffer
+        """
+        if self.settings.scale_quality is not None:
+            # Read by SDL when the renderer behind SCALED is created
+            os.environ['SDL_RENDER_SCALE_QUALITY'] = self.settings.scale_quality
+        flags = pygame.SCALED | (pygame.FULLSCREEN if self.settings.fullscreen else pygame.RESIZABLE)
+        self.frame_cap = self.settings.render_rate
+        if self.settings.render_rate == 'vsync':
+            # SCALED draws the window through a renderer, which can wait for the display refresh. flip() then paces the
+            # frames by itself.
+            self.frame_cap = 0
+            try:
+                return pygame.display.set_mode(size, flags, vsync=1)
+            except pygame.error:
+                # The display doesn't support vsync, so cap the frame rate instead
+                self.frame_cap = 60
+        try:
+            return pygame.display.set_mode(size, flags)
+        except pygame.error:
+            # Without a renderer to scale with, draw straight to a window of the framebuffer's size
+            return pygame.display.set_mode(size)
 
+    def _init_gameplay_assets(self):
+        """
+        Create the ship, the aliens and bullets, and store the images and sounds they use. The assets must be loaded.
+        :return None:
+        """
         # Initialize the game's Ship, bullet group, and alien group
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
+        self.array_entities = self.settings.entity_engine == 'numpy'
+        if self.array_entities:
+            # Only import NumPy when the array engine is selected, so the sprite engine runs without it
+            from entities import EntityArrays
+            self.bullets = EntityArrays(color=self.settings.bullet_color)
+            self.aliens = EntityArrays(image=assets.image('enemy.bmp'), cell_size=self.settings.collision_cell_size)
+            self.bullet_pool = self.alien_pool = None
+        else:
+            # Bullets and aliens are allocated up front and recycled, so firing and spawning don't create garbage. There
+            # are never more than bullets_allowed bullets, so the bullet pool never has to grow.
+            self.bullet_pool = Pool(Bullet, self.settings.bullets_allowed)
+            self.alien_pool = Pool(Alien, self.settings.alien_pool_size)
+            self.bullets = pygame.sprite.Group()
+            # Aliens are filed in a grid so collision checks only look at the aliens near a bullet or the ship
+            self.aliens = SpatialGroup(cell_size=self.settings.collision_cell_size)
+
+        # In the wave modes the spawns come from a schedule worked out a wave at a time. The classic mode rolls for a
+        # spawn on every tick.
+        self.director = None
+        if self.settings.spawn_mode != 'classic':
+            alien_width, alien_height = assets.image('enemy.bmp').get_size()
+            self.director = WaveDirector(self.settings, self.rng, alien_width, alien_height,
+                                         horde=self.settings.spawn_mode == 'horde')
+
+        # Explosions, impacts and engine trails are drawn as particles. The simulation only queues up the effects, and
+        # the render loop creates their particles, so they cost nothing in headless games and replays.
+        self.particles = None
+        self.effects = deque()
+        if self.settings.particle_capacity and not self.headless:
+            try:
+                from particles import ParticleSystem
+            except ImportError:
+                # The particles need NumPy, so without it the game is played without them
+                pass
+            else:
+                self.particles = ParticleSystem(self.settings.particle_capacity, self.settings.particle_budgets,
+                                                self.screen)
+
+        # Store the images used to indicate the remaining lives
+        # Image from https://kenney.nl/assets/space-shooter-redux
+        # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
+        self.life_image = assets.image('life.bmp')
+        self.lost_life_image = assets.image('x.bmp')
+        self.lives_images = [self.life_image] * self.settings.lives
 
         # Store the sounds used in the game
         # Sounds from https://kenney.nl/assets/space-shooter-redux
         # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-        self.shoot_sound = pygame.mixer.Sound(os.path.join(os.getcwd(), 'assets/sfx/sfx_laser1.ogg'))
-        self.alien_hit_sound = pygame.mixer.Sound(os.path.join(os.getcwd(), 'assets/sfx/sfx_zap.ogg'))
-        self.ship_hit_sound = pygame.mixer.Sound(os.path.join(os.getcwd(), 'assets/sfx/sfx_twoTone.ogg'))
-        self.game_over_sound = pygame.mixer.Sound(os.path.join(os.getcwd(), 'assets/sfx/sfx_lose.ogg'))
+        self.shoot_sound = assets.sound('sfx_laser1.ogg')
+        self.alien_hit_sound = assets.sound('sfx_zap.ogg')
+        self.ship_hit_sound = assets.sound('sfx_twoTone.ogg')
+        self.game_over_sound = assets.sound('sfx_lose.ogg')
         # Music by https://pixabay.com/users/alexiaction-26977400/?utm_source=link-attribution&utm_medium=referral&utm_campaign=music&utm_content=171561
-        pygame.mixer.music.load(os.path.join(os.getcwd(), 'assets/sfx/music.mp3'))
-        # Cut the volume of the music
-        pygame.mixer.music.set_volume(0.1)
-
-    def _draw_background(self):
-        """
-        Create a grid of stars and meteors to give a space vibe. For each cell of the grid, there will be 18% chance of
-        generating a star/meteor. Upon creating the meteor/star, it will be added to the stars sprite group
-        :return None:
-        """
-        # Create a sprite group to store the meteors/stars
-        self.stars = pygame.sprite.Group()
-        grid_rows = 720 // 50
-        # Determine the number of columns by using modulus to get the number of raindrops that can fit across the screen
-        grid_cols = 1280 // 50
-        # Create a grid of raindrops
-        for row in range(grid_rows):
-            for col in range(grid_cols):
-                # Determine if a star or meteor should be generated
-                star_chance = randint(0, 100)
-                # 18% chance of creating a star
-                if star_chance >= 82:
-                    # Determine the x,y coordinates to place the star at by multiplying by which row and column the
-                    # loop is on. randint provides a bit of randomness to give a more realistic look.
-                    x = col * (1280 // grid_cols) + randint(-20, 20)
-                    y = row * (720 // grid_rows) + randint(-20, 20)
-                    # Create a star/meteor at the above x,y coordinates
-                    star = Stars(x, y, randint(0, 100))
-                    # Add the star to the sprite group
-                    self.stars.add(star)
+        # The music file isn't shipped with the repository, so only play it when it is present
+        self.has_music = False
+        music_path = assets.music_path('music.mp3')
+        if music_path is not None and not self.headless:
+            pygame.mixer.music.load(music_path)
+            # Cut the volume of the music
+            pygame.mixer.music.set_volume(0.1)
+            self.has_music = True
+
+    def _paint_starfield(self, images):
+        """
+        Pre-render the parallax layers of the starfield. Runs on a worker thread, after the star and meteor images
+        have been loaded, so nothing is converted here: _finish_loading() converts the layers on the main thread.
+        :param images: The futures of the image loads
+        :return starfield.Starfield:
+        """
+        wait(images)
+        # Stars and meteors are painted into a few wide layers once, so each frame costs at most two blits per layer
+        return Starfield(self.settings, convert=False)
+
+    def _finish_loading(self):
+        """
+        Wait for the worker threads, if they are still loading, and finish setting up the game with what they loaded.
+        Does nothing once the game is set up.
+        :return None:
+        """
+        if self.loader is None:
+            return
+        self.loader.wait()
+        self.startup['assets_ready_s'] = self.loader.finished - self.start_time
+        # Every image and starfield layer was left unconverted by the workers, so convert them here on the main thread
+        assets.convert_all()
+        starfield = self._starfield_future.result()
+        starfield.convert()
+        self._draw_background(starfield)
+        self._init_gameplay_assets()
+        self._build_atlas()
+        self._read_high_score()
+        self.loader = self._starfield_future = None
+        # The menu replaces the loading screen
+        self.shown_screen = None
+
+    def _build_atlas(self):
+        """
+        Pack every image, and a tile of the bullet color, into the texture atlas the sprites are drawn from
+        :return None:
+        """
+        images = {name: assets.image(name) for name in assets.IMAGES}
+        # A bullet is a plain rect, so its tile is just filled with the bullet color
+        bullet = pygame.Surface((self.settings.bullet_width, self.settings.bullet_height), pygame.SRCALPHA)
+        bullet.fill(self.settings.bullet_color)
+        images['bullet'] = bullet
+        self.atlas = Atlas(images)
+
+    def _wait_for_assets(self):
+        """
+        Show the loading screen until the worker threads have loaded the assets, then finish setting up the game. The
+        window can be closed in the meantime, but no other input is handled until the game can be played.
+        :return None:
+        """
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
+                    self._quit()
+            self._draw_loading_screen()
+            if 'first_frame_s' not in self.startup:
+                self.startup['first_frame_s'] = time.perf_counter() - self.start_time
+            if self.loader.done:
+                break
+            self.clock.tick(30)
+        self._finish_loading()
+
+    def _draw_loading_screen(self):
+        """
+        Draw the menu with a loading bar in place of the play button. The starfield isn't painted and the high score
+        isn't read yet, so both are left out.
+        :return None:
+        """
+        self.screen.fill(self.settings.bg_color)
+        # The bar fills up as the worker threads finish their tasks
+        pygame.draw.rect(self.screen, (248, 52, 43), self.play_button, 2)
+        bar = self.play_button.inflate(-8, -8)
+        bar.width = round(bar.width * self.loader.progress)
+        pygame.draw.rect(self.screen, (248, 52, 43), bar)
+        loading_text = self.text_cache.render(self.small_font, "Loading", (0, 0, 0))
+        self.screen.blit(loading_text, loading_text.get_rect(midtop=(self.play_button.centerx,
+                                                                     self.play_button.bottom + 10)))
+        pygame.display.flip()
+
+    def _draw_background(self, starfield):
+        """
+        Store the pre-rendered starfield. In dirty-rect mode the starfield is also painted, standing still, into the
+        renderer's cached background.
+        :param starfield: The painted Starfield
+        :return None:
+        """
+        self.starfield = starfield
+        if self.settings.render_mode == 'dirty':
+            background = pygame.Surface(self.screen.get_size()).convert()
+            self.starfield.draw(background)
+            self.renderer = DirtyRectRenderer(self.screen, background)
 
     def run_game(self):
         """
-        Start the main loop for the game
+        Start the main loop for the game. Each frame runs as many fixed simulation ticks as the real time since the
+        previous frame covers, then draws the entities between their last two positions so motion stays smooth when the
+        frame rate and the tick rate don't line up. The loading screen is shown first, until the assets are loaded.
         :return None:
         """
+        if self.loader is not None:
+            self._wait_for_assets()
+            print(f"startup: first frame after {self.startup['first_frame_s']:.3f} s, "
+                  f"assets ready after {self.startup['assets_ready_s']:.3f} s")
+        # The logs' headers hold the seed, which a resumed round replaces, so they are opened afterwards
+        self._open_logs(resumed=self._resume())
+        if self.settings.simulation_thread:
+            self._run_threaded()
+            return
+        timestep = self.timestep
+        profiler = self.profiler
         while True:
-            self._check_events()
+            profiler.start_frame()
             if not self.game_over and self.game_started:
-                self._display_lives()
-                self._create_alien()
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
-            self._update_screen()
-            self.clock.tick(240)
-
-    def _display_lives(self):
-        """
-        For each image in lives_images, display them in the top left
-        :return None:
-        """
-        if self.lives == 3:
-            # Image from https://kenney.nl/assets/space-shooter-redux
-            # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-            life_image = os.path.join(os.getcwd(), 'assets/images/life.bmp')
-            # TODO: Turn into _draw_lives but inline for loop is fine for now
-            self.lives_images = [pygame.image.load(life_image) for _ in range(3)]
-        # For each life image, blit it to the screen in the top left
-        for i, image in enumerate(self.lives_images):
-            x = i * 40
-            y = 10
-            self.screen.blit(image, (x, y))
+                self._check_events()
+            else:
+                # Once the menu or game over screen is on the display it can only change when an event arrives, so
+                # sleep until one does instead of drawing the same frame over and over
+                self._check_events(block=self._static_screen() == self.shown_screen)
+                # Time spent on the menu or the game over screen isn't simulated
+                timestep.reset()
+            profiler.lap('events')
+            elapsed = timestep.advance()
+            ticks = 0
+            while not self.game_over and self.game_started and timestep.consume():
+                self.step()
+                ticks += 1
+            profiler.lap('simulation')
+            self._update_screen(timestep.alpha, elapsed)
+            profiler.lap('render')
+            self.clock.tick(self.frame_cap)
+            profiler.lap('sleep')
+            profiler.end_frame(ticks, len(self.aliens), len(self.bullets))
 
-    def _read_high_score(self):
+    def _run_threaded(self):
+        """
+        The main loop when rounds are simulated on a worker thread. During a round this loop only hands the input over
+        to the simulation thread and draws its latest snapshot, between the positions of its tick and the tick before.
+        Between rounds the simulation thread is parked, and the menu and game over screens are handled here just like
+        in run_game().
+        :return None:
+        """
+        simulation = self.simulation = SimulationThread(self)
+        simulation.start()
+        profiler = self.profiler
+        max_frame_time = self.settings.max_frame_time
+        last_time = time.perf_counter()
+        last_ticks = 0
+        while True:
+            profiler.start_frame()
+            if simulation.playing.is_set():
+                for event in pygame.event.get():
+                    # Quitting and window events are handled right away. Input is applied, and recorded, between ticks.
+                    if (event.type in (pygame.KEYUP, pygame.MOUSEBUTTONDOWN) or
+                            event.type == pygame.KEYDOWN and event.key != pygame.K_q):
+                        simulation.send(event)
+                    else:
+                        self._handle_event(event)
+            else:
+                # Only sleep while a menu or game over screen is on the display. A round resumed from a save is
+                # already being played, so it must reach start_round() without waiting for input.
+                static_screen = self._static_screen()
+                self._check_events(block=static_screen is not None and static_screen == self.shown_screen)
+                if not self.game_over and self.game_started:
+                    # The round was just started from the menu or the game over screen
+                    simulation.start_round()
+            profiler.lap('events')
+            now = time.perf_counter()
+            elapsed = min(now - last_time, max_frame_time)
+            last_time = now
+            snapshot = simulation.buffer.latest() if simulation.playing.is_set() else None
+            # How far the tick after the snapshot's has progressed
+            alpha = 1.0 if snapshot is None else min(1.0, (now - snapshot.time) / self.dt)
+            ticks = simulation.ticks - last_ticks
+            last_ticks += ticks
+            self._update_screen(alpha, elapsed, snapshot)
+            profiler.lap('render')
+            self.clock.tick(self.frame_cap)
+            profiler.lap('sleep')
+            if snapshot is not None:
+                profiler.end_frame(ticks, len(snapshot.aliens[0]), len(snapshot.bullets[0]))
+            else:
+                profiler.end_frame(ticks, len(self.aliens), len(self.bullets))
+
+    def step(self):
+        """
+        Advance the simulation by a single tick: spawn aliens, move everything and resolve collisions
+        :return None:
+        """
+        self._create_alien()
+        self.ship.update(self.dt)
+        self._update_bullets()
+        self._update_aliens()
+        self.ticks += 1
+        self._checkpoint()
+
+    def _checkpoint(self):
         """
-        Read high_score.txt to access the stored highest score. If no file is found, set the high score to 0
+        Save the round for resuming and take a snapshot for rolling back, when their intervals are up
         :return None:
         """
+        if self.game_over:
+            return
+        if self.autosaver is not None and self.ticks % self._ticks_between(self.settings.autosave_interval) == 0:
+            self.autosaver.save(self)
+        if self.history is not None and self.ticks % self._ticks_between(self.settings.history_interval) == 0:
+            self.history.push(self)
+
+    def _ticks_between(self, interval):
+        """
+        The number of ticks in an interval, at least one
+        :param interval: The interval in seconds
+        :return int:
+        """
+        return max(1, round(interval * self.settings.tick_rate))
+
+    def _resume(self):
+        """
+        Pick up the round that was saved to resume_path when the game last stopped, if there is one and it was played
+        with the same settings
+        :return bool: True if a round was resumed
+        """
+        path = self.settings.resume_path
+        if path is None or not os.path.isfile(path):
+            return False
         try:
-            file_path = os.path.join(os.getcwd(), "assets/high_score.txt")
-            with open(file_path, 'r') as file:
-                self.high_score = int(file.read())
-        except FileNotFoundError:
-            self.high_score = 0
+            saved = SavedGame.load(path)
+            if not saved.matches(self.settings):
+                print(f"not resuming {path}: it was saved with other settings")
+                return False
+            saved.restore(self)
+        except (OSError, ValueError, struct.error) as error:
+            print(f"not resuming {path}: {error}")
+            return False
+        print(f"resumed the round saved at tick {self.ticks}")
+        if self.has_music and self.game_started and not self.game_over:
+            pygame.mixer.music.play(-1)
+        return True
+
+    def _open_logs(self, resumed=False):
+        """
+        Open the replay log and the telemetry file the settings ask for, with the game's seed. Does nothing for a log
+        that is already open.
+        :param resumed: True if a saved round was just resumed. A replay log can only re-simulate a game from its
+        start, so the game isn't recorded then.
+        :return None:
+        """
+        if self.settings.record_path is not None and self.recorder is None:
+            if resumed:
+                print(f"not recording {self.settings.record_path}: a resumed round can't be replayed from its start")
+            else:
+                self.recorder = InputRecorder(self.settings.record_path, self.seed, self.settings)
+        # Gameplay events are kept in memory and written out in batches by the telemetry writer's own thread
+        if self.settings.telemetry_path is not None and self.telemetry is None:
+            self.telemetry = telemetry.TelemetryWriter(self.settings.telemetry_path, self.seed, self.settings,
+                                                       self.settings.telemetry_batch)
+
+    def simulate(self, max_ticks=None, policy=None):
+        """
+        Play a whole game without rendering or frame pacing, as fast as the CPU allows
+        :param max_ticks: Stop after this many ticks even if the game hasn't ended. None plays until game over.
+        :param policy: A callable that is given the game before each tick, so it can steer the ship and fire bullets
+        :return int: The number of ticks that were simulated
+        """
+        self._open_logs()
+        self._restart_game_state()
+        ticks = 0
+        while not self.game_over and (max_ticks is None or ticks < max_ticks):
+            if policy is not None:
+                policy(self)
+            self.step()
+            ticks += 1
+        return ticks
+
+    def _display_hud(self):
+        """
+        Display the lives in the top left and, while a round is being played, the score and high score in the top right
+        :return None:
+        """
+        if not self.game_over and self.game_started:
+            # If the current score is higher than the highest score, display the current score as the highest score
+            self._track_all(self.hud.draw(self.screen, self.lives_images, self.score, max(self.high_score, self.score)))
+        else:
+            self._track_all(self.hud.draw(self.screen, self.lives_images))
+
+    def pool_stats(self):
+        """
+        Report how the bullet and alien pools have been used
+        :return dict: The Pool.stats() of each pool, keyed by 'bullets' and 'aliens'. Empty with the numpy engine.
+        """
+        if self.array_entities:
+            return {}
+        return {'bullets': self.bullet_pool.stats(), 'aliens': self.alien_pool.stats()}
 
-    def _write_high_score(self):
+    def _read_high_score(self):
         """
-        Write the highest score to the highscore file
+        Take the high score from the leaderboard, which is served from memory once it is loaded. An empty leaderboard
+        gives a high score of 0.
         :return None:
         """
-        file_path = os.path.join(os.getcwd(), "assets/high_score.txt")
-        with open(file_path, 'w') as file:
-            file.write(str(self.high_score))
+        self.high_score = self.scores.best()
+
+    def _record_score(self):
+        """
+        Put the score on the leaderboard, along with the difficulty it was played at, if it made it. The store commits
+        it on its writer thread.
+        :return None:
+        """
+        self.scores.add(self.score, settings_profile(self.settings))
 
     def _display_high_score(self):
         """
         Display the highest score on the screen
         :return:
         """
-        # TODO: I should really refactor this so it's not basically the same chunk of code 4 times
-        # If the game has been started and a game is actively being played, display the highest score in the top right
+        # While a round is being played the high score is part of the HUD
         if not self.game_over and self.game_started:
-            # WOOOOO ternary killing readability
-            # If the highest score is higher than the current score, display the highest score. If the current score is
-            # higher than the highest score, display the current score as the highest score
-            high_score_text = self.small_font.render(
-                f"High Score: {self.high_score if self.high_score > self.score else self.score}", True, (0, 0, 0))
-            # Move the text to the top right
-            high_score_rect = high_score_text.get_rect(topleft=(self.settings.screen_width - 200, 35))
-            # Blit the text to the screen
-            self.screen.blit(high_score_text, high_score_rect)
-        else:
-            # If the game is in the "select play button" state, display the highest score in middle of the screen
-            # slightly above the play button
-            high_score_text = self.small_font.render(f"High Score: {self.high_score}", True, (0, 0, 0))
-            # Move the text to the appropriate spot
-            high_score_rect = high_score_text.get_rect(center=(1280 // 2, 720 // 2 - 50))
-            # Blit the text to the screen
-            self.screen.blit(high_score_text, high_score_rect)
+            return
+        # If the game is in the "select play button" state, display the highest score in middle of the screen
+        # slightly above the play button
+        high_score_text = self.text_cache.render(self.small_font, f"High Score: {self.high_score}", (0, 0, 0))
+        # Move the text to the appropriate spot
+        high_score_rect = high_score_text.get_rect(center=(self.screen_rect.centerx, self.screen_rect.centery - 50))
+        # Blit the text to the screen
+        self._blit(high_score_text, high_score_rect)
 
     def _display_score(self):
         """
         Display the score on the screen
         :return None:
         """
-        # If a round of the game is currently being played, display the score in the top right
-        if not self.game_over and self.game_started:
-            score_text = self.small_font.render(f"Score: {self.score}", True, (0, 0, 0))
-            score_rect = score_text.get_rect(topleft=(self.settings.screen_width - 200, 10))
-            self.screen.blit(score_text, score_rect)
-        # If the round has ended, display the score in the middle of the screen
-        elif self.game_over:
-            score_text = self.small_font.render(f"Score: {self.score}", True, (0, 0, 0))
-            score_rect = score_text.get_rect(center=(1280 // 2, 720 // 2 - 25))
-            self.screen.blit(score_text, score_rect)
+        # While a round is being played the score is part of the HUD. If the round has ended, display the score in the
+        # middle of the screen
+        if self.game_over:
+            score_text = self.text_cache.render(self.small_font, f"Score: {self.score}", (0, 0, 0))
+            score_rect = score_text.get_rect(center=(self.screen_rect.centerx, self.screen_rect.centery - 25))
+            self._blit(score_text, score_rect)
 
-    def _check_events(self):
+    def _check_events(self, block=False):
         """
         Respond to key presses and mouse events
+        :param block: Sleep until an event arrives if none are waiting
+        :return None:
+        """
+        events = pygame.event.get()
+        if block and not events:
+            # Time spent waiting for input is sleep, not event handling
+            self.profiler.lap('events')
+            events = [pygame.event.wait()]
+            self.profiler.lap('sleep')
+        for event in events:
+            self._handle_event(event)
+
+    def _handle_event(self, event):
+        """
+        Respond to a single key press, mouse or window event, recording the input if a replay log is being written
+        :param event: The event
         :return None:
         """
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                self._check_keydown_events(event)
-            elif event.type == pygame.KEYUP:
-                self._check_keyup_events(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                self._check_play_button(mouse_pos)
+        recorder = self.recorder
+        if event.type == pygame.QUIT:
+            self._quit()
+        elif event.type == pygame.KEYDOWN:
+            # Quitting is recorded as the end of the log instead
+            if recorder is not None and event.key != pygame.K_q:
+                recorder.keydown(self.ticks, event.key)
+            self._check_keydown_events(event)
+        elif event.type == pygame.KEYUP:
+            if recorder is not None:
+                recorder.keyup(self.ticks, event.key)
+            self._check_keyup_events(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            # The position is taken from the event, which is the same as the cursor's when it is handled right away
+            mouse_pos = event.pos
+            if recorder is not None:
+                recorder.click(self.ticks, mouse_pos)
+            self._check_play_button(mouse_pos)
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            # The window was uncovered, so the whole screen has to be presented again
+            self.shown_screen = None
+            if self.renderer is not None:
+                self.renderer.invalidate()
+
+    def _quit(self):
+        """
+        Finish the replay log with the final score and lives, if one is being written, write out the telemetry, save
+        the round to resume it, commit the scores and exit
+        :return None:
+        """
+        # Let the simulation thread finish its tick, so nothing changes the game from here on
+        if self.simulation is not None:
+            self.simulation.stop()
+        if self.recorder is not None:
+            self.recorder.close(self.ticks, self.score, self.lives)
+        if self.telemetry is not None:
+            self.telemetry.close()
+        # Save the round as it is now, to resume it next time
+        if self.autosaver is not None:
+            if self.game_started and not self.game_over:
+                self.autosaver.save(self)
+            self.autosaver.close()
+        # Wait for the last scores to be committed
+        if self.scores is not None:
+            self.scores.close()
+        sys.exit()
 
     def _check_keydown_events(self, event):
         """
@@ -293,7 +803,13 @@ class Game:
             if self.game_over or not self.game_started:
                 self._restart_game_state()
         elif event.key == pygame.K_q:
-            sys.exit()
+            self._quit()
+        elif event.key == pygame.K_F3:
+            # Show or hide the frame profiler
+            self.profiler.toggle()
+        elif event.key == pygame.K_F9 and self.history is not None and self.game_started and not self.game_over:
+            # Roll back to the latest snapshot, or the one before it if that one was just rolled back to
+            self.history.rewind(self)
 
     def _check_keyup_events(self, event):
         """
@@ -314,10 +830,18 @@ class Game:
         # Only allow 3 bullets to be on the screen
         if len(self.bullets) < self.settings.bullets_allowed:
             # If there are fewer than 3 bullets on the screen, create a new bullet
-            new_bullet = Bullet(self)
-            # Add the new bullet to the bullet group
-            self.bullets.add(new_bullet)
+            if self.array_entities:
+                # Align the left side of the bullet with the right side of the ship, like Bullet does
+                height = self.settings.bullet_height
+                self.bullets.add(self.ship.rect.right, self.ship.rect.centery - height // 2,
+                                 self.settings.bullet_width, height, self.settings.bullet_speed)
+            else:
+                # Reuse a bullet that left the screen or hit an alien
+                new_bullet = self.bullet_pool.acquire(self)
+                # Add the new bullet to the bullet group
+                self.bullets.add(new_bullet)
             self.shoot_sound.play()
+            self._emit(telemetry.SHOT, len(self.bullets))
 
     def _update_bullets(self):
         """
@@ -325,13 +849,18 @@ class Game:
         :return None:
         """
         # Update the bullets position
-        self.bullets.update()
+        self.bullets.update(self.dt)
 
         # Get rid of bullets that have gone off of the screen
-        for bullet in self.bullets.copy():
-            if bullet.rect.left >= self.screen.get_rect().right:
-                # Remove the bullet from the group
-                self.bullets.remove(bullet)
+        if self.array_entities:
+            self.bullets.remove(self.bullets.lefts() >= self.screen_rect.right)
+        else:
+            # Loop over a list of the bullets rather than Group.copy(), which would add every bullet to a throwaway
+            # group that keeps it looking alive after it is removed
+            for bullet in self.bullets.sprites():
+                if bullet.rect.left >= self.screen_rect.right:
+                    # Remove the bullet from the group
+                    self.bullets.remove(bullet)
 
         # Check to see if the bullet collides with an alien. Part of 13-5
         self._check_collision()
@@ -342,15 +871,31 @@ class Game:
         Check to see if a bullet collides with an alien. If they do collide, remove both sprites from their groups
         :return None:
         """
-        bullet_alien_collisions = pygame.sprite.groupcollide(
-            self.bullets, self.aliens, True, True
-        )
+        # Where the shot aliens were, for their explosions
+        hit_centers = ()
+        if self.array_entities:
+            if self.particles is None:
+                bullet_alien_collisions = self.bullets.collide(self.aliens, swept=self.swept)
+            else:
+                bullet_alien_collisions, hit_centers = self.bullets.collide(self.aliens, centers=True, swept=self.swept)
+        else:
+            bullet_alien_collisions = groupcollide(
+                self.bullets, self.aliens, True, True, self._alien_reach()
+            )
+            if self.particles is not None:
+                hit_centers = [alien.rect.center for aliens in bullet_alien_collisions.values() for alien in aliens]
         if bullet_alien_collisions:
             self.score += 1
             self.alien_hit_sound.play()
-            # Increase the alien speed based on the score of the player
-            if self.score % 5 == 0 and self.score != 0:
+            for x, y in hit_centers:
+                self._effect('explosion', x, y)
+            # The sprite engine maps each bullet that hit to the aliens it hit, the array engine counts the bullets
+            self._emit(telemetry.HIT, len(bullet_alien_collisions) if isinstance(bullet_alien_collisions, dict)
+                       else bullet_alien_collisions)
+            # Increase the alien speed based on the score of the player. In the wave modes each wave is faster instead.
+            if self.director is None and self.score % 5 == 0 and self.score != 0:
                 self.alien_speed_factor += .1
+                self._emit(telemetry.SPEED_CHANGE, self.alien_speed_factor)
 
     # _create_alien is part of 13-5
     def _create_alien(self):
@@ -358,11 +903,39 @@ class Game:
         Create an alien instance and add it the game's alien sprite group
         :return None:
         """
-        # Use RNG to determine if an alien should be created in order to give a more random pacing to the creation
-        if random() < self.settings.alien_frequency:
-            alien = Alien(self)
-            # Add the alien to the sprite group
-            self.aliens.add(alien)
+        if self.director is not None:
+            # Looking up the tick's spawns costs the same however dense the wave is
+            for top, speed in self.director.next_tick():
+                self._spawn_alien(top, speed)
+            return
+        # Use RNG to determine if an alien should be created in order to give a more random pacing to the creation.
+        # alien_frequency is per second, so the chance per tick scales with the length of a tick.
+        if self.rng.random() < self.settings.alien_frequency * self.dt:
+            self.fastest_alien = max(self.fastest_alien, self.settings.alien_speed)
+            if self.array_entities:
+                # Start at the right side of the screen at a random height, like Alien does
+                width, height = self.aliens.image.get_size()
+                top = self.rng.randint(0, self.settings.screen_height - height)
+                self.aliens.add(self.screen_rect.right, top, width, height, -self.settings.alien_speed)
+            else:
+                # Reuse an alien that was shot or got past the ship
+                alien = self.alien_pool.acquire(self)
+                # Add the alien to the sprite group
+                self.aliens.add(alien)
+
+    def _spawn_alien(self, top, speed):
+        """
+        Add an alien at the right side of the screen at a given height and speed
+        :param top: The top of the alien
+        :param speed: How many pixels per second the alien moves, before the speed factor
+        :return None:
+        """
+        self.fastest_alien = max(self.fastest_alien, speed)
+        if self.array_entities:
+            width, height = self.aliens.image.get_size()
+            self.aliens.add(self.screen_rect.right, top, width, height, -speed)
+        else:
+            self.aliens.add(self.alien_pool.acquire(self, top, speed))
 
     # _update_aliens is part of 13-5
     def _update_aliens(self):
@@ -372,15 +945,38 @@ class Game:
         """
 
         # Move the aliens across the screen
-        self.aliens.update(self.alien_speed_factor)
+        self.aliens.update(self.alien_speed_factor, self.dt)
 
         # If the ship sprite rect collides with any of the alien sprites, remove the sprite and call _lose_life()
-        if pygame.sprite.spritecollide(self.ship, self.aliens, True):
-            self._lose_life()
+        if self.array_entities:
+            start = self.ship.interpolated_rect(0.0) if self.swept else None
+            ship_hit = self.aliens.remove(self.aliens.overlapping(self.ship.rect, start))
+        else:
+            ship_hit = spritecollide(self.ship, self.aliens, True, self._alien_reach())
+        if ship_hit:
+            self._effect('explosion', *self.ship.rect.center)
+            # A horde is far too dense to steer through, so the ship plows through it until the horde is over
+            if self.settings.spawn_mode != 'horde':
+                self._lose_life()
 
         # Look for aliens that have hit the left edge of the screen.
         self._check_collision_left()
 
+        # A horde costs no lives, so its round is over once its last wave has gone by
+        if self.director is not None and self.director.finished() and not self.game_over:
+            self.game_over_sound.play()
+            self._end_game()
+
+    def _alien_reach(self):
+        """
+        How far an alien can have moved in the last tick, for the grid search of swept collision checks
+        :return int: The distance in whole pixels, or None when collisions aren't swept
+        """
+        if not self.swept:
+            return None
+        # One more pixel for the rounding of the rects
+        return math.ceil(self.fastest_alien * self.alien_speed_factor * self.dt) + 1
+
     # _check_collision_left() is a part of 13-6
     def _check_collision_left(self):
         """
@@ -388,58 +984,115 @@ class Game:
         left side of the screen.
         :return:
         """
+        # A horde is too big to hold back, so letting it past costs no life
+        costs_life = self.settings.spawn_mode != 'horde'
+        if self.array_entities:
+            # Remove every alien past the left edge in one go, then take a life for each of them
+            gone = self.aliens.lefts() < 0
+            if self.particles is not None and gone.any():
+                n = self.aliens.count
+                for y in (self.aliens.y[:n][gone] + self.aliens.height[:n][gone] / 2).tolist():
+                    self._effect('impact', 0, y)
+            removed = self.aliens.remove(gone)
+            for _ in range(removed if costs_life else 0):
+                # Several aliens can get past on the same tick, but only the lives that are left can be lost
+                if self.game_over:
+                    break
+                self._lose_life(edge=True)
+            return
         for alien in self.aliens:
             if alien.rect.x < 0:
                 # If the alien has hit the left side of the screen, remove the alien sprite from the group
                 self.aliens.remove(alien)
-                # If the alien has hit the left side of the screen, call _lose_life()
-                self._lose_life()
+                self._effect('impact', 0, alien.rect.centery)
+                # If the alien has hit the left side of the screen, call _lose_life(). Several aliens can get past on
+                # the same tick, but only the lives that are left can be lost.
+                if costs_life and not self.game_over:
+                    self._lose_life(edge=True)
 
     # _lose_life is part of 13-6
-    def _lose_life(self):
+    def _lose_life(self, edge=False):
         """
         Decrease the number of remaining lives, display an X in place of the life indicator, and - if no lives remain -
         set the game_over flag to True.
+        :param edge: True if an alien got past the left edge, False if it ran into the ship
         :return None:
         """
+        # The game is already over, e.g. when several aliens got past on its last tick
+        if self.lives <= 0:
+            return
         # Subtract a life from the
         self.lives -= 1
         self.ship_hit_sound.play()
-        # Image from https://kenney.nl/assets/space-shooter-redux
-        # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-        lost_life_image = os.path.join(os.getcwd(), 'assets/images/x.bmp')
-        # Replace the lost life image with a new image if lives remain
-        self.lives_images[self.lives] = pygame.image.load(lost_life_image)
+        self._emit(telemetry.LIFE_LOST, telemetry.EDGE if edge else telemetry.SHIP)
+        # Replace the lost life image with the shared X image
+        self.lives_images[self.lives] = self.lost_life_image
         if self.lives == 0:
             self.game_over_sound.play()
-            self._game_over()
+            self._end_game()
 
-    # _game_over() is part of 13-6
-    def _game_over(self):
+    def _end_game(self):
         """
-        Render text on the screen to indicate the game has ended.
+        Stop the music, record a new high score, and set the game_over flag to True.
         :return None:
         """
         # Stop the music
-        pygame.mixer.music.stop()
+        if self.has_music:
+            pygame.mixer.music.stop()
 
+        self._emit(telemetry.GAME_OVER, self.score > self.high_score)
         # If the score is higher than the highest score
         if self.score > self.high_score:
             # Set the highest score equal to the score
             self.high_score = self.score
-            # Write the high score to the text file
-            self._write_high_score()
-        # Flip to a fresh screen
-        self._fresh_screen()
-        # Display the high score
-        self._display_high_score()
+        # Record the score if it made the leaderboard
+        if self.save_high_score:
+            self._record_score()
 
         self.game_over = True
-        text = self.font.render("Game Over", True, (0, 0, 0))
+        # Nothing happens between rounds, so hand this round's events to the telemetry writer now
+        if self.telemetry is not None:
+            self.telemetry.flush()
+        # A round that is over can't be resumed
+        if self.autosaver is not None:
+            self.autosaver.discard()
+
+    def _effect(self, name, x, y):
+        """
+        Queue a burst of particles for the render loop to create, if the particles are on
+        :param name: The name of the effect in particles.EFFECTS
+        :param x: The horizontal position of the burst
+        :param y: The vertical position of the burst
+        :return None:
+        """
+        if self.particles is not None:
+            # deque.append() is atomic, so this is safe on the simulation thread too
+            self.effects.append((name, x, y))
+
+    def _emit(self, kind, value=0):
+        """
+        Record a gameplay event if telemetry is on
+        :param kind: One of the event kinds of telemetry.py, e.g. telemetry.SHOT
+        :param value: The event's value, see telemetry.VALUES
+        :return None:
+        """
+        if self.telemetry is not None:
+            self.telemetry.record(self.ticks, kind, value, self.score, self.lives, self.ship.rect.centery)
+
+    # _game_over() is part of 13-6
+    def _game_over(self):
+        """
+        Render text on the screen to indicate the game has ended.
+        :return None:
+        """
+        # Flip to a fresh screen, which also displays the score and high score
+        self._fresh_screen()
+
+        text = self.text_cache.render(self.font, "Game Over", (0, 0, 0))
         # Move the text to the middle of the screen
-        text_rect = text.get_rect(center=(1280 // 2, 720 // 2 - 100))
+        text_rect = text.get_rect(center=(self.screen_rect.centerx, self.screen_rect.centery - 100))
         # Draw the text to the screen
-        self.screen.blit(text, text_rect)
+        self._blit(text, text_rect)
 
     def _draw_play_button(self):
         """
@@ -447,15 +1100,15 @@ class Game:
         :return None:
         """
         # Draw a rectangle to represent the button
-        pygame.draw.rect(self.screen, (248, 52, 43), self.play_button)
+        self._track(pygame.draw.rect(self.screen, (248, 52, 43), self.play_button))
         # Draw text for the play button
-        play_button_text = self.small_font.render("Play", True, (255, 255, 255))
+        play_button_text = self.text_cache.render(self.small_font, "Play", (255, 255, 255))
         # Place the text on the button
         play_button_text_rect = play_button_text.get_rect(
             center=self.play_button.center
         )
         # Blit the button to the screen
-        self.screen.blit(play_button_text, play_button_text_rect)
+        self._blit(play_button_text, play_button_text_rect)
 
     def _check_play_button(self, mouse_pos):
         """
@@ -476,42 +1129,168 @@ class Game:
         self.aliens.empty()
         self.bullets.empty()
         self.lives = self.settings.lives
+        # Show a full set of lives again
+        self.lives_images = [self.life_image] * self.settings.lives
         self.score = 0
-        self.alien_speed_factor = 1.0
+        self.alien_speed_factor = self.settings.alien_speed_factor
+        self.fastest_alien = self.settings.alien_speed
+        if self.director is not None:
+            self.director.reset()
+        # Snapshots of the last round can't be rolled back to from this one
+        if self.history is not None:
+            self.history.clear()
+        if self.particles is not None:
+            self.particles.clear()
+            self.effects.clear()
         # Play the music on a loop
-        pygame.mixer.music.play(-1)
+        if self.has_music:
+            pygame.mixer.music.play(-1)
 
-    def _fresh_screen(self):
+    def _blit(self, image, dest):
+        """
+        Draw an image on the screen and record the area for the dirty-rect renderer
+        :param image: The surface to draw
+        :param dest: The position or rect to draw it at
+        :return pygame.Rect: The area of the screen that was drawn on
+        """
+        rect = self.screen.blit(image, dest)
+        self._track(rect)
+        return rect
+
+    def _track(self, rect):
+        """
+        Record an area of the screen that was drawn on, so the dirty-rect renderer erases and updates it
+        :param rect: The area that was drawn on
+        :return None:
+        """
+        if self.renderer is not None:
+            self.renderer.add(rect)
+
+    def _track_all(self, rects):
+        """
+        Record several areas of the screen that were drawn on, so the dirty-rect renderer erases and updates them
+        :param rects: An iterable of the areas that were drawn on. It is only consumed when a renderer is in use.
+        :return None:
+        """
+        if self.renderer is not None:
+            self.renderer.add_all(rects)
+
+    def _static_screen(self):
+        """
+        Describe what the menu or game over screen shows, so it is only drawn again when something on it changes
+        :return tuple: The state the screen is drawn from, or None while a round is being played
+        """
+        if not self.game_over and self.game_started:
+            return None
+        return self.game_over, self.score, self.high_score, tuple(self.lives_images), self.profiler.visible
+
+    def _fresh_screen(self, alpha=1.0):
         """
         Draw the elements that will be drawn on each new screen
+        :param alpha: How far between the previous and current simulation tick to draw the ship, from 0 to 1
         :return None:
         """
         # Draw the ship to the screen
-        self.ship.blitme()
-        # Draw the images that represent lives to the screen
-        self._display_lives()
+        self._track(self.ship.blitme(alpha))
+        # Draw the lives, and during a round the score and high score, from the cached HUD
+        self._display_hud()
 
         self._display_score()
         self._display_high_score()
 
-    def _update_screen(self):
+    def _sprite_batch(self, alpha=1.0):
+        """
+        Collect the blits of everything drawn during a round, in the order it is layered: the ship, the HUD, the bullets
+        and then the aliens. The sprites are drawn from the atlas.
+        :param alpha: How far between the previous and current simulation tick to draw the entities, from 0 to 1
+        :return list: (surface, position, area) tuples for Surface.blits()
+        """
+        atlas = self.atlas
+        batch = atlas.blit_sequence('ship2.bmp', (self.ship.interpolated_rect(alpha),))
+        # If the current score is higher than the highest score, display the current score as the highest score
+        batch += self.hud.blit_sequence(self.lives_images, self.score, max(self.high_score, self.score))
+        if self.array_entities:
+            batch += atlas.blit_sequence('bullet', self.bullets.positions(alpha))
+            batch += atlas.blit_sequence('enemy.bmp', self.aliens.positions(alpha))
+        else:
+            batch += atlas.blit_sequence('bullet', [bullet.interpolated_rect(alpha) for bullet in self.bullets.sprites()])
+            # Aliens are a part of 13-5
+            if alpha == 1.0:
+                batch += atlas.blit_sequence('enemy.bmp', [alien.rect for alien in self.aliens])
+            else:
+                batch += atlas.blit_sequence('enemy.bmp', [alien.interpolated_rect(alpha) for alien in self.aliens])
+        return batch
+
+    def _draw_particles(self, elapsed, snapshot=None):
+        """
+        Create the particles of the queued effects and the aliens' engine trails, move every particle and draw them
+        :param elapsed: The seconds since the last frame
+        :param snapshot: During a round simulated on the simulation thread, the simthread.Snapshot being drawn
+        :return None:
+        """
+        particles = self.particles
+        effects = self.effects
+        while effects:
+            particles.burst(*effects.popleft())
+        # The engines are at the middle of the right side of each alien
+        width, height = self.atlas.region('enemy.bmp').size
+        if snapshot is not None:
+            engines_x, engines_y = snapshot.aliens[1], snapshot.aliens[2]
+        elif self.array_entities:
+            n = self.aliens.count
+            engines_x, engines_y = self.aliens.x[:n], self.aliens.y[:n]
+        else:
+            engines_x = [alien.x for alien in self.aliens]
+            engines_y = [alien.rect.top for alien in self.aliens]
+        particles.stream('trail', engines_x, engines_y, elapsed, offset=(width, height / 2))
+        particles.update(elapsed)
+        drawn = particles.draw(self.screen)
+        if drawn is not None:
+            self._track(drawn)
+
+    def _snapshot_batch(self, snapshot, alpha=1.0):
+        """
+        Collect the blits of a round's snapshot from the simulation thread, layered like _sprite_batch()
+        :param snapshot: The simthread.Snapshot to draw
+        :param alpha: How far between the snapshot's previous and current tick to draw the entities, from 0 to 1
+        :return list: (surface, position, area) tuples for Surface.blits()
+        """
+        atlas = self.atlas
+        batch = atlas.blit_sequence('ship2.bmp', (ship_position(snapshot.ship, alpha),))
+        batch += self.hud.blit_sequence(snapshot.lives_images, snapshot.score, snapshot.high_score)
+        batch += atlas.blit_sequence('bullet', blend_positions(snapshot.bullets, alpha))
+        batch += atlas.blit_sequence('enemy.bmp', blend_positions(snapshot.aliens, alpha))
+        return batch
+
+    def _update_screen(self, alpha=1.0, elapsed=None, snapshot=None):
         """
         Update images on the screen and flip to the new screen
+        :param alpha: How far between the previous and current simulation tick to draw the entities, from 0 to 1
+        :param elapsed: The seconds since the last frame, used to scroll the starfield. None scrolls it by one tick.
+        :param snapshot: During a round simulated on the simulation thread, the simthread.Snapshot to draw
         :return None:
         """
-        # Fill the screen with the background color
-        self.screen.fill(self.settings.bg_color)
-        self.stars.draw(self.screen)
+        static_screen = self._static_screen()
+        if static_screen is not None and static_screen == self.shown_screen:
+            # The menu or game over screen is already on the display and nothing on it changed
+            return
+        self.shown_screen = static_screen
+
+        if self.renderer is not None:
+            # Only erase what was drawn during the last frame. The starfield is part of the cached background.
+            self.renderer.erase()
+        else:
+            # Cover the screen with the starfield, which also fills in the background color
+            self.starfield.draw(self.screen)
         # Redraw the screen during each pass though the loop
         if not self.game_over and self.game_started:
-            self._fresh_screen()
-            self.stars.update()
-            # Draw all the bullets in the sprite group
-            for bullet in self.bullets.sprites():
-                bullet.draw_bullet()
-            # Aliens are a part of 13-5
-            # Draw the aliens
-            self.aliens.draw(self.screen)
+            if self.renderer is None:
+                self.starfield.update(self.dt if elapsed is None else elapsed)
+            # The whole frame goes to SDL in one call, so the cost per sprite is a tuple rather than a Python call
+            batch = self._sprite_batch(alpha) if snapshot is None else self._snapshot_batch(snapshot, alpha)
+            self._track_all(self.screen.blits(batch, doreturn=self.renderer is not None))
+            if self.particles is not None:
+                self._draw_particles(self.dt if elapsed is None else elapsed, snapshot)
         # Ending the game is part of 13-6
         # If the game over flag is set to true, end the game
         elif self.game_over:
@@ -521,17 +1300,114 @@ class Game:
         elif not self.game_over and not self.game_started:
             self._draw_play_button()
             self._display_high_score()
+        # Draw the profiler overlay on top of everything else
+        if self.profiler.visible:
+            self._track(self.profiler.draw(self.screen))
         # Make the most recently drawn screen visible
-        pygame.display.flip()
+        if self.renderer is not None:
+            self.renderer.present()
+        else:
+            pygame.display.flip()
+
+
+def parse_resolution(text):
+    """
+    Parse a --resolution argument
+    :param text: The argument, e.g. '1280x720'
+    :return tuple: (width, height)
+    """
+    width, _, height = text.lower().partition('x')
+    try:
+        size = int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, e.g. 1280x720, not {text!r}")
+    if min(size) <= 0:
+        raise argparse.ArgumentTypeError(f"the width and height must be positive, not {text!r}")
+    return size
+
+
+def parse_render_rate(text):
+    """
+    Parse a --render-rate argument
+    :param text: The argument: a number of frames per second, 0 for uncapped, or 'vsync'
+    :return int or str:
+    """
+    if text == 'vsync':
+        return text
+    try:
+        rate = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number of frames per second or 'vsync', not {text!r}")
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"the render rate can't be negative, not {text!r}")
+    return rate
 
 
 # Program Starts Here
 # main()
 def main():
     """
-    Create an instance of the Game class and call the run_game() method
+    Create an instance of the Game class and call the run_game() method. With --headless, simulate games without a
+    window instead and print how each one ended.
     """
-    Game().run_game()
+    parser = argparse.ArgumentParser(description="Alien Defense")
+    parser.add_argument('--headless', action='store_true', help="simulate games without a window or audio")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the game's random number generator")
+    parser.add_argument('--games', type=int, default=1, help="number of headless games to simulate")
+    parser.add_argument('--max-ticks', type=int, default=None, help="stop each headless game after this many ticks")
+    parser.add_argument('--entity-engine', choices=('sprite', 'numpy'), default='sprite',
+                        help="store aliens and bullets as sprites or in NumPy arrays")
+    parser.add_argument('--render-rate', type=parse_render_rate, default=None,
+                        help="frames drawn per second: a number, 0 for uncapped, or 'vsync'")
+    parser.add_argument('--profile', default=None, metavar='PATH',
+                        help="write the time spent in each phase of every frame to a .csv or .jsonl file")
+    parser.add_argument('--resolution', type=parse_resolution, default=None, metavar='WIDTHxHEIGHT',
+                        help="size of the framebuffer the game is drawn into, e.g. 1280x720")
+    parser.add_argument('--fullscreen', action='store_true', help="scale the game to fill the display")
+    parser.add_argument('--spawn-mode', choices=('classic', 'waves', 'horde'), default=None,
+                        help="how aliens appear: at random, in scheduled waves, or as a horde of thousands")
+    parser.add_argument('--telemetry', default=None, metavar='PATH',
+                        help="stream shots, hits, lost lives and game overs to a file that telemetry.py can read")
+    parser.add_argument('--tick-rate', type=int, default=None,
+                        help="simulation ticks per second. Swept collisions keep low rates such as 30 or 60 exact.")
+    parser.add_argument('--collision-mode', choices=('swept', 'discrete'), default=None,
+                        help="sweep collisions over each tick, or only test them at the end of it")
+    parser.add_argument('--simulation-thread', action='store_true',
+                        help="simulate rounds on a worker thread and draw snapshots of it")
+    parser.add_argument('--resume', default=None, metavar='PATH',
+                        help="keep the round being played in this file, and resume it from there when the game starts")
+    parser.add_argument('--record', default=None, metavar='PATH',
+                        help="record the game's input to a replay log that replay.py can play back. A round resumed "
+                             "with --resume isn't recorded, since a replay starts from a fresh game.")
+    args = parser.parse_args()
+
+    settings = Settings()
+    settings.entity_engine = args.entity_engine
+    settings.profile_path = args.profile
+    settings.record_path = args.record
+    settings.telemetry_path = args.telemetry
+    settings.resume_path = args.resume
+    settings.fullscreen = args.fullscreen
+    settings.simulation_thread = args.simulation_thread
+    if args.spawn_mode is not None:
+        settings.spawn_mode = args.spawn_mode
+    if args.tick_rate is not None:
+        settings.tick_rate = args.tick_rate
+    if args.collision_mode is not None:
+        settings.collision_mode = args.collision_mode
+    if args.resolution is not None:
+        settings.screen_width, settings.screen_height = args.resolution
+    if args.render_rate is not None:
+        settings.render_rate = args.render_rate
+
+    if not args.headless:
+        Game(seed=args.seed, settings=settings).run_game()
+        return
+
+    game = Game(headless=True, seed=args.seed, settings=settings)
+    for _ in range(args.games):
+        ticks = game.simulate(max_ticks=args.max_ticks)
+        print(f"ticks={ticks} score={game.score} lives={game.lives}")
 
 
 # ===============================
@@ -0,0 +1,237 @@
+import numpy as np
+import pygame
+
+# The effects particles can belong to. Each has a budget of live particles, set in Settings.particle_budgets, so a
+# burst of hits can never add more than a fixed amount of work to a frame.
+# - count: the particles in a burst, or for a stream the particles per second from each source
+# - speed: the lowest and highest speed in pixels per second
+# - angle: the range of directions in degrees, 0 pointing right and 90 down
+# - life: the shortest and longest lifetime in seconds
+# - drag: the fraction of its speed a particle keeps after a second
+# - size: the width and height of a particle in pixels, 1 or 2
+# - colors: the color ramp a particle fades through over its lifetime
+EFFECTS = {
+    # Shot aliens and the ship running into one
+    'explosion': {'count': 240, 'speed': (40.0, 360.0), 'angle': (0.0, 360.0), 'life': (0.25, 0.8), 'drag': 0.15,
+                  'size': 2, 'colors': ((255, 255, 210), (255, 200, 80), (240, 110, 30), (170, 40, 20), (70, 25, 25))},
+    # Aliens getting past the left edge of the screen
+    'impact': {'count': 120, 'speed': (80.0, 480.0), 'angle': (-70.0, 70.0), 'life': (0.2, 0.6), 'drag': 0.1,
+               'size': 2, 'colors': ((220, 250, 255), (120, 200, 255), (50, 110, 220), (30, 50, 110))},
+    # The engines of the aliens, which fly to the left, so their exhaust streams to the right
+    'trail': {'count': 40, 'speed': (40.0, 140.0), 'angle': (-12.0, 12.0), 'life': (0.1, 0.3), 'drag': 0.3,
+              'size': 1, 'colors': ((255, 240, 190), (255, 150, 60), (150, 60, 40))},
+}
+
+# The steps of each effect's color ramp, after the colors are blended into an even ramp
+RAMP_STEPS = 8
+
+
+class ParticleSystem:
+    """
+    Cosmetic particles kept in preallocated NumPy arrays with a fixed capacity, as a struct of arrays like
+    entities.EntityArrays. A frame moves and ages every live particle in a few vectorized operations, and draws them all
+    at once by writing their pixels straight into the screen through pygame.surfarray. Dead particles are packed away
+    at the end of each update, so the live ones always fill the front of the arrays.
+
+    Particles use their own random number generator, so they never change the game's random sequence, and they are
+    only created by the render loop, so they play no part in the simulation.
+
+    Attributes:
+
+    - capacity :    :class:`int` --> The most particles alive at once.
+    - count :    :class:`int` --> The number of live particles.
+    - names :    :class:`list` --> The names of the effects, in the order of their ids.
+    - budgets :    :class:`numpy.ndarray` --> The most live particles of each effect.
+    - live :    :class:`numpy.ndarray` --> The live particles of each effect.
+    - dropped :    :class:`int` --> The number of particles that weren't created because a budget or the capacity was
+      used up.
+    - x, y :    :class:`numpy.ndarray` --> The position of each particle.
+    - vx, vy :    :class:`numpy.ndarray` --> The velocity of each particle in pixels per second.
+    - age, life :    :class:`numpy.ndarray` --> The seconds each particle has lived, and will live.
+    - effect :    :class:`numpy.ndarray` --> The id of each particle's effect.
+    - rng :    :class:`numpy.random.Generator` --> The particles' random number generator.
+
+    Methods:
+
+    - burst() --> Emit an effect's burst of particles from a point. Returns the number created.
+    - stream() --> Emit an effect's particles from a number of sources over some time. Returns the number created.
+    - update() --> Move and age every particle, removing the dead ones. Returns None.
+    - draw() --> Draw every particle. Returns the Rect that was drawn on, or None.
+    - clear() --> Remove every particle. Returns None.
+    """
+
+    def __init__(self, capacity, budgets, surface, seed=None):
+        """
+        Allocate the particle arrays
+        :param capacity: The most particles alive at once
+        :param budgets: The most live particles of each effect, keyed by the names of EFFECTS. Missing effects can use
+        the whole capacity.
+        :param surface: The surface the particles will be drawn on, whose pixel format the colors are mapped to
+        :param seed: Seed for the particles' random number generator
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.names = list(EFFECTS)
+        self.budgets = np.array([min(budgets.get(name, capacity), capacity) for name in self.names], dtype=np.int64)
+        self.live = np.zeros(len(self.names), dtype=np.int64)
+        self.dropped = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.life = np.ones(capacity, dtype=np.float32)
+        self.effect = np.zeros(capacity, dtype=np.int8)
+        self.rng = np.random.default_rng(seed)
+        self._specs = [EFFECTS[name] for name in self.names]
+        self._sizes = np.array([spec['size'] for spec in self._specs], dtype=np.int8)
+        self._drags = np.array([spec['drag'] for spec in self._specs], dtype=np.float32)
+        self._ramps = np.array([self._ramp(surface, spec['colors']) for spec in self._specs], dtype=np.int64)
+
+    @staticmethod
+    def _ramp(surface, colors):
+        """
+        Blend a few colors into an even ramp of RAMP_STEPS colors, mapped to a surface's pixel format
+        :param surface: The surface the ramp will be drawn on
+        :param colors: The RGB colors to blend between, first to last
+        :return list: The mapped colors
+        """
+        ramp = []
+        for step in range(RAMP_STEPS):
+            position = step / (RAMP_STEPS - 1) * (len(colors) - 1)
+            lower = min(int(position), len(colors) - 2)
+            fraction = position - lower
+            color = [round(a + (b - a) * fraction) for a, b in zip(colors[lower], colors[lower + 1])]
+            ramp.append(surface.map_rgb(color))
+        return ramp
+
+    def _emit(self, effect, xs, ys):
+        """
+        Create particles of an effect, as many as its budget and the capacity allow
+        :param effect: The id of the effect
+        :param xs: The starting horizontal position of each particle
+        :param ys: The starting vertical position of each particle
+        :return int: The number of particles created
+        """
+        wanted = len(xs)
+        n = int(min(wanted, self.budgets[effect] - self.live[effect], self.capacity - self.count))
+        if n <= 0:
+            self.dropped += wanted
+            return 0
+        self.dropped += wanted - n
+        spec = self._specs[effect]
+        rng = self.rng
+        speed = rng.uniform(*spec['speed'], n)
+        angle = np.radians(rng.uniform(*spec['angle'], n))
+        start, end = self.count, self.count + n
+        self.x[start:end] = xs[:n]
+        self.y[start:end] = ys[:n]
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.age[start:end] = 0.0
+        self.life[start:end] = rng.uniform(*spec['life'], n)
+        self.effect[start:end] = effect
+        self.count = end
+        self.live[effect] += n
+        return n
+
+    def burst(self, name, x, y):
+        """
+        Emit an effect's burst of particles from a point
+        :param name: The name of the effect
+        :param x: The horizontal position of the point
+        :param y: The vertical position of the point
+        :return int: The number of particles created
+        """
+        effect = self.names.index(name)
+        count = self._specs[effect]['count']
+        return self._emit(effect, np.full(count, x, dtype=np.float32), np.full(count, y, dtype=np.float32))
+
+    def stream(self, name, xs, ys, elapsed, offset=(0, 0)):
+        """
+        Emit an effect's particles from a number of sources, at the effect's rate, over some time. The number from each
+        source is drawn from a Poisson distribution, so low rates still emit now and then at high frame rates. Once the
+        effect's budget is used up the first sources get their particles and the rest don't.
+        :param name: The name of the effect
+        :param xs: The horizontal position of each source
+        :param ys: The vertical position of each source
+        :param elapsed: The seconds to emit for
+        :param offset: Added to every source's position, e.g. to move from an alien's top left to its engine
+        :return int: The number of particles created
+        """
+        effect = self.names.index(name)
+        if not len(xs):
+            return 0
+        counts = self.rng.poisson(self._specs[effect]['count'] * elapsed, len(xs))
+        return self._emit(effect, np.repeat(np.asarray(xs, dtype=np.float32) + offset[0], counts),
+                          np.repeat(np.asarray(ys, dtype=np.float32) + offset[1], counts))
+
+    def update(self, elapsed):
+        """
+        Move and age every particle, slowing it down by its drag, and remove the ones that reached their lifetime
+        :param elapsed: The seconds since the last update
+        :return None:
+        """
+        n = self.count
+        if not n:
+            return
+        effect = self.effect[:n]
+        drag = self._drags ** np.float32(elapsed)
+        x, y, vx, vy, age = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.age[:n]
+        x += vx * elapsed
+        y += vy * elapsed
+        vx *= drag[effect]
+        vy *= drag[effect]
+        age += elapsed
+        alive = age < self.life[:n]
+        keep = int(np.count_nonzero(alive))
+        if keep < n:
+            # Pack the survivors into the front of the arrays, keeping their order
+            for array in (self.x, self.y, self.vx, self.vy, self.age, self.life, self.effect):
+                array[:keep] = array[:n][alive]
+            self.count = keep
+            self.live = np.bincount(self.effect[:keep], minlength=len(self.names)).astype(np.int64)
+
+    def draw(self, surface):
+        """
+        Draw every particle on the screen by writing its pixels directly, in the color its age has reached on its
+        effect's ramp
+        :param surface: The surface to draw on. It must be in the pixel format the colors were mapped to.
+        :return pygame.Rect: The bounds of the particles that were drawn, or None if there were none
+        """
+        n = self.count
+        if not n:
+            return None
+        width, height = surface.get_size()
+        xs = self.x[:n].astype(np.int64)
+        ys = self.y[:n].astype(np.int64)
+        visible = (xs >= 0) & (xs < width - 1) & (ys >= 0) & (ys < height - 1)
+        if not visible.any():
+            return None
+        xs, ys = xs[visible], ys[visible]
+        effect = self.effect[:n][visible]
+        steps = np.minimum((self.age[:n][visible] / self.life[:n][visible] * RAMP_STEPS).astype(np.int64),
+                           RAMP_STEPS - 1)
+        colors = self._ramps[effect, steps]
+        large = self._sizes[effect] > 1
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            pixels[xs, ys] = colors
+            # Two-pixel particles fill the rest of their square. None of them is on the last row or column.
+            xl, yl, cl = xs[large], ys[large], colors[large]
+            pixels[xl + 1, yl] = cl
+            pixels[xl, yl + 1] = cl
+            pixels[xl + 1, yl + 1] = cl
+        finally:
+            # The surface stays locked while the array refers to it
+            del pixels
+        left, top = int(xs.min()), int(ys.min())
+        return pygame.Rect(left, top, int(xs.max()) - left + 2, int(ys.max()) - top + 2)
+
+    def clear(self):
+        """
+        Remove every particle
+        :return None:
+        """
+        self.count = 0
+        self.live[:] = 0
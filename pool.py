@@ -0,0 +1,137 @@
+from pygame.sprite import Sprite
+
+
+class PooledSprite(Sprite):
+    """
+    A sprite that can be reused. Once it has been removed from every group it belonged to, whether by kill(),
+    Group.remove() or Group.empty(), it returns itself to its pool so the next acquire() can reset and hand it out again
+    instead of allocating a new object.
+
+    Attributes:
+
+    - pool :    :class:`pool.Pool` --> The pool the sprite returns to, or None for a sprite that isn't pooled.
+    - in_use :    :class:`bool` --> A boolean to indicate the sprite has been handed out and not returned yet.
+
+    Methods:
+
+    - reset() --> Put the sprite in its starting state. Subclasses implement this. Returns None.
+    - remove_internal() --> Called by pygame when the sprite is removed from a group. Returns None.
+    - kill() --> Remove the sprite from every group. Returns None.
+    """
+
+    __slots__ = ('pool', 'in_use')
+
+    def __init__(self, pool=None):
+        """
+        Create the sprite
+        :param pool: The pool the sprite returns to, or None for a sprite that isn't pooled
+        """
+        super().__init__()
+        self.pool = pool
+        self.in_use = False
+
+    def reset(self, *args):
+        """
+        Put the sprite in its starting state, as if it was just created
+        :return None:
+        """
+        raise NotImplementedError
+
+    def remove_internal(self, group):
+        """
+        Called by pygame when Group.remove() or Group.empty() takes the sprite out of a group
+        :param group: The group the sprite was removed from
+        :return None:
+        """
+        super().remove_internal(group)
+        self._release()
+
+    def kill(self):
+        """
+        Remove the sprite from every group. pygame's kill() doesn't go through remove_internal(), so the sprite is
+        returned to its pool here as well.
+        :return None:
+        """
+        super().kill()
+        self._release()
+
+    def _release(self):
+        """
+        Return the sprite to its pool if it is no longer in any group. A sprite is only returned once per use.
+        :return None:
+        """
+        if self.in_use and not self.alive():
+            self.in_use = False
+            if self.pool is not None:
+                self.pool.release(self)
+
+
+class Pool:
+    """
+    A free list of PooledSprite objects. Sprites are allocated up front and then recycled, so a steady stream of
+    bullets and aliens doesn't create garbage for the collector to pause on.
+
+    Attributes:
+
+    - factory :    :class:`type` --> The PooledSprite subclass, called with the pool to create an unused sprite.
+    - free :    :class:`list` --> The sprites waiting to be reused.
+    - created :    :class:`int` --> The number of sprites allocated, including the preallocated ones.
+    - reused :    :class:`int` --> The number of times a sprite was handed out from the free list.
+    - released :    :class:`int` --> The number of times a sprite was returned to the pool.
+
+    Methods:
+
+    - acquire() --> Hand out a reset sprite, reusing a free one if there is one. Returns the sprite.
+    - release() --> Put a sprite back on the free list. Returns None.
+    - stats() --> Report how the pool has been used. Returns a dict.
+    """
+
+    def __init__(self, factory, size=0):
+        """
+        Create the pool
+        :param factory: The PooledSprite subclass to pool
+        :param size: The number of sprites to allocate up front
+        """
+        self.factory = factory
+        self.free = [factory(pool=self) for _ in range(size)]
+        self.created = size
+        self.reused = 0
+        self.released = 0
+
+    def acquire(self, *args):
+        """
+        Hand out a sprite, reset with the given arguments. A new one is only allocated when the free list is empty.
+        :param args: The arguments passed to the sprite's reset()
+        :return PooledSprite:
+        """
+        if self.free:
+            sprite = self.free.pop()
+            self.reused += 1
+        else:
+            sprite = self.factory(pool=self)
+            self.created += 1
+        sprite.reset(*args)
+        sprite.in_use = True
+        return sprite
+
+    def release(self, sprite):
+        """
+        Put a sprite back on the free list
+        :param sprite: The sprite, which must not be in any group
+        :return None:
+        """
+        self.free.append(sprite)
+        self.released += 1
+
+    def stats(self):
+        """
+        Report how the pool has been used
+        :return dict: The counts of sprites created, reused, released, waiting on the free list and in use
+        """
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'free': len(self.free),
+            'in_use': self.created - len(self.free),
+        }
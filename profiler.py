@@ -0,0 +1,243 @@
+import atexit
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# The phases of a frame, in the order run_game() goes through them
+PHASES = ('events', 'simulation', 'render', 'sleep')
+
+# The columns written for every frame
+COLUMNS = ('frame', 'time_s', 'frame_ms', 'events_ms', 'simulation_ms', 'render_ms', 'sleep_ms', 'ticks', 'aliens',
+           'bullets')
+
+
+def percentile(sorted_values, pct):
+    """
+    Linearly interpolated percentile of an already sorted list
+    :param sorted_values: The values, sorted in ascending order
+    :param pct: The percentile, between 0 and 100
+    :return float:
+    """
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(durations):
+    """
+    Reduce a list of durations to their count, mean, p50, p95, p99 and max
+    :param durations: Durations in milliseconds
+    :return dict:
+    """
+    ordered = sorted(durations)
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered),
+        'p50_ms': percentile(ordered, 50),
+        'p95_ms': percentile(ordered, 95),
+        'p99_ms': percentile(ordered, 99),
+        'max_ms': ordered[-1],
+    }
+
+
+class FrameProfiler:
+    """
+    Records where the time of every frame goes: handling events, simulating, rendering (up to and including the flip)
+    and sleeping in the frame cap or while waiting for input on an idle screen, along with the number of simulation
+    ticks and live entities. The latest frames are kept for an on-screen overlay with a frame time graph and
+    percentiles, and every frame can be streamed to a CSV or JSON lines file.
+
+    Attributes:
+
+    - history :    :class:`collections.deque` --> The latest frames, each a tuple with the fields of COLUMNS.
+    - visible :    :class:`bool` --> A boolean to indicate the overlay is drawn.
+    - frame_index :    :class:`int` --> The number of frames recorded so far.
+    - start_time :    :class:`float` --> The time.perf_counter() reading the profiler was created at.
+    - refresh_frames :    :class:`int` --> How many frames the overlay is kept before it is drawn again.
+
+    Methods:
+
+    - open() --> Stream every frame to a file. Returns None.
+    - close() --> Flush and close the file. Returns None.
+    - start_frame() --> Start timing a frame. Returns None.
+    - lap() --> Charge the time since the last lap to a phase. Returns None.
+    - end_frame() --> Record the frame. Returns None.
+    - toggle() --> Show or hide the overlay. Returns None.
+    - summary() --> Summarize the frames in the history. Returns a dict.
+    - draw() --> Draw the overlay. Returns the Rect that was drawn on, or None.
+    """
+
+    def __init__(self, history=600, path=None, refresh_frames=15):
+        """
+        Create the profiler
+        :param history: The number of frames kept for the overlay
+        :param path: A .csv or .jsonl file to stream every frame to, or None
+        :param refresh_frames: How many frames the overlay is kept before it is drawn again
+        """
+        self.history = deque(maxlen=history)
+        self.visible = False
+        self.frame_index = 0
+        self.start_time = time.perf_counter()
+        self.refresh_frames = refresh_frames
+        self._file = None
+        self._writer = None
+        self._laps = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = None
+        self._mark = None
+        self._overlay = None
+        self._overlay_age = 0
+        self._font = None
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """
+        Stream every frame to a file: CSV with a header row if the name ends in .csv, otherwise one JSON object per line
+        :param path: The file to write
+        :return None:
+        """
+        self.close()
+        self._file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(COLUMNS)
+        # The game quits with sys.exit(), so make sure the last frames reach the file
+        atexit.register(self.close)
+
+    def close(self):
+        """
+        Flush and close the file, if one is open
+        :return None:
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def start_frame(self):
+        """
+        Start timing a frame
+        :return None:
+        """
+        self._frame_start = self._mark = time.perf_counter()
+        for phase in PHASES:
+            self._laps[phase] = 0.0
+
+    def lap(self, phase):
+        """
+        Charge the time since the last lap, or since the frame started, to a phase. Does nothing outside a frame, so
+        the game can be driven without the profiler, e.g. by the benchmark.
+        :param phase: One of PHASES
+        :return None:
+        """
+        if self._mark is None:
+            return
+        now = time.perf_counter()
+        self._laps[phase] += now - self._mark
+        self._mark = now
+
+    def end_frame(self, ticks, aliens, bullets):
+        """
+        Record the frame in the history and the file
+        :param ticks: The number of simulation ticks run during the frame
+        :param aliens: The number of live aliens
+        :param bullets: The number of live bullets
+        :return None:
+        """
+        laps = self._laps
+        row = (self.frame_index, round(self._frame_start - self.start_time, 6),
+               round((self._mark - self._frame_start) * 1000, 4), round(laps['events'] * 1000, 4),
+               round(laps['simulation'] * 1000, 4), round(laps['render'] * 1000, 4), round(laps['sleep'] * 1000, 4),
+               ticks, aliens, bullets)
+        self.history.append(row)
+        self.frame_index += 1
+        self._mark = None
+        if self._writer is not None:
+            self._writer.writerow(row)
+        elif self._file is not None:
+            self._file.write(json.dumps(dict(zip(COLUMNS, row))) + '\n')
+
+    def toggle(self):
+        """
+        Show or hide the overlay
+        :return None:
+        """
+        self.visible = not self.visible
+        self._overlay = None
+
+    def summary(self):
+        """
+        Summarize the frames in the history
+        :return dict: summarize() of the frame time and of every phase, keyed by column name. Empty if no frames
+        were recorded.
+        """
+        if not self.history:
+            return {}
+        columns = list(zip(*self.history))
+        return {name: summarize(columns[COLUMNS.index(name)])
+                for name in ('frame_ms', 'events_ms', 'simulation_ms', 'render_ms', 'sleep_ms')}
+
+    def draw(self, surface):
+        """
+        Draw the overlay in the bottom left corner, if it is visible. The overlay is only redrawn every refresh_frames
+        frames, so it doesn't cost much more than a blit.
+        :param surface: The surface to draw on
+        :return pygame.Rect: The area that was drawn on, or None if the overlay is hidden
+        """
+        if not self.visible:
+            return None
+        if self._overlay is None or self._overlay_age >= self.refresh_frames:
+            self._overlay = self._render_overlay()
+            self._overlay_age = 0
+        self._overlay_age += 1
+        return surface.blit(self._overlay, (10, surface.get_height() - self._overlay.get_height() - 10))
+
+    def _render_overlay(self):
+        """
+        Draw the frame time graph and the percentiles onto a new panel
+        :return pygame.Surface:
+        """
+        if self._font is None:
+            self._font = pygame.font.Font(None, 20)
+
+        # The text changes on every refresh, so it is rendered directly rather than through a TextCache
+        lines = []
+        summary = self.summary()
+        if summary:
+            frame = summary['frame_ms']
+            last = self.history[-1]
+            lines = [
+                f"frame p50 {frame['p50_ms']:.2f}  p95 {frame['p95_ms']:.2f}  p99 {frame['p99_ms']:.2f}  "
+                f"max {frame['max_ms']:.2f} ms",
+                f"mean ms  events {summary['events_ms']['mean_ms']:.2f}  sim {summary['simulation_ms']['mean_ms']:.2f}  "
+                f"render {summary['render_ms']['mean_ms']:.2f}  sleep {summary['sleep_ms']['mean_ms']:.2f}",
+                f"{1000 / frame['mean_ms'] if frame['mean_ms'] else 0:.0f} fps  ticks {last[7]}  aliens {last[8]}  "
+                f"bullets {last[9]}",
+            ]
+        texts = [self._font.render(line, True, (255, 255, 255)) for line in lines]
+
+        graph_width, graph_height = 300, 80
+        width = max([graph_width] + [text.get_width() + 12 for text in texts])
+        panel = pygame.Surface((width, graph_height + 10 + 20 * len(texts)), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+
+        # The frame time graph: one column per frame, newest on the right. The busy part of each frame is drawn in
+        # green, or red when the frame missed 60 fps, and the time spent sleeping is drawn in grey on top of it.
+        scale = graph_height / 33.3
+        frames = list(self.history)[-graph_width:]
+        for x, row in enumerate(frames, start=width - len(frames)):
+            total = min(graph_height, int(row[2] * scale) + 1)
+            busy = min(total, int((row[2] - row[6]) * scale) + 1)
+            color = (90, 200, 90) if row[2] <= 16.7 * 1.2 else (230, 80, 60)
+            pygame.draw.line(panel, (90, 90, 90), (x, graph_height), (x, graph_height - total))
+            pygame.draw.line(panel, color, (x, graph_height), (x, graph_height - busy))
+        budget = graph_height - int(16.7 * scale)
+        pygame.draw.line(panel, (255, 255, 255), (0, budget), (width, budget))
+
+        for i, text in enumerate(texts):
+            panel.blit(text, (6, graph_height + 6 + i * 20))
+        return panel
@@ -0,0 +1,94 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Presents frames by only touching the parts of the screen that changed. Everything drawn during a frame is recorded
+    as a rect. At the start of the next frame those rects are erased by copying the same areas from a cached background,
+    and at the end only the erased and newly drawn rects are pushed to the display with pygame.display.update(),
+    instead of filling and flipping the whole screen.
+
+    Attributes:
+
+    - screen :    :class:`pygame.surface.Surface` --> The display surface.
+    - screen_rect :    :class:`pygame.rect.Rect` --> The rect of the display surface, used to clip recorded rects.
+    - background :    :class:`pygame.surface.Surface` --> A cached copy of the empty screen used to erase old drawings.
+    - previous :    :class:`list` --> The rects drawn during the last presented frame.
+    - current :    :class:`list` --> The rects drawn so far during this frame.
+    - full_redraw :    :class:`bool` --> A boolean to indicate the next frame must be presented in full.
+    - max_rects :    :class:`int` --> Above this many rects a frame is presented in full, which is cheaper at that point.
+
+    Methods:
+
+    - erase() --> Erase everything drawn during the last frame. Returns None.
+    - add() --> Record a rect that was drawn on. Returns None.
+    - add_all() --> Record several rects that were drawn on. Returns None.
+    - present() --> Push the changed regions to the display. Returns None.
+    - invalidate() --> Present the next frame in full. Returns None.
+    """
+
+    def __init__(self, screen, background, max_rects=400):
+        """
+        Create the renderer
+        :param screen: The display surface
+        :param background: A surface the size of the screen showing what the screen looks like with nothing drawn on it
+        :param max_rects: Above this many rects a frame is presented in full
+        """
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.background = background
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+        self.max_rects = max_rects
+
+    def erase(self):
+        """
+        Erase everything drawn during the last frame by copying the same areas from the cached background. The first
+        frame, and any frame after invalidate(), starts from the whole background instead.
+        :return None:
+        """
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            self.screen.blits([(background, rect, rect) for rect in self.previous], doreturn=False)
+
+    def add(self, rect):
+        """
+        Record a rect that was drawn on during this frame
+        :param rect: The rect returned by Surface.blit() or pygame.draw
+        :return None:
+        """
+        self.current.append(rect)
+
+    def add_all(self, rects):
+        """
+        Record several rects that were drawn on during this frame. They are clipped to the screen, so the rects of
+        sprites that are partly off-screen can be passed as they are.
+        :param rects: The rects, e.g. the rects of a sprite group
+        :return None:
+        """
+        clip = self.screen_rect.clip
+        self.current.extend(clip(rect) for rect in rects)
+
+    def present(self):
+        """
+        Make the frame visible by updating the regions erased and drawn this frame, or the whole screen when needed
+        :return None:
+        """
+        changed = self.previous + self.current
+        if self.full_redraw or len(changed) > self.max_rects:
+            pygame.display.flip()
+        else:
+            pygame.display.update(changed)
+        self.full_redraw = False
+        self.previous = self.current
+        self.current = []
+
+    def invalidate(self):
+        """
+        Present the next frame in full, e.g. after the window was uncovered
+        :return None:
+        """
+        self.full_redraw = True
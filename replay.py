@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+Records the input of a game into a compact binary log and plays it back. The simulation only depends on its seed, its
+settings and the input it was given at each tick, so a log re-simulates exactly, either headless as fast as the CPU
+allows or rendered in a window, and the final score and lives are checked against the ones that were recorded.
+
+    python myshooter.py --seed 7 --record game.replay
+    python replay.py game.replay
+    python replay.py game.replay --render
+
+A log starts with the magic bytes, a version, the seed and the settings as JSON. Then each input is stored as a kind
+byte followed by unsigned LEB128 varints: the number of ticks since the previous record and the key or mouse position.
+An end record holds the final tick delta, score and lives.
+"""
+
+# Libraries to be imported
+import argparse
+import json
+import struct
+import sys
+import time
+
+MAGIC = b'ADRP'
+VERSION = 1
+
+# Record kinds
+END = 0
+KEYDOWN = 1
+KEYUP = 2
+CLICK = 3
+
+# Settings that only affect the machine the game was recorded on, and are not stored in the log
+LOCAL_SETTINGS = ('record_path', 'profile_path', 'scores_path', 'telemetry_path', 'telemetry_batch', 'resume_path',
+                  'autosave_interval')
+
+
+def write_varint(file, value):
+    """
+    Write an unsigned integer as an LEB128 varint: 7 bits per byte, low bits first
+    :param file: A binary file opened for writing
+    :param value: The integer, 0 or more
+    :return None:
+    """
+    # Shifting a negative number right never reaches 0, so it would never end
+    if value < 0:
+        raise ValueError(f"a varint can't hold the negative value {value}")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            break
+    file.write(out)
+
+
+def read_varint(data, offset):
+    """
+    Read an unsigned LEB128 varint
+    :param data: The bytes to read from
+    :param offset: Where the varint starts
+    :return tuple: The integer and the offset just past it
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class InputRecorder:
+    """
+    Writes the input a game handles into a replay log as it happens
+
+    Attributes:
+
+    - file :    :class:`io.BufferedWriter` --> The log being written.
+    - last_tick :    :class:`int` --> The tick of the last record, so each record only stores the ticks since then.
+
+    Methods:
+
+    - keydown() --> Record a key press. Returns None.
+    - keyup() --> Record a key release. Returns None.
+    - click() --> Record a mouse click. Returns None.
+    - close() --> Record how the game ended and close the log. Returns None.
+    """
+
+    def __init__(self, path, seed, settings):
+        """
+        Create the log and write its header
+        :param path: The file to write
+        :param seed: The seed of the game's random number generator
+        :param settings: The game's Settings
+        """
+        self.file = open(path, 'wb')
+        self.last_tick = 0
+        stored = {name: value for name, value in vars(settings).items() if name not in LOCAL_SETTINGS}
+        header = json.dumps(stored, separators=(',', ':')).encode()
+        self.file.write(MAGIC + struct.pack('<BqI', VERSION, seed, len(header)) + header)
+
+    def _record(self, kind, tick, *values):
+        """
+        Write a record
+        :param kind: The record kind
+        :param tick: The simulation tick the input was handled before
+        :param values: The record's unsigned integers
+        :return None:
+        """
+        self.file.write(bytes((kind,)))
+        write_varint(self.file, tick - self.last_tick)
+        self.last_tick = tick
+        for value in values:
+            write_varint(self.file, value)
+
+    def keydown(self, tick, key):
+        """
+        Record a key press
+        :param tick: The simulation tick the key press was handled before
+        :param key: The pygame key code
+        :return None:
+        """
+        self._record(KEYDOWN, tick, key)
+
+    def keyup(self, tick, key):
+        """
+        Record a key release
+        :param tick: The simulation tick the key release was handled before
+        :param key: The pygame key code
+        :return None:
+        """
+        self._record(KEYUP, tick, key)
+
+    def click(self, tick, pos):
+        """
+        Record a mouse click
+        :param tick: The simulation tick the click was handled before
+        :param pos: The (x, y) position of the mouse, within the window
+        :return None:
+        """
+        self._record(CLICK, tick, max(0, pos[0]), max(0, pos[1]))
+
+    def close(self, tick, score, lives):
+        """
+        Record how the game ended and close the log. Does nothing if the log is already closed.
+        :param tick: The number of ticks simulated in total
+        :param score: The final score
+        :param lives: The final number of lives
+        :return None:
+        """
+        if self.file.closed:
+            return
+        self._record(END, tick, score, lives)
+        self.file.close()
+
+
+class Replay:
+    """
+    A replay log read back into memory
+
+    Attributes:
+
+    - seed :    :class:`int` --> The seed of the recorded game.
+    - settings :    :class:`dict` --> The recorded Settings attributes.
+    - events :    :class:`list` --> The inputs, as (tick, kind, values) tuples in the order they were handled.
+    - end_tick :    :class:`int` --> The number of ticks the recorded game simulated, or None if the log was cut short.
+    - score :    :class:`int` --> The recorded final score, or None if the log was cut short.
+    - lives :    :class:`int` --> The recorded final number of lives, or None if the log was cut short.
+
+    Methods:
+
+    - load() --> Read a replay log. Returns a Replay.
+    - make_settings() --> Build the recorded Settings. Returns a Settings.
+    """
+
+    def __init__(self, seed, settings, events, end_tick=None, score=None, lives=None):
+        """
+        Hold a replay
+        :param seed: The seed of the recorded game
+        :param settings: The recorded Settings attributes
+        :param events: The inputs, as (tick, kind, values) tuples
+        :param end_tick: The number of ticks the recorded game simulated
+        :param score: The recorded final score
+        :param lives: The recorded final number of lives
+        """
+        self.seed = seed
+        self.settings = settings
+        self.events = events
+        self.end_tick = end_tick
+        self.score = score
+        self.lives = lives
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a replay log. A log without an end record, e.g. from a game that crashed, still loads.
+        :param path: The file to read
+        :return Replay:
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay log")
+        version, seed, header_length = struct.unpack_from('<BqI', data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} replay log, expected version {VERSION}")
+        offset = 4 + struct.calcsize('<BqI')
+        settings = json.loads(data[offset:offset + header_length])
+        offset += header_length
+
+        replay = cls(seed, settings, [])
+        tick = 0
+        while offset < len(data):
+            kind = data[offset]
+            delta, offset = read_varint(data, offset + 1)
+            tick += delta
+            count = 2 if kind in (CLICK, END) else 1
+            values = []
+            for _ in range(count):
+                value, offset = read_varint(data, offset)
+                values.append(value)
+            if kind == END:
+                replay.end_tick, (replay.score, replay.lives) = tick, values
+                break
+            replay.events.append((tick, kind, tuple(values)))
+        return replay
+
+    def make_settings(self):
+        """
+        Build the Settings the game was recorded with
+        :return settings.Settings:
+        """
+        from settings import Settings
+        settings = Settings()
+        # Logs from before collisions were swept were played with collisions tested at the end of each tick
+        settings.collision_mode = 'discrete'
+        for name, value in self.settings.items():
+            # JSON turns tuples into lists. Colors and star layers work either way, but keep them as they were.
+            setattr(settings, name, tuple(value) if isinstance(value, list) and name.endswith('color') else value)
+        return settings
+
+
+def apply_event(game, kind, values):
+    """
+    Hand a recorded input to the same handler that handled it when it was recorded
+    :param game: The game being replayed
+    :param kind: The record kind
+    :param values: The record's values
+    :return None:
+    """
+    import pygame
+    if kind == KEYDOWN:
+        game._check_keydown_events(pygame.event.Event(pygame.KEYDOWN, key=values[0]))
+    elif kind == KEYUP:
+        game._check_keyup_events(pygame.event.Event(pygame.KEYUP, key=values[0]))
+    elif kind == CLICK:
+        game._check_play_button(values)
+
+
+def play(replay, render=False, speed=1.0):
+    """
+    Re-simulate a replay
+    :param replay: The Replay to play
+    :param render: Draw the game in a window at its tick rate instead of simulating headless at full speed
+    :param speed: With render, how many times faster than real time to play
+    :return dict: The ticks simulated, the final score and lives, the seconds it took and whether the score and lives
+    match the recording
+    """
+    import pygame
+    from myshooter import Game
+
+    settings = replay.make_settings()
+    game = Game(headless=not render, seed=replay.seed, settings=settings)
+    game._finish_loading()
+    # A replay must never change the player's high score
+    game.save_high_score = False
+    end_tick = replay.end_tick
+    if end_tick is None:
+        end_tick = replay.events[-1][0] if replay.events else 0
+    events = replay.events
+    next_event = 0
+
+    def advance():
+        """
+        Apply the inputs due before the next tick, then simulate it if a round is being played
+        :return None:
+        """
+        nonlocal next_event
+        while next_event < len(events) and events[next_event][0] <= game.ticks:
+            _, kind, values = events[next_event]
+            apply_event(game, kind, values)
+            next_event += 1
+        if not game.game_over and game.game_started:
+            game.step()
+        else:
+            # Nothing is simulated on the menu and game over screens, so jump to the next input
+            game.ticks = events[next_event][0] if next_event < len(events) else end_tick
+
+    start = time.perf_counter()
+    if not render:
+        while game.ticks < end_tick:
+            advance()
+    else:
+        timestep = game.timestep
+        timestep.dt /= speed
+        while game.ticks < end_tick:
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+            timestep.advance()
+            while game.ticks < end_tick and timestep.consume():
+                advance()
+            game._update_screen(timestep.alpha)
+            game.clock.tick(game.frame_cap)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'ticks': game.ticks,
+        'score': game.score,
+        'lives': game.lives,
+        'seconds': elapsed,
+        'verified': replay.score is not None and (game.score, game.lives) == (replay.score, replay.lives),
+    }
+
+
+# Program Starts Here
+def main():
+    """
+    Play a replay log and check it ends with the recorded score and lives. Exits with status 1 if it doesn't.
+    """
+    parser = argparse.ArgumentParser(description="Play back a recorded Alien Defense game")
+    parser.add_argument('path', help="the replay log")
+    parser.add_argument('--render', action='store_true', help="draw the replay in a window instead of running headless")
+    parser.add_argument('--speed', type=float, default=1.0, help="with --render, play this many times faster")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    result = play(replay, render=args.render, speed=args.speed)
+    rate = result['ticks'] / result['seconds'] if result['seconds'] else 0
+    print(f"ticks={result['ticks']} score={result['score']} lives={result['lives']} "
+          f"seconds={result['seconds']:.3f} ticks_per_second={rate:.0f}")
+    if replay.score is None:
+        print("the log has no end record, so the result can't be verified")
+    elif not result['verified']:
+        print(f"MISMATCH: recorded score={replay.score} lives={replay.lives}")
+        sys.exit(1)
+    else:
+        print("verified: score and lives match the recording")
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+"""
+Saves the complete state of a game's simulation into a compact binary blob and restores it exactly, so a game picks up
+on the very tick it was saved and plays on as if it had never stopped. A state holds the score, lives and counters, the
+ship, the wave being played, the state of the random number generator and every bullet and alien. Capturing one takes
+a fraction of a millisecond, so the game can keep a ring of recent states for rolling back and debugging, and an
+arcade cabinet can keep the round on disk and resume it after a power cut.
+
+    python myshooter.py --resume round.state
+    python savestate.py scene.state --simulate 30 --spawn-mode horde
+    python savestate.py scene.state
+    python benchmark.py --scene scene.state
+
+A state starts with a fixed record of the game's counters and the ship, then the random number generator's Mersenne
+Twister words, the wave and the starfield's scroll offsets. Then come the bullets and the aliens, each as a count
+followed by four columns of little-endian doubles: x, previous x, top and velocity. A state file starts with the magic
+bytes, a version, the seed and the settings as JSON, like a replay log, followed by a state. Files are replaced
+atomically, so a power cut leaves either the old file or the new one.
+"""
+
+# Libraries to be imported
+import argparse
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+from array import array
+from collections import deque
+
+from replay import LOCAL_SETTINGS
+
+MAGIC = b'ADSV'
+VERSION = 1
+
+# The counters and the ship: version, ticks, score, lives, alien speed factor, fastest alien, game over, game started,
+# whether there is a wave director, ship y, ship previous y, ship top, moving up and moving down
+GAME = struct.Struct('<BqiiddBBBddiBB')
+# A random.Random state: the 624 Mersenne Twister words and the position, then the cached gauss() value if there is one
+RNG = struct.Struct('<625IBd')
+# The wave director: the wave and the next tick of its schedule. A wave that was started is followed by its RNG state.
+WAVE = struct.Struct('<ii')
+# A count of scroll offsets, or of entities
+COUNT = struct.Struct('<I')
+# The columns stored for every bullet and alien
+COLUMNS = ('x', 'previous_x', 'top', 'vx')
+
+# The settings that change what a state means or how the game plays on from it. A state resumes in a game whose other
+# settings differ, e.g. its entity engine, render mode or fullscreen.
+SIMULATION_SETTINGS = ('screen_width', 'screen_height', 'ship_speed', 'bullet_speed', 'bullet_width', 'bullet_height',
+                       'bullets_allowed', 'alien_frequency', 'alien_speed', 'alien_speed_factor', 'spawn_mode',
+                       'wave_duration', 'wave_pause', 'wave_growth', 'wave_speed_step', 'wave_burst_size', 'wave_lanes',
+                       'horde_aliens', 'horde_waves', 'lives', 'score', 'collision_mode', 'tick_rate')
+
+# Writer thread commands besides a state to write
+DISCARD = b''
+
+
+def _pack_rng(state):
+    """
+    Pack a random.Random state
+    :param state: The state from Random.getstate()
+    :return bytes:
+    """
+    _, words, gauss = state
+    return RNG.pack(*words, gauss is not None, gauss or 0.0)
+
+
+def _unpack_rng(data, offset):
+    """
+    Unpack a random.Random state
+    :param data: The bytes to read from
+    :param offset: Where the state starts
+    :return tuple: The state for Random.setstate(), and the offset just past it
+    """
+    values = RNG.unpack_from(data, offset)
+    return (3, values[:625], values[626] if values[625] else None), offset + RNG.size
+
+
+def _column(values):
+    """
+    Pack a column of numbers as little-endian doubles
+    :param values: The numbers, or a float64 NumPy array
+    :return bytes:
+    """
+    if hasattr(values, 'astype'):
+        return values.astype('<f8', copy=False).tobytes()
+    column = array('d', values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+
+def capture(game):
+    """
+    Capture the complete state of a game's simulation. Call it between ticks, from the thread that runs them.
+    :param game: The game
+    :return bytes: The state
+    """
+    ship = game.ship
+    director = game.director
+    parts = [GAME.pack(VERSION, game.ticks, game.score, game.lives, game.alien_speed_factor, game.fastest_alien,
+                       bool(game.game_over), bool(game.game_started), director is not None, ship.y, ship.previous_y,
+                       ship.rect.y, bool(ship.moving_up), bool(ship.moving_down)),
+             _pack_rng(game.rng.getstate())]
+    if director is not None:
+        parts.append(WAVE.pack(director.wave, director.tick))
+        if director.wave >= 0:
+            parts.append(_pack_rng(director.wave_state))
+    # The starfield is only scenery, but a resumed game shouldn't jump
+    offsets = [layer.offset for layer in game.starfield.layers] if game.starfield is not None else []
+    parts.append(COUNT.pack(len(offsets)))
+    parts.append(_column(offsets))
+
+    if game.array_entities:
+        for store in (game.bullets, game.aliens):
+            n = store.count
+            parts.append(COUNT.pack(n))
+            parts.extend(_column(column[:n]) for column in (store.x, store.px, store.y, store.vx))
+    else:
+        for sprites, direction in ((game.bullets.sprites(), 1), (game.aliens.sprites(), -1)):
+            parts.append(COUNT.pack(len(sprites)))
+            parts.append(_column([sprite.x for sprite in sprites]))
+            parts.append(_column([sprite.previous_x for sprite in sprites]))
+            parts.append(_column([sprite.rect.y for sprite in sprites]))
+            # Aliens fly to the left, so their velocity is the negative of their speed
+            parts.append(_column([sprite.speed * direction for sprite in sprites]))
+    return b''.join(parts)
+
+
+def unpack(state):
+    """
+    Read a state without restoring it, e.g. to describe it
+    :param state: The state from capture()
+    :return dict: Its fields. The bullets and aliens are dicts of COLUMNS, each an array.array of floats.
+    """
+    version = state[0]
+    if version != VERSION:
+        raise ValueError(f"a version {version} game state, expected version {VERSION}")
+    (_, ticks, score, lives, alien_speed_factor, fastest_alien, game_over, game_started, has_director, ship_y,
+     ship_previous_y, ship_top, moving_up, moving_down) = GAME.unpack_from(state, 0)
+    fields = {'ticks': ticks, 'score': score, 'lives': lives, 'alien_speed_factor': alien_speed_factor,
+              'fastest_alien': fastest_alien, 'game_over': bool(game_over), 'game_started': bool(game_started),
+              'ship': (ship_y, ship_previous_y, ship_top, bool(moving_up), bool(moving_down)), 'wave': None}
+    fields['rng'], offset = _unpack_rng(state, GAME.size)
+    if has_director:
+        wave, tick = WAVE.unpack_from(state, offset)
+        offset += WAVE.size
+        wave_state = None
+        if wave >= 0:
+            wave_state, offset = _unpack_rng(state, offset)
+        fields['wave'] = (wave, tick, wave_state)
+
+    def read_column(count):
+        nonlocal offset
+        column = array('d')
+        column.frombytes(state[offset:offset + 8 * count])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        offset += 8 * count
+        return column
+
+    count, = COUNT.unpack_from(state, offset)
+    offset += COUNT.size
+    fields['star_offsets'] = read_column(count)
+    for kind in ('bullets', 'aliens'):
+        count, = COUNT.unpack_from(state, offset)
+        offset += COUNT.size
+        fields[kind] = {name: read_column(count) for name in COLUMNS}
+    if offset != len(state):
+        raise ValueError("the game state is cut short or has trailing data")
+    return fields
+
+
+def restore(game, state):
+    """
+    Put a game's simulation back in a captured state. The game must have been created with the SIMULATION_SETTINGS the
+    state was captured with, though e.g. the entity engine may differ. Call it between ticks, from the thread that runs them.
+    :param game: The game
+    :param state: The state from capture()
+    :return None:
+    """
+    fields = unpack(state)
+    if (fields['wave'] is not None) != (game.director is not None):
+        raise ValueError("the game state was captured in a different spawn mode")
+
+    game.ticks = fields['ticks']
+    game.score = fields['score']
+    game.lives = fields['lives']
+    game.alien_speed_factor = fields['alien_speed_factor']
+    game.fastest_alien = fields['fastest_alien']
+    game.game_over = fields['game_over']
+    game.game_started = fields['game_started']
+    # Lives are crossed out from the right
+    lost = max(0, game.settings.lives - game.lives)
+    game.lives_images = [game.life_image] * (game.settings.lives - lost) + [game.lost_life_image] * lost
+    ship = game.ship
+    ship.y, ship.previous_y, ship.rect.y, ship.moving_up, ship.moving_down = fields['ship']
+
+    if fields['wave'] is not None:
+        # The director works the wave out again with the game's generator, so this comes before the generator is set
+        game.director.restore(*fields['wave'])
+    game.rng.setstate(fields['rng'])
+    if game.starfield is not None and len(game.starfield.layers) == len(fields['star_offsets']):
+        for layer, offset in zip(game.starfield.layers, fields['star_offsets']):
+            layer.offset = offset
+
+    bullets, aliens = fields['bullets'], fields['aliens']
+    settings = game.settings
+    if game.array_entities:
+        import numpy as np
+        width, height = game.aliens.image.get_size()
+        for store, columns, size in ((game.bullets, bullets, (settings.bullet_width, settings.bullet_height)),
+                                     (game.aliens, aliens, (width, height))):
+            n = len(columns['x'])
+            store.empty()
+            while len(store.x) < n:
+                store._grow()
+            for name, values in zip(('x', 'px', 'y', 'vx'), (columns[column] for column in COLUMNS)):
+                getattr(store, name)[:n] = np.frombuffer(values, dtype=np.float64)
+            store.width[:n], store.height[:n] = size
+            store.count = n
+    else:
+        # Emptying the groups hands their sprites back to the pools
+        game.bullets.empty()
+        game.aliens.empty()
+        for x, previous_x, top, vx in zip(*(bullets[name] for name in COLUMNS)):
+            bullet = game.bullet_pool.acquire(game)
+            bullet.speed = vx
+            bullet.rect.y = int(top)
+            bullet.x, bullet.previous_x = x, previous_x
+            bullet.rect.x = x
+            game.bullets.add(bullet)
+        for x, previous_x, top, vx in zip(*(aliens[name] for name in COLUMNS)):
+            alien = game.alien_pool.acquire(game, int(top), -vx)
+            alien.x, alien.previous_x = x, previous_x
+            # Set like Alien.update() does, so the rect rounds the same way
+            alien.rect.x = x
+            game.aliens.add(alien)
+    # Don't simulate the time that passed before the restore
+    game.timestep.reset()
+
+
+def stored_settings(settings):
+    """
+    The settings that belong in a state file, as they read back from JSON
+    :param settings: The game's Settings
+    :return dict:
+    """
+    stored = {name: value for name, value in vars(settings).items() if name not in LOCAL_SETTINGS}
+    return json.loads(json.dumps(stored))
+
+
+def file_header(seed, settings):
+    """
+    The start of a state file, up to the state
+    :param seed: The seed of the game's random number generator
+    :param settings: The game's Settings
+    :return bytes:
+    """
+    header = json.dumps(stored_settings(settings), separators=(',', ':')).encode()
+    return MAGIC + struct.pack('<BqI', VERSION, seed, len(header)) + header
+
+
+def write_file(path, data):
+    """
+    Replace a file atomically: write a temporary file next to it, flush it to the disk, then rename it over the file
+    :param path: The file to replace
+    :param data: The bytes to write
+    :return None:
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def save(game, path):
+    """
+    Save a game's state to a file, with the seed and settings it needs to be restored
+    :param game: The game
+    :param path: The file to write
+    :return None:
+    """
+    write_file(path, file_header(game.seed, game.settings) + capture(game))
+
+
+class SavedGame:
+    """
+    A state file read back into memory
+
+    Attributes:
+
+    - seed :    :class:`int` --> The seed of the saved game.
+    - settings :    :class:`dict` --> The saved Settings attributes.
+    - state :    :class:`bytes` --> The state, for restore().
+
+    Methods:
+
+    - load() --> Read a state file. Returns a SavedGame.
+    - make_settings() --> Build the saved Settings. Returns a Settings.
+    - matches() --> Check a game's settings are the saved ones. Returns a boolean.
+    - restore() --> Restore the state into a game. Returns None.
+    """
+
+    def __init__(self, seed, settings, state):
+        """
+        Hold a saved game
+        :param seed: The seed of the saved game
+        :param settings: The saved Settings attributes
+        :param state: The state
+        """
+        self.seed = seed
+        self.settings = settings
+        self.state = state
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a state file
+        :param path: The file to read
+        :return SavedGame:
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a game state file")
+        version, seed, header_length = struct.unpack_from('<BqI', data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} game state file, expected version {VERSION}")
+        offset = 4 + struct.calcsize('<BqI')
+        settings = json.loads(data[offset:offset + header_length])
+        return cls(seed, settings, data[offset + header_length:])
+
+    def make_settings(self):
+        """
+        Build the Settings the game was saved with
+        :return settings.Settings:
+        """
+        from settings import Settings
+        settings = Settings()
+        for name, value in self.settings.items():
+            # JSON turns tuples into lists. Colors and star layers work either way, but keep them as they were.
+            setattr(settings, name, tuple(value) if isinstance(value, list) and name.endswith('color') else value)
+        return settings
+
+    def matches(self, settings):
+        """
+        Check a game's settings simulate the same game as the ones the game was saved with, so the state means the same
+        thing in it. Only SIMULATION_SETTINGS are compared, so e.g. a state saved with one entity engine resumes in the
+        other.
+        :param settings: The game's Settings
+        :return bool:
+        """
+        stored = stored_settings(settings)
+        return all(stored.get(name) == self.settings.get(name) for name in SIMULATION_SETTINGS)
+
+    def restore(self, game):
+        """
+        Restore the saved state into a game, see restore()
+        :param game: The game, created with make_settings()
+        :return None:
+        """
+        restore(game, self.state)
+        game.seed = self.seed
+
+
+class SnapshotRing:
+    """
+    The most recent states of a game, kept in memory so the game can be rolled back, e.g. to look at what led up to a
+    bug. Once the ring is full each new snapshot replaces the oldest.
+
+    Attributes:
+
+    - snapshots :    :class:`collections.deque` --> (tick, state) pairs, oldest first.
+
+    Methods:
+
+    - push() --> Capture a game's state. Returns None.
+    - rewind() --> Roll a game back to an earlier snapshot. Returns the tick it was rolled back to, or None.
+    - clear() --> Drop every snapshot. Returns None.
+    """
+
+    def __init__(self, capacity):
+        """
+        Create an empty ring
+        :param capacity: The most snapshots kept
+        """
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        """
+        The number of snapshots kept
+        :return int:
+        """
+        return len(self.snapshots)
+
+    def push(self, game):
+        """
+        Capture a game's state as the latest snapshot
+        :param game: The game
+        :return None:
+        """
+        self.snapshots.append((game.ticks, capture(game)))
+
+    def rewind(self, game, steps=1):
+        """
+        Roll a game back to an earlier snapshot, dropping it and the ones after it, so rewinding again goes further back
+        :param game: The game
+        :param steps: 1 for the latest snapshot, 2 for the one before it, and so on
+        :return int: The tick the game was rolled back to, or None if there were no snapshots
+        """
+        snapshot = None
+        for _ in range(min(steps, len(self.snapshots))):
+            snapshot = self.snapshots.pop()
+        if snapshot is None:
+            return None
+        tick, state = snapshot
+        restore(game, state)
+        return tick
+
+    def clear(self):
+        """
+        Drop every snapshot
+        :return None:
+        """
+        self.snapshots.clear()
+
+
+class Autosaver:
+    """
+    Keeps a state file of the round being played, so the round can be resumed after the game stops, e.g. when an
+    arcade cabinet loses power. The game's state is captured on the thread that runs the simulation, and a writer
+    thread replaces the file with it. If the disk falls behind, a state still waiting to be written is replaced by the
+    newer one.
+
+    Attributes:
+
+    - path :    :class:`str` --> The state file.
+    - saves :    :class:`int` --> The number of states written.
+
+    Methods:
+
+    - save() --> Queue a game's state to be written. Returns None.
+    - discard() --> Queue the state file to be deleted, e.g. once the round is over. Returns None.
+    - close() --> Finish the queued work and stop the writer thread. Returns None.
+    """
+
+    def __init__(self, path):
+        """
+        Start the writer thread
+        :param path: The state file
+        """
+        self.path = path
+        self.saves = 0
+        self._queue = queue.Queue(1)
+        self._writer = threading.Thread(target=self._write, name='state-writer', daemon=True)
+        self._writer.start()
+
+    def save(self, game):
+        """
+        Capture a game's state and queue it to be written
+        :param game: The game
+        :return None:
+        """
+        # The header is built each time, since resuming a round gives the game the saved round's seed
+        self._put(file_header(game.seed, game.settings) + capture(game))
+
+    def discard(self):
+        """
+        Queue the state file to be deleted
+        :return None:
+        """
+        self._put(DISCARD)
+
+    def _put(self, work):
+        """
+        Queue work for the writer, replacing work that is still waiting, since it is out of date
+        :param work: A state file's contents, or DISCARD
+        :return None:
+        """
+        try:
+            self._queue.put_nowait(work)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(work)
+
+    def close(self):
+        """
+        Finish the queued work and stop the writer thread. Does nothing if it is already stopped.
+        :return None:
+        """
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _write(self):
+        """
+        Write or delete the state file as queued until close() is called. Runs on the writer thread.
+        :return None:
+        """
+        while True:
+            work = self._queue.get()
+            if work is None:
+                break
+            if work is DISCARD:
+                if os.path.isfile(self.path):
+                    os.remove(self.path)
+                continue
+            write_file(self.path, work)
+            self.saves += 1
+
+
+def describe(saved):
+    """
+    Summarize a saved game
+    :param saved: The SavedGame
+    :return str:
+    """
+    fields = unpack(saved.state)
+    tick_rate = saved.settings.get('tick_rate', 240)
+    lines = [f"seed {saved.seed}, {saved.settings.get('spawn_mode')} mode, {saved.settings.get('entity_engine')} engine",
+             f"tick {fields['ticks']} ({fields['ticks'] / tick_rate:.1f} s), score {fields['score']}, "
+             f"lives {fields['lives']}, alien speed x{fields['alien_speed_factor']:.2f}",
+             f"{len(fields['bullets']['x'])} bullets, {len(fields['aliens']['x'])} aliens, state {len(saved.state)} bytes"]
+    if fields['wave'] is not None:
+        lines.append(f"wave {fields['wave'][0]}, tick {fields['wave'][1]} of it")
+    if fields['game_over']:
+        lines.append("the game is over")
+    return '\n'.join(lines)
+
+
+# Program Starts Here
+def main():
+    """
+    Describe a state file, or play a headless game with the scripted autopilot and save it, e.g. as a benchmark scene
+    """
+    parser = argparse.ArgumentParser(description="Describe or create Alien Defense state files")
+    parser.add_argument('path', help="the state file")
+    parser.add_argument('--simulate', type=float, default=None, metavar='SECONDS',
+                        help="play this many seconds headless with the scripted autopilot and save the game to path")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the simulated game")
+    parser.add_argument('--spawn-mode', choices=('classic', 'waves', 'horde'), default=None,
+                        help="how aliens appear in the simulated game")
+    parser.add_argument('--entity-engine', choices=('sprite', 'numpy'), default='sprite',
+                        help="how aliens and bullets are stored in the simulated game")
+    parser.add_argument('--lives', type=int, default=None, help="lives of the simulated game")
+    args = parser.parse_args()
+
+    if args.simulate is not None:
+        from autopilot import PILOTS
+        from myshooter import Game
+        from settings import Settings
+        settings = Settings()
+        settings.entity_engine = args.entity_engine
+        if args.spawn_mode is not None:
+            settings.spawn_mode = args.spawn_mode
+        if args.lives is not None:
+            settings.lives = args.lives
+        game = Game(headless=True, seed=args.seed, settings=settings)
+        game.simulate(max_ticks=round(args.simulate * settings.tick_rate), policy=PILOTS['scripted'](args.seed))
+        save(game, args.path)
+    print(describe(SavedGame.load(args.path)))
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
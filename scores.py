@@ -0,0 +1,164 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# The settings that decide how hard a game is. They are stored with every score, so scores from different difficulty
+# profiles can be told apart.
+PROFILE_SETTINGS = ('alien_frequency', 'alien_speed', 'alien_speed_factor', 'bullet_speed', 'bullets_allowed', 'lives',
+                    'tick_rate', 'screen_width', 'screen_height', 'spawn_mode')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    profile TEXT NOT NULL
+)
+"""
+
+
+def settings_profile(settings):
+    """
+    Describe the difficulty of a game's settings
+    :param settings: The game's Settings
+    :return str: The difficulty settings as compact JSON
+    """
+    return json.dumps({name: getattr(settings, name) for name in PROFILE_SETTINGS}, separators=(',', ':'))
+
+
+class ScoreStore:
+    """
+    A leaderboard of the best scores, kept in an SQLite database in WAL mode. The entries are read once, on whatever
+    thread calls load(), and then served from memory. New scores go into memory right away and are committed by a
+    background writer thread, each in its own transaction, so the frame loop never waits on the disk and a crash can't
+    leave a half-written score behind.
+
+    Attributes:
+
+    - path :    :class:`str` --> The database file.
+    - capacity :    :class:`int` --> The number of entries kept.
+    - entries :    :class:`list` --> The kept entries, best first. Each is a dict with the score, the time.time() it was
+      recorded at and the settings profile it was played with.
+    - legacy_path :    :class:`str` --> A high_score.txt file imported when the database is empty, or None.
+
+    Methods:
+
+    - load() --> Read the entries from the database. Returns None.
+    - best() --> The best score. Returns an int.
+    - qualifies() --> Check if a score would make the leaderboard. Returns a boolean.
+    - add() --> Add a score to the leaderboard and queue it to be committed. Returns None.
+    - close() --> Commit the queued scores and stop the writer thread. Returns None.
+    """
+
+    def __init__(self, path, capacity=10, legacy_path=None):
+        """
+        Create the store. Nothing is read until load() is called.
+        :param path: The database file
+        :param capacity: The number of entries kept
+        :param legacy_path: A high_score.txt file to import when the database is empty
+        """
+        self.path = path
+        self.capacity = capacity
+        self.entries = []
+        self.legacy_path = legacy_path
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def load(self):
+        """
+        Read the entries from the database, creating it if it doesn't exist. A high score from the old text file is
+        carried over the first time.
+        :return None:
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute(SCHEMA)
+            rows = connection.execute('SELECT score, recorded_at, profile FROM scores '
+                                      'ORDER BY score DESC, recorded_at LIMIT ?', (self.capacity,)).fetchall()
+        finally:
+            connection.close()
+        self.entries = [{'score': score, 'recorded_at': recorded_at, 'profile': profile}
+                        for score, recorded_at, profile in rows]
+        if not self.entries and self.legacy_path is not None and os.path.isfile(self.legacy_path):
+            with open(self.legacy_path) as file:
+                text = file.read().strip()
+            if text.isdigit() and int(text) > 0:
+                self.add(int(text), '', os.path.getmtime(self.legacy_path))
+
+    def best(self):
+        """
+        The best score on the leaderboard
+        :return int: 0 if there are no entries
+        """
+        return self.entries[0]['score'] if self.entries else 0
+
+    def qualifies(self, score):
+        """
+        Check if a score would make the leaderboard
+        :param score: The score
+        :return bool:
+        """
+        return score > 0 and (len(self.entries) < self.capacity or score > self.entries[-1]['score'])
+
+    def add(self, score, profile, recorded_at=None):
+        """
+        Add a score to the leaderboard in memory and queue it for the writer thread. Scores that don't make the
+        leaderboard are ignored.
+        :param score: The score
+        :param profile: The settings profile the score was played with, from settings_profile()
+        :param recorded_at: The time.time() the score was recorded at. None uses the current time.
+        :return None:
+        """
+        if not self.qualifies(score):
+            return
+        entry = {'score': score, 'recorded_at': time.time() if recorded_at is None else recorded_at, 'profile': profile}
+        self.entries.append(entry)
+        # Equal scores keep the earlier one ahead
+        self.entries.sort(key=lambda item: (-item['score'], item['recorded_at']))
+        del self.entries[self.capacity:]
+        if self._writer is None:
+            # The sqlite3 connection belongs to the thread that opened it, so the writer opens its own
+            self._writer = threading.Thread(target=self._write, name='score-writer', daemon=True)
+            self._writer.start()
+            # The game quits with sys.exit(), so make sure the queued scores are committed
+            atexit.register(self.close)
+        self._queue.put(entry)
+
+    def close(self):
+        """
+        Commit the queued scores and stop the writer thread. Does nothing if nothing was written.
+        :return None:
+        """
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _write(self):
+        """
+        Commit queued scores until close() is called. Runs on the writer thread. Each score is inserted and the
+        entries that fell off the leaderboard are deleted in one transaction.
+        :return None:
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            # In WAL mode a commit only appends to the log, and readers never see a partial write
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                with connection:
+                    connection.execute('INSERT INTO scores (score, recorded_at, profile) VALUES (?, ?, ?)',
+                                       (entry['score'], entry['recorded_at'], entry['profile']))
+                    connection.execute('DELETE FROM scores WHERE id NOT IN (SELECT id FROM scores '
+                                       'ORDER BY score DESC, recorded_at LIMIT ?)', (self.capacity,))
+        finally:
+            connection.close()
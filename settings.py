@@ -4,20 +4,77 @@ class Settings:
 
     Attributes:
 
-    - screen_width :    :class:`int` --> The width of the screen in pixels.
-    - screen_height :    :class:`int` --> The height of the screen in pixels.
+    - screen_width :    :class:`int` --> The width in pixels of the framebuffer the game is drawn into, which is also
+      the width of the playing field. The framebuffer is scaled to the window, so this doesn't depend on the display.
+    - screen_height :    :class:`int` --> The height in pixels of the framebuffer and the playing field.
+    - fullscreen :    :class:`bool` --> A boolean to indicate the framebuffer is scaled to fill the display, keeping its
+      aspect ratio, instead of being shown in a resizable window.
+    - scale_quality :    :class:`str` --> How SDL scales the framebuffer: 'nearest', 'linear' or 'best', or None to
+      leave it to SDL.
     - screen_bg_color :    :class:`tuple` --> The RGB color value of the background of the screen.
-    - ship_speed :    :class:`float` --> How much to move the ship character per update call.
-    - bullet_speed :    :class:`float` --> How much to move the bullet per update call.
+    - ship_speed :    :class:`float` --> How many pixels per second the ship character moves.
+    - bullet_speed :    :class:`float` --> How many pixels per second a bullet moves.
     - bullet_width :    :class:`int` --> The width of each bullet.
     - bullet_height :    :class:`int` --> The height of each bullet.
     - bullet_color :    :class:`tuple` --> The RGB color value of each bullet.
     - bullets_allowed :    :class:`int` --> The number of bullets allowed on the screen at any given time.
-    - alien_frequency :    :class:`float` --> A number to control how often aliens are generated.
-    - alien_speed :    :class:`float` --> How fast to move an alien across the screen per update call.
+    - alien_frequency :    :class:`float` --> How many aliens are generated per second, on average.
+    - alien_speed :    :class:`float` --> How many pixels per second an alien moves across the screen.
     - alien_speed_factor :    :class:`float` --> A multiplier to cause the aliens to move more quickly.
+    - spawn_mode :    :class:`str` --> How aliens appear: 'classic' rolls for a spawn on every tick, 'waves' follows a
+      precomputed schedule of waves that take turns between bursts, formations and lanes, and 'horde' keeps a few
+      thousand aliens on the screen. A horde costs no lives, so a horde round lasts horde_waves waves instead.
+    - wave_duration :    :class:`float` --> How many seconds each wave spawns aliens for.
+    - wave_pause :    :class:`float` --> How many seconds of quiet follow each wave. Hordes don't pause.
+    - wave_growth :    :class:`float` --> How much the spawn rate grows with each wave, as a fraction of alien_frequency.
+    - wave_speed_step :    :class:`float` --> How much the alien speed grows with each wave, as a fraction of alien_speed.
+      Replaces the speed-up every 5 kills of the classic mode.
+    - wave_burst_size :    :class:`int` --> The average number of aliens in a burst.
+    - wave_lanes :    :class:`int` --> The number of lanes the lane waves stream down.
+    - horde_aliens :    :class:`int` --> The number of aliens a horde keeps on the screen at once.
+    - horde_waves :    :class:`int` --> The number of back-to-back waves, each wave_duration long, a horde round lasts.
     - lives :    :class:`int` --> The number of extra lives the player has before the game ends.
     - score :    :class:`int` --> The number of aliens the player has shot and destroyed.
+    - entity_engine :    :class:`str` --> How aliens and bullets are stored: 'sprite' for pygame sprite groups, or 'numpy'
+      for the vectorized struct-of-arrays store in entities.py (requires NumPy).
+    - star_layers :    :class:`list` --> The parallax layers of the starfield, farthest first, as (speed, density) pairs:
+      how many pixels per second the layer scrolls, and the chance of a star or meteor in each 50x50 cell.
+    - render_mode :    :class:`str` --> How frames are presented: 'full' fills and flips the whole screen every frame,
+      'dirty' only erases and updates the regions that changed. The starfield doesn't scroll in 'dirty' mode, since a
+      moving background would change the whole screen every frame.
+    - collision_mode :    :class:`str` --> How bullets, aliens and the ship are checked for collisions: 'swept' finds
+      everything that touched at any moment of a tick, so nothing can pass through anything however low the tick rate,
+      and 'discrete' only tests where things are at the end of each tick, which needs a high tick rate.
+    - collision_cell_size :    :class:`int` --> The size in pixels of the grid cells aliens are filed under for collision
+      checks.
+    - alien_pool_size :    :class:`int` --> The number of alien sprites allocated up front. The pool grows beyond this
+      when more aliens are alive at once.
+    - particle_capacity :    :class:`int` --> The most particles alive at once, or 0 to turn the particles off. Particles
+      need NumPy, and are left out without it.
+    - particle_budgets :    :class:`dict` --> The most live particles of each effect of particles.EFFECTS, so bursts of
+      hits can't blow the frame time.
+    - text_cache_size :    :class:`int` --> The number of rendered pieces of text kept by the HUD's text cache.
+    - loader_threads :    :class:`int` --> The number of worker threads that load the assets while the loading screen
+      is shown.
+    - simulation_thread :    :class:`bool` --> A boolean to indicate rounds are simulated on a worker thread, which
+      publishes a snapshot after every tick for the render loop to draw, instead of between frames on the main thread.
+    - tick_rate :    :class:`int` --> The number of fixed simulation ticks per second. Gameplay doesn't depend on the
+      frame rate, only on this.
+    - render_rate :    :class:`int` --> The most frames drawn per second, 0 to draw as many as possible, or 'vsync' to
+      draw one frame per display refresh.
+    - profile_path :    :class:`str` --> A .csv or .jsonl file the frame profiler streams every frame to, or None.
+    - record_path :    :class:`str` --> A file the game's input is recorded to for replay.py, or None.
+    - telemetry_path :    :class:`str` --> A file gameplay events are streamed to for telemetry.py, or None.
+    - telemetry_batch :    :class:`int` --> The number of gameplay events handed to the telemetry writer at a time.
+    - resume_path :    :class:`str` --> A file the round being played is saved to every autosave_interval seconds, and
+      resumed from when the game starts again, e.g. after a power cut. None to turn it off.
+    - autosave_interval :    :class:`float` --> How many seconds of play pass between saves to resume_path.
+    - history_size :    :class:`int` --> The number of snapshots of the game kept in memory, which F9 rolls the game back
+      through one at a time. 0 to turn it off.
+    - history_interval :    :class:`float` --> How many seconds of play pass between snapshots.
+    - scores_path :    :class:`str` --> The SQLite database the leaderboard is kept in, or None for assets/scores.db.
+    - leaderboard_size :    :class:`int` --> The number of best scores kept on the leaderboard.
+    - max_frame_time :    :class:`float` --> The most time in seconds the simulation catches up on after a slow frame.
     """
 
     def __init__(self):
@@ -27,23 +84,70 @@ class Settings:
         # Screen settings
         self.screen_width = 1280
         self.screen_height = 720
+        self.fullscreen = False
+        self.scale_quality = None
         self.bg_color = (24, 41, 60)
+        self.star_layers = [(60.0, 0.08), (120.0, 0.06), (240.0, 0.04)]
 
         # Ship settings
-        self.ship_speed = 3.0
+        self.ship_speed = 720.0
 
         # Bullet settings
-        self.bullet_speed = 5.0
+        self.bullet_speed = 1200.0
         self.bullet_width = 15
         self.bullet_height = 3
         self.bullet_color = (255, 255, 255)
         self.bullets_allowed = 3
 
         # Alien settings.
-        self.alien_frequency = 0.004
-        self.alien_speed = 1.5
+        self.alien_frequency = 0.96
+        self.alien_speed = 360.0
         self.alien_speed_factor = 1.0
 
+        # Wave settings
+        self.spawn_mode = 'classic'
+        self.wave_duration = 20.0
+        self.wave_pause = 3.0
+        self.wave_growth = 0.25
+        self.wave_speed_step = 0.05
+        self.wave_burst_size = 4
+        self.wave_lanes = 6
+        self.horde_aliens = 2000
+        self.horde_waves = 6
+
         # Game controls
         self.lives = 3
         self.score = 0
+
+        # Engine settings
+        self.entity_engine = 'sprite'
+        self.collision_mode = 'swept'
+        self.collision_cell_size = 128
+        self.alien_pool_size = 32
+        self.render_mode = 'full'
+        self.text_cache_size = 64
+        self.particle_capacity = 32768
+        self.particle_budgets = {'explosion': 16384, 'impact': 8192, 'trail': 8192}
+        self.loader_threads = 4
+        self.simulation_thread = False
+
+        # Timing settings
+        self.tick_rate = 240
+        self.render_rate = 60
+        self.max_frame_time = 0.25
+
+        # Profiling settings
+        self.profile_path = None
+        self.record_path = None
+        self.telemetry_path = None
+        self.telemetry_batch = 4096
+
+        # Save settings
+        self.resume_path = None
+        self.autosave_interval = 2.0
+        self.history_size = 0
+        self.history_interval = 1.0
+
+        # Score settings
+        self.scores_path = None
+        self.leaderboard_size = 10
@@ -1,8 +1,5 @@
-import pygame
-import os
-
-# Change the current working directory of a Python script to the directory where the script itself is
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
+from assets import assets
+from timestep import interpolate
 
 
 class Ship:
@@ -17,13 +14,16 @@ class Ship:
     - image :    :class:`pygame.surface.Surface` --> The bitmap image of the ship character.
     - rect :    :class:`pygame.rect.Rect` --> The rect object that stores rectangular coordinates of the ship.
     - y :    :class:`float` --> The vertical position of the ship.
+    - previous_y :    :class:`float` --> The vertical position of the ship before the last update, used for drawing
+      between simulation ticks.
     - moving_up :    :class:`bool` --> Flag to determine if the ship is moving up.
     - moving_down :    :class:`bool` --> Flag to determine if the ship is moving down.
 
     Methods:
 
     - update() --> Move the ship up/down depending on the moving_up and moving_down movement flags. Returns None.
-    - blitme() --> Draw the ship to the screen at its current location. Returns None.
+    - interpolated_rect() --> The ship's rect between its previous and current position. Returns a Rect.
+    - blitme() --> Draw the ship to the screen at its current location. Returns the Rect that was drawn on.
     """
 
     def __init__(self, game):
@@ -35,10 +35,10 @@ class Ship:
         self.screen_rect = game.screen.get_rect()
 
         # Load the image and get its rect
-        # Load the bitmap of the spaceship
+        # Use the shared bitmap of the spaceship
         # Image from https://kenney.nl/assets/space-shooter-redux
         # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-        self.image = pygame.image.load(os.path.join(os.getcwd(), 'assets/images/ship2.bmp'))
+        self.image = assets.image('ship2.bmp')
         self.rect = self.image.get_rect()
 
         # Start each new ship at the center left of the screen
@@ -46,28 +46,42 @@ class Ship:
 
         # Store a decimal value for the ship's vertical position
         self.y = float(self.rect.y)
+        self.previous_y = self.y
 
         # Movement flag
         self.moving_up = False
         self.moving_down = False
 
-    def update(self):
+    def update(self, dt):
         """
         Update the ship's position based on movement flags
+        :param dt: The length of the simulation tick in seconds
         :return None:
         """
-        # Update the ship's x value, not the rect
+        self.previous_y = self.y
+        # Update the ship's x value, not the rect. ship_speed is in pixels per second.
         if self.moving_up and self.rect.top > self.screen_rect.top:
-            self.y -= self.settings.ship_speed
+            self.y -= self.settings.ship_speed * dt
         if self.moving_down and self.rect.bottom < self.screen_rect.bottom:
-            self.y += self.settings.ship_speed
+            self.y += self.settings.ship_speed * dt
 
         # Update rect object from self.x
         self.rect.y = self.y
 
-    def blitme(self):
+    def interpolated_rect(self, alpha):
+        """
+        The ship's rect between its position at the previous and the current simulation tick
+        :param alpha: How far between the two ticks, from 0 to 1
+        :return pygame.Rect:
+        """
+        rect = self.rect.copy()
+        rect.y = interpolate(self.previous_y, self.y, alpha)
+        return rect
+
+    def blitme(self, alpha=1.0):
         """
         Draw the ship at its current location
-        :return None:
+        :param alpha: How far between the previous and current simulation tick to draw the ship, from 0 to 1
+        :return pygame.Rect: The area of the screen that was drawn on
         """
-        self.screen.blit(self.image, self.rect)
+        return self.screen.blit(self.image, self.interpolated_rect(alpha))
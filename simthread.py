@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# What the render loop needs to draw a round, as of one simulation tick. The ship is its left and its vertical position
+# at the previous and at this tick. Each entity kind is a tuple of three lists: the horizontal positions at the previous
+# and at this tick, and the tops. Snapshots are never changed once published.
+Snapshot = namedtuple('Snapshot', ('tick', 'time', 'ship', 'bullets', 'aliens', 'lives_images', 'score', 'high_score'))
+
+
+def round_half_away(value):
+    """
+    Round to the nearest integer, halves away from zero, as a Rect does with a float position
+    :param value: The number
+    :return int:
+    """
+    return int(value + 0.5) if value >= 0 else -int(0.5 - value)
+
+
+def ship_position(ship, alpha):
+    """
+    The top left corner to draw a snapshot's ship at, between its previous and current position
+    :param ship: The (left, previous y, y) of a Snapshot
+    :param alpha: How far between the previous and current tick, from 0 to 1
+    :return tuple: (x, y) ints
+    """
+    left, previous, current = ship
+    return left, round_half_away(current if alpha == 1.0 else previous + (current - previous) * alpha)
+
+
+def blend_positions(entities, alpha):
+    """
+    The top left corners to draw a snapshot's entities at, between their previous and current positions
+    :param entities: The (previous xs, xs, tops) of a Snapshot
+    :param alpha: How far between the previous and current tick, from 0 to 1
+    :return list: (x, y) pairs of ints
+    """
+    previous, current, tops = entities
+    if alpha != 1.0:
+        current = [x0 + (x1 - x0) * alpha for x0, x1 in zip(previous, current)]
+    return [(round_half_away(x), y) for x, y in zip(current, tops)]
+
+
+class SnapshotBuffer:
+    """
+    A double buffer of snapshots: the one being drawn from and the one before it. The simulation thread replaces the
+    pair as a whole with a single reference assignment, so the render loop always reads a consistent pair without
+    taking a lock.
+
+    Attributes:
+
+    - pair :    :class:`tuple` --> The previous and the latest snapshot. Either is None until enough are published.
+    - published :    :class:`int` --> The number of snapshots published.
+
+    Methods:
+
+    - publish() --> Make a snapshot the latest. Returns None.
+    - latest() --> The latest snapshot. Returns a Snapshot, or None.
+    - clear() --> Drop both snapshots. Returns None.
+    """
+
+    def __init__(self):
+        """
+        Create an empty buffer
+        """
+        self.pair = (None, None)
+        self.published = 0
+
+    def publish(self, snapshot):
+        """
+        Make a snapshot the latest, keeping the one it replaces as the previous
+        :param snapshot: The new Snapshot
+        :return None:
+        """
+        self.pair = (self.pair[1], snapshot)
+        self.published += 1
+
+    def latest(self):
+        """
+        The latest snapshot
+        :return Snapshot: None if nothing was published since the buffer was cleared
+        """
+        return self.pair[1]
+
+    def clear(self):
+        """
+        Drop both snapshots, e.g. before a new round starts
+        :return None:
+        """
+        self.pair = (None, None)
+
+
+class SimulationThread:
+    """
+    Runs a round's simulation on a worker thread at the fixed tick rate, apart from the render loop. Input reaches it
+    through a deque, whose append() and popleft() are atomic, and is applied between ticks, so a recorded game replays
+    exactly. After every tick a Snapshot of everything drawn during a round is published to a SnapshotBuffer, which the
+    render loop draws from at its own pace. Between rounds the thread parks and the game's state belongs to the render
+    loop again, which restarts the round and calls start_round().
+
+    The Python code of both threads still takes turns on the GIL, but SDL releases it while it blits and flips and NumPy
+    while it crunches the entity arrays, so a heavy scene's drawing overlaps its ticks and a slow flip no longer holds up
+    the simulation.
+
+    Attributes:
+
+    - game :    :class:`myshooter.Game` --> The game being simulated.
+    - buffer :    :class:`simthread.SnapshotBuffer` --> The published snapshots.
+    - inputs :    :class:`collections.deque` --> The pygame events waiting to be applied.
+    - playing :    :class:`threading.Event` --> Set while a round is being simulated.
+    - ticks :    :class:`int` --> The number of ticks simulated, which the render loop reads to count the ticks of a
+      frame.
+    - late_ticks :    :class:`int` --> The number of ticks that started after their time was up.
+
+    Methods:
+
+    - start() --> Start the thread. Returns None.
+    - start_round() --> Start simulating the round the game was just restarted into. Returns None.
+    - send() --> Queue an input event for the simulation. Returns None.
+    - stop() --> Stop the thread and wait for it. Returns None.
+    """
+
+    def __init__(self, game):
+        """
+        Create the thread without starting it
+        :param game: The game to simulate
+        """
+        self.game = game
+        self.buffer = SnapshotBuffer()
+        self.inputs = deque()
+        self.playing = threading.Event()
+        self.ticks = 0
+        self.late_ticks = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+
+    def start(self):
+        """
+        Start the thread, parked until a round starts
+        :return None:
+        """
+        self._thread.start()
+
+    def start_round(self):
+        """
+        Start simulating the round the game was just restarted into. Must be called while the thread is parked.
+        :return None:
+        """
+        # Input meant for the round that ended is stale
+        self.inputs.clear()
+        self.buffer.clear()
+        self.buffer.publish(self._snapshot())
+        self.playing.set()
+
+    def send(self, event):
+        """
+        Queue an input event, to be applied before the next tick
+        :param event: A pygame key or mouse event
+        :return None:
+        """
+        self.inputs.append(event)
+
+    def stop(self):
+        """
+        Stop the thread after the tick it is running and wait for it, so nothing else touches the game afterwards
+        :return None:
+        """
+        self._stopped = True
+        # Wake the thread if it is parked
+        self.playing.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        """
+        Simulate rounds until stop() is called. Runs on the worker thread.
+        :return None:
+        """
+        game = self.game
+        dt = game.dt
+        max_behind = game.settings.max_frame_time
+        while not self._stopped:
+            self.playing.wait()
+            next_tick = time.perf_counter()
+            while self.playing.is_set() and not self._stopped:
+                inputs = self.inputs
+                while inputs:
+                    game._handle_event(inputs.popleft())
+                game.step()
+                self.ticks += 1
+                self.buffer.publish(self._snapshot())
+                if game.game_over:
+                    # Park until the render loop starts the next round
+                    self.playing.clear()
+                    break
+                next_tick += dt
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -max_behind:
+                    # After a stall, carry on from now rather than running a burst of ticks to catch up
+                    self.late_ticks += 1
+                    next_tick = time.perf_counter()
+                else:
+                    self.late_ticks += 1
+
+    def _snapshot(self):
+        """
+        Capture everything drawn during a round as of the current tick
+        :return Snapshot:
+        """
+        game = self.game
+        ship = game.ship
+        if game.array_entities:
+            bullets = self._array_entities(game.bullets)
+            aliens = self._array_entities(game.aliens)
+        else:
+            bullets = self._sprite_entities(game.bullets.sprites())
+            aliens = self._sprite_entities(game.aliens)
+        return Snapshot(game.ticks, time.perf_counter(), (ship.rect.x, ship.previous_y, ship.y), bullets, aliens,
+                        tuple(game.lives_images), game.score, max(game.high_score, game.score))
+
+    @staticmethod
+    def _array_entities(store):
+        """
+        Copy the positions out of an entities.EntityArrays store
+        :param store: The store
+        :return tuple: The previous xs, xs and tops
+        """
+        n = store.count
+        return store.px[:n].tolist(), store.x[:n].tolist(), store.y[:n].astype(int).tolist()
+
+    @staticmethod
+    def _sprite_entities(sprites):
+        """
+        Copy the positions out of Alien or Bullet sprites
+        :param sprites: The sprites
+        :return tuple: The previous xs, xs and tops
+        """
+        sprites = list(sprites)
+        return [sprite.previous_x for sprite in sprites], [sprite.x for sprite in sprites], \
+            [sprite.rect.top for sprite in sprites]
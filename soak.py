@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+"""
+Soak-tests the game loop: an autopilot plays round after round, restarting as soon as a game ends, while the memory
+use, the size of the sprite groups and pools, the busy mixer channels and the frame times are sampled. At the end
+every metric is checked for steady growth and the frame times for drift, so a slow leak shows up in hours instead of
+after days on a cabinet.
+
+Runs under the SDL dummy video and audio drivers unless others are selected, and doesn't wait for the frame cap
+unless --realtime is given, so an hour of play takes a lot less than an hour:
+
+    python soak.py --duration 3600 --output soak.jsonl
+
+Exits with status 1 if anything grew or drifted.
+"""
+
+# Libraries to be imported
+import os
+
+# The dummy drivers must be selected before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from autopilot import PILOTS
+from myshooter import Game
+from profiler import summarize
+from settings import Settings
+
+# Metrics that grow without bound when something leaks, with the smallest growth that counts
+GROWTH_FLOORS = {
+    'rss_mb': 5.0,
+    'traced_mb': 2.0,
+    'gc_objects': 2000,
+    'aliens': 5,
+    'bullets': 2,
+    'pool_aliens': 5,
+    'pool_bullets': 2,
+    'text_cache': 5,
+    'busy_channels': 2,
+}
+
+
+def rss_mb():
+    """
+    The resident set size of this process. Read from /proc where it exists, otherwise the peak size is the best the
+    standard library offers.
+    :return float: Megabytes
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def busy_channels():
+    """
+    The number of mixer channels playing a sound
+    :return int: 0 when the mixer isn't running
+    """
+    if pygame.mixer.get_init() is None:
+        return 0
+    return sum(pygame.mixer.Channel(i).get_busy() for i in range(pygame.mixer.get_num_channels()))
+
+
+class SoakTest:
+    """
+    Plays rounds back to back with an autopilot and samples the game's resource use
+
+    Attributes:
+
+    - game :    :class:`myshooter.Game` --> The game being soaked
+    - pilot :    :class:`object` --> The autopilot, called before every tick
+    - ticks_per_frame :    :class:`int` --> The simulation ticks run per frame, as many as a 60 fps frame would run
+    - realtime :    :class:`bool` --> A boolean to indicate frames wait for the frame cap like run_game() does
+    - samples :    :class:`list` --> The samples taken so far, each a dict
+    - frame_times :    :class:`list` --> The frame times in milliseconds since the last sample
+    - rounds :    :class:`int` --> The number of rounds that ended
+    - frames :    :class:`int` --> The number of frames run
+    - first_snapshot :    :class:`tracemalloc.Snapshot` --> The allocations after the warmup, or None without tracemalloc
+
+    Methods:
+
+    - frame() --> Run one frame of the game loop. Returns None.
+    - sample() --> Record the current resource use. Returns the sample.
+    - run() --> Soak for a number of seconds. Returns None.
+    - findings() --> Check the samples for growth and drift. Returns a list of tuples.
+    - top_growth() --> The source lines whose allocations grew the most since the warmup. Returns a list of str.
+    """
+
+    def __init__(self, seed=0, policy='scripted', realtime=False, spawn_mode=None):
+        """
+        Create the game and the autopilot
+        :param seed: Seed for the game and the autopilot
+        :param policy: The name of the autopilot
+        :param realtime: Wait for the frame cap after every frame
+        :param spawn_mode: How aliens appear, or None for the default of Settings
+        """
+        settings = Settings()
+        if spawn_mode is not None:
+            settings.spawn_mode = spawn_mode
+        self.game = Game(seed=seed, settings=settings)
+        self.game._finish_loading()
+        # The autopilot's scores are not the player's
+        self.game.save_high_score = False
+        self.pilot = PILOTS[policy](seed)
+        self.ticks_per_frame = max(1, round(self.game.settings.tick_rate / 60))
+        self.realtime = realtime
+        self.samples = []
+        self.frame_times = []
+        self.rounds = 0
+        self.frames = 0
+        self.first_snapshot = None
+
+    def frame(self):
+        """
+        Run one frame of the game loop: handle events, restart the round if it ended, run the ticks and draw
+        :return None:
+        """
+        game = self.game
+        start = time.perf_counter()
+        game._check_events()
+        if game.game_over or not game.game_started:
+            if game.game_over:
+                self.rounds += 1
+            game._restart_game_state()
+        for _ in range(self.ticks_per_frame):
+            if game.game_over:
+                break
+            self.pilot(game)
+            game.step()
+        game._update_screen(elapsed=self.ticks_per_frame * game.dt)
+        self.frame_times.append((time.perf_counter() - start) * 1000)
+        self.frames += 1
+        if self.realtime:
+            game.clock.tick(game.frame_cap)
+
+    def sample(self, elapsed):
+        """
+        Record the current resource use along with the frame times since the previous sample
+        :param elapsed: The seconds since the soak started
+        :return dict:
+        """
+        game = self.game
+        pools = game.pool_stats()
+        frames = summarize(self.frame_times) if self.frame_times else {}
+        sample = {
+            'elapsed_s': round(elapsed, 1),
+            'frames': self.frames,
+            'rounds': self.rounds,
+            'rss_mb': round(rss_mb(), 2),
+            'traced_mb': round(tracemalloc.get_traced_memory()[0] / 2 ** 20, 3) if tracemalloc.is_tracing() else None,
+            'gc_objects': len(gc.get_objects()),
+            'aliens': len(game.aliens),
+            'bullets': len(game.bullets),
+            'pool_aliens': pools['aliens']['created'] if pools else None,
+            'pool_bullets': pools['bullets']['created'] if pools else None,
+            'text_cache': len(game.text_cache.surfaces),
+            'busy_channels': busy_channels(),
+            'frame_p50_ms': round(frames['p50_ms'], 4) if frames else None,
+            'frame_p95_ms': round(frames['p95_ms'], 4) if frames else None,
+            'frame_p99_ms': round(frames['p99_ms'], 4) if frames else None,
+        }
+        self.frame_times = []
+        self.samples.append(sample)
+        return sample
+
+    def run(self, duration, interval=10.0, warmup=None, output=None):
+        """
+        Soak for a number of seconds, taking a sample every interval
+        :param duration: The seconds to run for
+        :param interval: The seconds between samples
+        :param warmup: The seconds before the first sample, while the pools fill up and caches warm. None uses a
+        tenth of the duration.
+        :param output: A text file each sample is written to as a JSON line, or None
+        :return None:
+        """
+        warmup = duration / 10 if warmup is None else warmup
+        start = time.perf_counter()
+        next_sample = start + warmup
+        end = start + duration
+        while True:
+            self.frame()
+            now = time.perf_counter()
+            if now < next_sample:
+                continue
+            if self.first_snapshot is None and tracemalloc.is_tracing():
+                self.first_snapshot = self._snapshot()
+            sample = self.sample(now - start)
+            if output is not None:
+                output.write(json.dumps(sample) + '\n')
+                output.flush()
+            print(f"\r{sample['elapsed_s']:.0f}/{duration:.0f} s  rounds {sample['rounds']}  rss {sample['rss_mb']} MB  "
+                  f"frame p95 {sample['frame_p95_ms']} ms", end='', file=sys.stderr)
+            next_sample += interval
+            if now >= end:
+                break
+        print(file=sys.stderr)
+
+    def findings(self, drift=0.15):
+        """
+        Check the samples for metrics that kept growing and frame times that drifted. The samples are split into
+        thirds, and a metric grew if its median went up from each third to the next by more than its floor in total.
+        :param drift: The relative slowdown of the frame time percentiles between the first and last third that counts
+        as drift
+        :return list: One ('GROWTH' or 'DRIFT', message) tuple per finding. Empty if there were too few samples to tell,
+        or nothing was found.
+        """
+        if len(self.samples) < 6:
+            return []
+        third = len(self.samples) // 3
+        parts = (self.samples[:third], self.samples[third:-third], self.samples[-third:])
+
+        def medians(name):
+            values = [sorted(sample[name] for sample in part) for part in parts]
+            return [part[len(part) // 2] for part in values]
+
+        messages = []
+        for name, floor in GROWTH_FLOORS.items():
+            if self.samples[0][name] is None:
+                continue
+            first, middle, last = medians(name)
+            if first < middle < last and last - first > floor:
+                messages.append(('GROWTH', f"{name} grew steadily: {first} -> {middle} -> {last}"))
+        for name in ('frame_p50_ms', 'frame_p95_ms', 'frame_p99_ms'):
+            first, _, last = medians(name)
+            if last > first * (1 + drift):
+                messages.append(('DRIFT', f"{name} drifted: {first:.3f} -> {last:.3f} ms "
+                                          f"(+{(last / first - 1) * 100:.1f}%)"))
+        return messages
+
+    def top_growth(self, limit=10):
+        """
+        The source lines whose allocations grew the most since the warmup
+        :param limit: The number of lines to report
+        :return list: One description per line, or an empty list without tracemalloc
+        """
+        if self.first_snapshot is None:
+            return []
+        stats = self._snapshot().compare_to(self.first_snapshot, 'lineno')
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
+
+    @staticmethod
+    def _snapshot():
+        """
+        Take a tracemalloc snapshot, leaving out the samples the soak test itself keeps
+        :return tracemalloc.Snapshot:
+        """
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, __file__),))
+
+
+# Program Starts Here
+def main():
+    """
+    Run a soak test from the command line. Exits with status 1 if anything grew or drifted.
+    """
+    parser = argparse.ArgumentParser(description="Soak-test the Alien Defense game loop with an autopilot")
+    parser.add_argument('--duration', type=float, default=3600, help="seconds to run for")
+    parser.add_argument('--interval', type=float, default=10, help="seconds between samples")
+    parser.add_argument('--warmup', type=float, default=None, help="seconds before the first sample "
+                                                                   "(default: a tenth of the duration)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the game and the autopilot")
+    parser.add_argument('--policy', choices=list(PILOTS), default='scripted',
+                        help="the autopilot that plays. The scripted pilot dodges and shoots the aliens like a player, "
+                             "so rounds run long and busy. The random pilot loses quickly, so it plays the most rounds.")
+    parser.add_argument('--spawn-mode', choices=('classic', 'waves', 'horde'), default=None,
+                        help="how aliens appear. A horde keeps thousands of aliens on the screen for the whole soak.")
+    parser.add_argument('--realtime', action='store_true', help="wait for the frame cap, like the real game loop")
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help="don't trace allocations, which makes every frame slower")
+    parser.add_argument('--drift', type=float, default=0.15, help="relative frame time slowdown that counts as drift")
+    parser.add_argument('--output', help="write every sample to this file as a JSON line")
+    args = parser.parse_args()
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    soak = SoakTest(args.seed, args.policy, args.realtime, args.spawn_mode)
+    output = open(args.output, 'w') if args.output else None
+    try:
+        soak.run(args.duration, args.interval, args.warmup, output)
+    finally:
+        if output is not None:
+            output.close()
+
+    last = soak.samples[-1]
+    print(f"{last['frames']} frames, {last['rounds']} rounds in {last['elapsed_s']:.0f} s")
+    for line in soak.top_growth():
+        print(f"  {line}")
+    findings = soak.findings(args.drift)
+    for kind, message in findings:
+        print(f"{kind} {message}")
+    if findings:
+        sys.exit(1)
+    print("No growth or drift")
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
@@ -0,0 +1,152 @@
+from random import randint, random
+
+import pygame
+
+from stars import Stars
+
+
+class StarLayer:
+    """
+    One depth layer of the starfield: a screen-sized surface with stars and meteors painted into it once, which scrolls
+    to the left and wraps around. Drawing the layer never takes more than two blits, however many stars it holds.
+
+    Attributes:
+
+    - image :    :class:`pygame.surface.Surface` --> The pre-rendered layer.
+    - speed :    :class:`float` --> How many pixels per second the layer scrolls.
+    - offset :    :class:`float` --> How far the layer has scrolled, kept as a float so slow layers move evenly.
+
+    Methods:
+
+    - update() --> Scroll the layer. Returns None.
+    - draw() --> Draw the layer at its current scroll position. Returns None.
+    """
+
+    def __init__(self, image, speed):
+        """
+        Create a layer from a pre-rendered surface
+        :param image: The surface holding the layer's stars. It must be as wide as the screen.
+        :param speed: How many pixels per second the layer scrolls
+        """
+        self.image = image
+        self.speed = speed
+        self.offset = 0.0
+
+    def update(self, elapsed):
+        """
+        Scroll the layer to the left, wrapping around at its width
+        :param elapsed: The seconds that passed since the last update
+        :return None:
+        """
+        self.offset = (self.offset + self.speed * elapsed) % self.image.get_width()
+
+    def draw(self, surface):
+        """
+        Draw the layer at its current scroll position. The part that scrolled off the left is drawn again on the right.
+        :param surface: The surface to draw on
+        :return None:
+        """
+        width = self.image.get_width()
+        # Round rather than truncate, so the layer steps evenly between whole pixels
+        x = int(self.offset + 0.5) % width
+        surface.blit(self.image, (-x, 0))
+        if x:
+            surface.blit(self.image, (width - x, 0))
+
+
+class Starfield:
+    """
+    The scrolling background: a stack of pre-rendered parallax layers, from the farthest and slowest to the nearest and
+    fastest. The farthest layer is opaque and includes the background color, so drawing it also clears the screen. The
+    nearer layers use the background color as an RLE-accelerated color key, so blitting them only costs as much as the
+    star pixels they hold.
+
+    Attributes:
+
+    - layers :    :class:`list` --> The StarLayer objects, farthest first.
+    - bg_color :    :class:`tuple` --> The RGB color of empty space, used to clear the screen when there are no layers.
+
+    Methods:
+
+    - convert() --> Convert every layer to the display's pixel format. Returns None.
+    - update() --> Scroll every layer. Returns None.
+    - draw() --> Draw every layer. Returns None.
+    """
+
+    def __init__(self, settings, layers=None, convert=True):
+        """
+        Paint the layers described by the settings
+        :param settings: The game settings. Uses the screen size, bg_color and star_layers.
+        :param layers: (speed, density) pairs to use instead of settings.star_layers
+        :param convert: False when painting on a worker thread. The main thread then calls convert() once it is done.
+        """
+        self.layers = []
+        self.bg_color = settings.bg_color
+        for depth, (speed, density) in enumerate(layers if layers is not None else settings.star_layers):
+            # The stars' soft edges are blended against the background color, exactly as if they were drawn on the screen
+            image = pygame.Surface((settings.screen_width, settings.screen_height))
+            image.fill(settings.bg_color)
+            self._paint(image, density, convert)
+            if depth > 0:
+                image.set_colorkey(settings.bg_color, pygame.RLEACCEL)
+            self.layers.append(StarLayer(image, speed))
+        if convert:
+            self.convert()
+
+    def convert(self):
+        """
+        Convert every layer to the display's pixel format, so the per-frame blits don't have to. Must be called on the
+        main thread, and does nothing before the display is opened.
+        :return None:
+        """
+        if pygame.display.get_surface() is None:
+            return
+        for layer in self.layers:
+            layer.image = layer.image.convert()
+
+    @staticmethod
+    def _paint(image, density, convert=True):
+        """
+        Create a grid of stars and meteors on a layer to give a space vibe. Each cell of the grid gets a star or meteor
+        with the given chance. Stars that stick out of one side are painted on the other side too, so the layer wraps
+        around without a seam.
+        :param image: The layer's surface
+        :param density: The chance, between 0 and 1, of a star or meteor in each 50x50 cell
+        :param convert: False on a worker thread, to paint the stars without converting their images
+        :return None:
+        """
+        width, height = image.get_size()
+        grid_rows = height // 50
+        grid_cols = width // 50
+        for row in range(grid_rows):
+            for col in range(grid_cols):
+                if random() < density:
+                    # randint provides a bit of randomness to give a more realistic look
+                    x = col * (width // grid_cols) + randint(-20, 20)
+                    y = row * (height // grid_rows) + randint(-20, 20)
+                    star = Stars(x, y, randint(0, 100), convert)
+                    image.blit(star.image, star.rect)
+                    if star.rect.left < 0:
+                        image.blit(star.image, star.rect.move(width, 0))
+                    elif star.rect.right > width:
+                        image.blit(star.image, star.rect.move(-width, 0))
+
+    def update(self, elapsed):
+        """
+        Scroll every layer
+        :param elapsed: The seconds that passed since the last update
+        :return None:
+        """
+        for layer in self.layers:
+            layer.update(elapsed)
+
+    def draw(self, surface):
+        """
+        Draw every layer, farthest first
+        :param surface: The surface to draw on
+        :return None:
+        """
+        if not self.layers:
+            surface.fill(self.bg_color)
+        for layer in self.layers:
+            layer.draw(surface)
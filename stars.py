@@ -1,65 +1,41 @@
-import os
-from random import randint
-
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets
+
 
 class Stars(Sprite):
     """
-    A class to represent a star.
+    A class to represent a star. Stars are no longer moved one by one: they are painted into the pre-rendered layers of
+    a starfield.Starfield, which scrolls as a whole.
 
     Attributes:
 
-    - star :    :class:`pygame.surface.Surface` --> Stores a bitmap image of a star
-    - small_meteor :    :class:`pygame.surface.Surface` --> Stores a bitmap image of a small meteor
-    - medium_meteor :    :class:`pygame.surface.Surface` --> Stores a bitmap image of a medium meteor
-    - image :    :class:`pygame.surface.Surface` --> Stores a bitmap image of a star/meteor
+    - image :    :class:`pygame.surface.Surface` --> Stores the shared bitmap image of a star/meteor
     - rect :    :class:`pygame.rect.Rect` --> The rect object that stores rectangular coordinates of the star/meteor
-
-    Methods:
-
-    - update() --> Move the stars/meteors across the screen and redraw them at the right when they go off-screen.
-    Returns None.
     """
 
-    def __init__(self, x, y, random_num):
+    def __init__(self, x, y, random_num, convert=True):
         """
         Initialize a Star/meteor
         :param x: The x coordinate the star or meteor will be located at
         :param y: The y coordinate the star or meteor will be located at
         :param random_num: A random int between 0-100
+        :param convert: False on a worker thread, to leave the image in its file's pixel format
         """
         # Call the constructor of the inherited Sprite class
         super().__init__()
-        # Load the image of the star and meteors
+        # Pick the shared image of a star or meteor. Only the chosen image is looked up.
         # Image from https://kenney.nl/assets/space-shooter-redux
         # Licensing: https://creativecommons.org/publicdomain/zero/1.0/
-        self.star = pygame.image.load(os.path.join(os.getcwd(), 'assets/images/star.bmp'))
-        self.small_meteor = pygame.image.load(os.path.join(os.getcwd(), 'assets/images/meteor_small.bmp'))
-        self.medium_meteor = pygame.image.load(os.path.join(os.getcwd(), 'assets/images/meteor_medium.bmp'))
-
         # 80% chance for a star
         if random_num >= 20:
-            self.image = self.star
+            self.image = assets.image('star.bmp', convert)
         # 10% chance for a medium meteor
         elif random_num >= 10:
-            self.image = self.medium_meteor
+            self.image = assets.image('meteor_medium.bmp', convert)
         # 10% chance for a small meteor
         else:
-            self.image = self.small_meteor
+            self.image = assets.image('meteor_small.bmp', convert)
 
         # Store the rect of the image and set its position based on the x,y passed to the constructor
         self.rect = self.image.get_rect(topleft=(x, y))
-
-    def update(self):
-        """
-        Move the stars and meteors across the screen and redraw them at the right when they go off-screen
-        :return None:
-        """
-        self.rect.x -= .51
-        # When a star or meteor goes off the screen, redraw it somewhere between 25 pixels away from the side of the
-        # screen and the side of the screen. These two values gave me the best results for creating a constant flow of
-        # drop.
-        if self.rect.x < 0:
-            self.rect.x = randint(1280, 1305)
\ No newline at end of file
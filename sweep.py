@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Sweeps grids of difficulty settings by simulating headless games with an autopilot, spread over a process pool. Every
+combination of the given values is played by every pilot, and each configuration becomes one CSV row with its survival
+time, score distribution and simulation speed.
+
+    python sweep.py --alien-frequency 0.5 1 2 --alien-speed 240 360 480 --lives 1 3 --games 20 --output sweep.csv
+
+Settings that aren't given keep their default value.
+"""
+
+# Libraries to be imported
+import os
+
+# Each worker process imports pygame, so keep its greeting out of the report
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from autopilot import PILOTS
+from myshooter import Game
+from profiler import percentile
+from settings import Settings
+
+# The settings that can be swept, with the type of their values
+PARAMETERS = {
+    'alien_frequency': float,
+    'alien_speed': float,
+    'alien_speed_factor': float,
+    'bullet_speed': float,
+    'bullets_allowed': int,
+    'lives': int,
+    'spawn_mode': str,
+    'tick_rate': int,
+    'collision_mode': str,
+}
+
+# The values the settings that are one of a few modes can take
+CHOICES = {
+    'spawn_mode': ('classic', 'waves', 'horde'),
+    'collision_mode': ('swept', 'discrete'),
+}
+
+# The columns of the report, after the swept settings
+COLUMNS = ('policy', 'games', 'timeouts', 'survival_mean_s', 'survival_p50_s', 'survival_min_s', 'survival_max_s',
+           'score_mean', 'score_p10', 'score_p50', 'score_p90', 'score_max', 'ticks', 'seconds', 'ticks_per_second')
+
+
+def run_configuration(task):
+    """
+    Play a number of games with one configuration and one pilot, and summarize them. Runs in a worker process.
+    :param task: A (values, policy, seeds, max_ticks, entity_engine) tuple. values maps setting names to their values.
+    :return dict: One row of the report
+    """
+    values, policy, seeds, max_ticks, entity_engine = task
+    settings = Settings()
+    settings.entity_engine = entity_engine
+    for name, value in values.items():
+        setattr(settings, name, value)
+
+    survival = []
+    scores = []
+    timeouts = 0
+    ticks = 0
+    start = time.perf_counter()
+    for seed in seeds:
+        # A fresh game per seed, so every game only depends on its own seed
+        game = Game(headless=True, seed=seed, settings=settings)
+        played = game.simulate(max_ticks=max_ticks, policy=PILOTS[policy](seed))
+        survival.append(played * game.dt)
+        scores.append(game.score)
+        timeouts += not game.game_over
+        ticks += played
+    seconds = time.perf_counter() - start
+
+    survival.sort()
+    scores.sort()
+    row = dict(values)
+    row.update({
+        'policy': policy,
+        'games': len(seeds),
+        'timeouts': timeouts,
+        'survival_mean_s': round(sum(survival) / len(survival), 3),
+        'survival_p50_s': round(percentile(survival, 50), 3),
+        'survival_min_s': round(survival[0], 3),
+        'survival_max_s': round(survival[-1], 3),
+        'score_mean': round(sum(scores) / len(scores), 2),
+        'score_p10': round(percentile(scores, 10), 2),
+        'score_p50': round(percentile(scores, 50), 2),
+        'score_p90': round(percentile(scores, 90), 2),
+        'score_max': scores[-1],
+        'ticks': ticks,
+        'seconds': round(seconds, 3),
+        'ticks_per_second': round(ticks / seconds) if seconds else 0,
+    })
+    return row
+
+
+def build_tasks(grid, policies, games, seed=0, max_ticks=None, entity_engine='sprite'):
+    """
+    Build one task per combination of the grid's values and pilot
+    :param grid: Setting names mapped to the lists of values to sweep
+    :param policies: The names of the pilots to play with
+    :param games: The number of games per configuration
+    :param seed: The seed of the first game. Every configuration plays the same seeds, so they face the same spawns.
+    :param max_ticks: Stop each game after this many ticks. None plays until game over.
+    :param entity_engine: How aliens and bullets are stored
+    :return list: The tasks for run_configuration()
+    """
+    names = list(grid)
+    seeds = list(range(seed, seed + games))
+    return [(dict(zip(names, combination)), policy, seeds, max_ticks, entity_engine)
+            for combination in itertools.product(*grid.values())
+            for policy in policies]
+
+
+def run_sweep(tasks, workers=None):
+    """
+    Run the tasks on a pool of worker processes
+    :param tasks: The tasks from build_tasks()
+    :param workers: The number of worker processes. None uses one per CPU.
+    :return list: The rows of the report, in the order of the tasks
+    """
+    workers = workers or os.cpu_count()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Hand out several configurations at a time, so short games don't spend their time waiting on the pool
+        chunksize = max(1, len(tasks) // (workers * 8))
+        for row in executor.map(run_configuration, tasks, chunksize=chunksize):
+            rows.append(row)
+            print(f"\r{len(rows)}/{len(tasks)} configurations", end='', file=sys.stderr)
+    print(file=sys.stderr)
+    return rows
+
+
+def write_report(rows, names, file):
+    """
+    Write the rows of the report as CSV
+    :param rows: The rows from run_sweep()
+    :param names: The names of the swept settings, which come first
+    :param file: A text file to write to
+    :return None:
+    """
+    writer = csv.DictWriter(file, fieldnames=list(names) + list(COLUMNS))
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+# Program Starts Here
+def main():
+    """
+    Run a sweep from the command line and write the report
+    """
+    parser = argparse.ArgumentParser(description="Sweep Alien Defense difficulty settings with simulated games")
+    for name, kind in PARAMETERS.items():
+        # Modes are checked here, so a typo fails before a whole sweep is played with it
+        parser.add_argument('--' + name.replace('_', '-'), type=kind, nargs='+', choices=CHOICES.get(name),
+                            metavar='VALUE', help=f"values of {name} to sweep (default: {getattr(Settings(), name)})")
+    parser.add_argument('--policy', nargs='+', choices=list(PILOTS), default=['scripted'],
+                        help="the autopilots that play each configuration")
+    parser.add_argument('--games', type=int, default=10, help="games per configuration and pilot")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game of each configuration")
+    parser.add_argument('--max-ticks', type=int, default=240 * 600,
+                        help="stop a game after this many ticks, so a pilot that can't lose doesn't run forever")
+    parser.add_argument('--entity-engine', choices=('sprite', 'numpy'), default='sprite',
+                        help="how aliens and bullets are stored")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--output', help="write the CSV report to this file instead of standard output")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) or [getattr(Settings(), name)] for name in PARAMETERS}
+    tasks = build_tasks(grid, args.policy, args.games, args.seed, args.max_ticks, args.entity_engine)
+    start = time.perf_counter()
+    rows = run_sweep(tasks, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(tasks)} configurations, {sum(row['ticks'] for row in rows)} ticks in {elapsed:.1f} s",
+          file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write_report(rows, grid, file)
+    else:
+        write_report(rows, grid, sys.stdout)
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+"""
+Streams gameplay events to a compact columnar file and reads them back. The game records every shot, hit, lost life,
+speed-up and game over into fixed-size arrays, one per column, without touching the disk. Each full batch is handed to
+a background writer thread that compresses every column on its own and appends it to the file.
+
+    python myshooter.py --telemetry session.telemetry
+    python telemetry.py session.telemetry other.telemetry
+
+A file starts with the magic bytes, a version and a JSON header with the seed, the difficulty profile and the columns.
+Then each block holds the number of events, followed by every column's values, zlib compressed, each behind its
+compressed length. A crash can only lose the events that weren't handed to the writer yet, and a block cut short is
+skipped by the reader.
+"""
+
+# Libraries to be imported
+import argparse
+import atexit
+import json
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+from scores import settings_profile
+
+MAGIC = b'ADTL'
+VERSION = 1
+
+# Event kinds
+SHOT = 0
+HIT = 1
+LIFE_LOST = 2
+SPEED_CHANGE = 3
+GAME_OVER = 4
+
+KINDS = {'shot': SHOT, 'hit': HIT, 'life_lost': LIFE_LOST, 'speed_change': SPEED_CHANGE, 'game_over': GAME_OVER}
+
+# What the value column holds for each kind of event
+VALUES = {
+    'shot': "bullets on the screen after the shot",
+    'hit': "bullets that hit an alien on the tick",
+    'life_lost': "1 if an alien got past the left edge, 0 if it ran into the ship",
+    'speed_change': "the new alien speed factor",
+    'game_over': "1 if the score is a new high score",
+}
+
+# The columns of every event, with their array typecodes
+COLUMNS = (('tick', 'q'), ('kind', 'B'), ('value', 'f'), ('score', 'i'), ('lives', 'i'), ('ship_y', 'i'))
+
+# What cost a life, stored as the value of a life_lost event
+SHIP = 0
+EDGE = 1
+
+
+class TelemetryWriter:
+    """
+    Records gameplay events into preallocated column arrays and writes them out in batches on a background thread.
+    Recording an event only stores six numbers. When the arrays are full their contents are copied out in one go and
+    queued for the writer, and recording starts over from the front. If the writer falls so far behind that
+    max_pending batches are waiting, new batches are dropped and counted rather than making the game wait.
+
+    Attributes:
+
+    - path :    :class:`str` --> The file being written.
+    - batch_size :    :class:`int` --> The number of events in each batch.
+    - columns :    :class:`list` --> One array.array per column of COLUMNS, batch_size long.
+    - count :    :class:`int` --> The number of events recorded into the current batch.
+    - recorded :    :class:`int` --> The number of events recorded in total.
+    - dropped :    :class:`int` --> The number of events dropped because the writer fell behind.
+
+    Methods:
+
+    - record() --> Record an event. Returns None.
+    - flush() --> Hand the events recorded so far to the writer. Returns None.
+    - close() --> Write the remaining events and stop the writer thread. Returns None.
+    """
+
+    def __init__(self, path, seed, settings, batch_size=4096, max_pending=16):
+        """
+        Start the writer thread, which creates the file and writes its header
+        :param path: The file to write
+        :param seed: The seed of the game's random number generator
+        :param settings: The game's Settings
+        :param batch_size: The number of events in each batch
+        :param max_pending: The most batches waiting for the writer before new ones are dropped
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = [array(typecode, bytes(array(typecode).itemsize * batch_size)) for _, typecode in COLUMNS]
+        self.count = 0
+        self.recorded = 0
+        self.dropped = 0
+        header = {
+            'seed': seed,
+            'started_at': time.time(),
+            'profile': json.loads(settings_profile(settings)),
+            'entity_engine': settings.entity_engine,
+            'byteorder': sys.byteorder,
+            'columns': COLUMNS,
+            'kinds': KINDS,
+        }
+        self._queue = queue.Queue(max_pending)
+        self._writer = threading.Thread(target=self._write, args=(header,), name='telemetry-writer', daemon=True)
+        self._writer.start()
+        # The game quits with sys.exit(), so make sure the last events reach the file
+        atexit.register(self.close)
+
+    def record(self, tick, kind, value, score, lives, ship_y):
+        """
+        Record an event, handing the batch to the writer once it is full
+        :param tick: The simulation tick the event happened on
+        :param kind: One of the event kinds, e.g. SHOT
+        :param value: The event's value, see VALUES
+        :param score: The score after the event
+        :param lives: The lives left after the event
+        :param ship_y: The vertical center of the ship
+        :return None:
+        """
+        i = self.count
+        tick_column, kind_column, value_column, score_column, lives_column, ship_column = self.columns
+        tick_column[i] = tick
+        kind_column[i] = kind
+        value_column[i] = value
+        score_column[i] = score
+        lives_column[i] = lives
+        ship_column[i] = ship_y
+        self.count = i + 1
+        self.recorded += 1
+        if self.count == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Copy the events recorded so far out of the arrays and queue them for the writer
+        :return None:
+        """
+        count = self.count
+        if not count or self._writer is None:
+            return
+        # A memoryview slice is copied only once, by tobytes()
+        batch = (count, [memoryview(column)[:count].tobytes() for column in self.columns])
+        self.count = 0
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += count
+
+    def close(self):
+        """
+        Write the remaining events and stop the writer thread. Does nothing if it is already closed.
+        :return None:
+        """
+        if self._writer is None:
+            return
+        self.flush()
+        # The end marker has to get through even when the queue is full
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _write(self, header):
+        """
+        Create the file and append each queued batch as a block until close() is called. Runs on the writer thread.
+        :param header: The file header
+        :return None:
+        """
+        encoded = json.dumps(header, separators=(',', ':')).encode()
+        with open(self.path, 'wb') as file:
+            file.write(MAGIC + struct.pack('<BI', VERSION, len(encoded)) + encoded)
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                count, columns = batch
+                # zlib releases the GIL while it compresses, so this doesn't hold up the frame loop
+                block = [struct.pack('<I', count)]
+                for data in columns:
+                    compressed = zlib.compress(data, 6)
+                    block.append(struct.pack('<I', len(compressed)))
+                    block.append(compressed)
+                file.write(b''.join(block))
+                file.flush()
+
+
+def load(path):
+    """
+    Read a telemetry file into NumPy arrays
+    :param path: The file to read
+    :return tuple: The file's header as a dict, and a dict of column name -> numpy.ndarray
+    """
+    import numpy as np
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a telemetry file")
+    version, length = struct.unpack_from('<BI', data, 4)
+    if version != VERSION:
+        raise ValueError(f"{path} has version {version}, expected {VERSION}")
+    offset = 9 + length
+    header = json.loads(data[9:offset])
+    order = '<' if header['byteorder'] == 'little' else '>'
+    dtypes = [np.dtype(typecode).newbyteorder(order) for _, typecode in header['columns']]
+    chunks = [[] for _ in dtypes]
+    while offset + 4 <= len(data):
+        count, = struct.unpack_from('<I', data, offset)
+        position = offset + 4
+        block = []
+        try:
+            for dtype in dtypes:
+                size, = struct.unpack_from('<I', data, position)
+                position += 4
+                values = np.frombuffer(zlib.decompress(data[position:position + size]), dtype=dtype)
+                position += size
+                if len(values) != count:
+                    raise ValueError("short column")
+                block.append(values)
+        except (struct.error, zlib.error, ValueError):
+            # The game stopped while this block was being written
+            break
+        for chunk, values in zip(chunks, block):
+            chunk.append(values)
+        offset = position
+    columns = {name: np.concatenate(chunk) if chunk else np.zeros(0, dtype=dtype)
+               for (name, _), chunk, dtype in zip(header['columns'], chunks, dtypes)}
+    return header, columns
+
+
+def load_sessions(paths):
+    """
+    Read several telemetry files into one set of NumPy arrays, with a session column telling them apart
+    :param paths: The files to read
+    :return tuple: A list of the files' headers, and a dict of column name -> numpy.ndarray. The session column holds
+    the index of the file each event came from.
+    """
+    import numpy as np
+
+    headers = []
+    sessions = []
+    for index, path in enumerate(paths):
+        header, columns = load(path)
+        headers.append(header)
+        columns['session'] = np.full(len(columns['tick']), index, dtype=np.int32)
+        sessions.append(columns)
+    if not sessions:
+        return headers, {}
+    return headers, {name: np.concatenate([columns[name] for columns in sessions]) for name in sessions[0]}
+
+
+# Program Starts Here
+def main():
+    """
+    Summarize telemetry files from the command line
+    """
+    parser = argparse.ArgumentParser(description="Summarize Alien Defense telemetry files")
+    parser.add_argument('paths', nargs='+', help="the telemetry files")
+    args = parser.parse_args()
+
+    headers, columns = load_sessions(args.paths)
+    kinds = columns['kind']
+    print(f"{len(headers)} sessions, {len(kinds)} events")
+    for name, kind in KINDS.items():
+        print(f"  {name:>12}: {int((kinds == kind).sum())}")
+    shots = int((kinds == SHOT).sum())
+    if shots:
+        hits = float(columns['value'][kinds == HIT].sum())
+        print(f"accuracy: {hits / shots:.1%}")
+    lost = columns['value'][kinds == LIFE_LOST]
+    if len(lost):
+        print(f"lives lost to the left edge: {int((lost == EDGE).sum())}, to the ship: {int((lost == SHIP).sum())}")
+
+
+# ===============================
+# No extra Code beyond this point
+if __name__ == '__main__':
+    main()
+# EOF #
@@ -0,0 +1,126 @@
+from random import Random
+
+import pygame
+import pytest
+
+from broadphase import SpatialGroup, groupcollide, spritecollide, swept_colliderect
+
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, x, y, width, height):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, width, height)
+
+
+class MovingBox(Box):
+    def __init__(self, x, y, width, height, dx, dy):
+        super().__init__(x + dx, y + dy, width, height)
+        self.start = pygame.Rect(x, y, width, height)
+
+    def interpolated_rect(self, alpha):
+        return self.start if alpha == 0.0 else self.rect
+
+
+def scatter(rng, count, width, height, size=(1280, 720)):
+    return [Box(rng.randint(-width, size[0]), rng.randint(-height, size[1]), width, height) for _ in range(count)]
+
+
+def pair(rng, count, cell_size):
+    """The same seeded scene twice: once in a SpatialGroup, once in a plain pygame Group"""
+    aliens = scatter(rng, count, 60, 48)
+    return SpatialGroup(*aliens, cell_size=cell_size), pygame.sprite.Group(*aliens), aliens
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('cell_size', [16, 128, 1024])
+def test_spritecollide_matches_pygame(seed, cell_size):
+    rng = Random(seed)
+    grid, plain, _ = pair(rng, 400, cell_size)
+    for probe in scatter(rng, 200, 15, 3) + scatter(rng, 20, 300, 200):
+        expected = pygame.sprite.spritecollide(probe, plain, False)
+        assert set(spritecollide(probe, grid, False)) == set(expected)
+        assert set(grid.spritecollide(probe, False)) == set(expected)
+
+
+def by_rect(crashed):
+    """groupcollide results of two copies of a scene, made comparable"""
+    return {tuple(sprite.rect): sorted(tuple(other.rect) for other in hit) for sprite, hit in crashed.items()}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_groupcollide_matches_pygame(seed):
+    rng = Random(seed)
+    bullets = scatter(rng, 300, 15, 3)
+    aliens = scatter(rng, 400, 60, 48)
+    expected = pygame.sprite.groupcollide(pygame.sprite.Group(*bullets), pygame.sprite.Group(*aliens), True, True)
+    # groupcollide kills sprites, so the grid gets fresh copies of the same scene
+    rng = Random(seed)
+    bullets = scatter(rng, 300, 15, 3)
+    aliens = scatter(rng, 400, 60, 48)
+    grid = SpatialGroup(*aliens)
+    crashed = groupcollide(pygame.sprite.Group(*bullets), grid, True, True)
+    assert by_rect(crashed) == by_rect(expected)
+    assert len(grid) == 400 - sum(len(hit) for hit in expected.values())
+
+
+def test_moved_sprites_are_refiled():
+    rng = Random(7)
+    grid, plain, aliens = pair(rng, 200, 64)
+    for alien in aliens:
+        alien.rect.move_ip(rng.randint(-300, 300), rng.randint(-300, 300))
+    grid.refresh()
+    for probe in scatter(rng, 200, 40, 40):
+        assert set(grid.spritecollide(probe, False)) == set(pygame.sprite.spritecollide(probe, plain, False))
+
+
+def test_killed_sprites_leave_the_grid():
+    rng = Random(3)
+    grid, _, aliens = pair(rng, 100, 64)
+    for alien in aliens[::2]:
+        alien.kill()
+    assert len(grid.spans) == len(grid) == 50
+    assert {sprite for cell in grid.cells.values() for sprite in cell} == set(aliens[1::2])
+
+
+def moving(rng, count, width, height, reach):
+    return [MovingBox(rng.randint(-width, 1280), rng.randint(-height, 720), width, height,
+                      rng.randint(-reach, reach), rng.randint(-reach // 4, reach // 4)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_swept_matches_colliderect_for_still_rects(seed):
+    rng = Random(seed)
+    for a, b in zip(scatter(rng, 500, 60, 48), scatter(rng, 500, 60, 48)):
+        assert swept_colliderect(a.rect, a.rect, b.rect, b.rect) == a.rect.colliderect(b.rect)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_swept_finds_every_collision_at_the_end_of_the_tick(seed):
+    rng = Random(seed)
+    for a, b in zip(moving(rng, 2000, 15, 3, 40), moving(rng, 2000, 60, 48, 40)):
+        if a.rect.colliderect(b.rect):
+            assert swept_colliderect(a.start, a.rect, b.start, b.rect)
+
+
+def test_swept_catches_a_bullet_passing_through_an_alien():
+    # At 15 ticks per second a 1200 px/s bullet jumps 80 px, clean past a 30 px wide alien coming the other way
+    bullet = MovingBox(100, 200, 15, 3, 80, 0)
+    alien = MovingBox(150, 180, 30, 48, -12, 0)
+    assert not bullet.start.colliderect(alien.start) and not bullet.rect.colliderect(alien.rect)
+    assert swept_colliderect(bullet.start, bullet.rect, alien.start, alien.rect)
+    # Passing above it is still a miss
+    assert not swept_colliderect(bullet.start.move(0, -30), bullet.rect.move(0, -30), alien.start, alien.rect)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_swept_grid_search_matches_brute_force(seed):
+    rng = Random(seed)
+    aliens = moving(rng, 400, 60, 48, 40)
+    grid = SpatialGroup(*aliens, cell_size=64)
+    plain = pygame.sprite.Group(*aliens)
+    reach = 41
+    for bullet in moving(rng, 300, 15, 3, 40):
+        expected = {alien for alien in aliens
+                    if swept_colliderect(bullet.start, bullet.rect, alien.start, alien.rect)}
+        assert set(spritecollide(bullet, grid, False, reach)) == expected
+        assert set(spritecollide(bullet, plain, False, reach)) == expected
@@ -0,0 +1,38 @@
+import os
+
+# Headless games never open a window, but keep SDL off the real drivers all the same
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from autopilot import ScriptedPilot
+from myshooter import Game
+from settings import Settings
+
+
+def play(seed, max_ticks, **overrides):
+    settings = Settings()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    game = Game(headless=True, seed=seed, settings=settings)
+    game.save_high_score = False
+    ticks = game.simulate(max_ticks=max_ticks, policy=ScriptedPilot(seed))
+    return ticks, game.score, game.lives, game.game_over, len(game.aliens), len(game.bullets), game.rng.random()
+
+
+@pytest.mark.parametrize('spawn_mode, max_ticks', [('classic', 240 * 60), ('waves', 240 * 60), ('horde', 240 * 5)])
+@pytest.mark.parametrize('collision_mode', ['swept', 'discrete'])
+@pytest.mark.parametrize('seed', [1, 4])
+def test_engines_play_the_same_game(spawn_mode, max_ticks, collision_mode, seed):
+    # The game's generator is drawn from last, so it must have been drawn from the same number of times too
+    sprite = play(seed, max_ticks, spawn_mode=spawn_mode, collision_mode=collision_mode, entity_engine='sprite')
+    numpy = play(seed, max_ticks, spawn_mode=spawn_mode, collision_mode=collision_mode, entity_engine='numpy')
+    assert sprite == numpy
+
+
+def test_engines_play_the_same_game_at_a_low_tick_rate():
+    settings = {'tick_rate': 30, 'collision_mode': 'swept', 'spawn_mode': 'waves'}
+    assert play(2, 30 * 60, entity_engine='sprite', **settings) == play(2, 30 * 60, entity_engine='numpy', **settings)
@@ -0,0 +1,23 @@
+import io
+
+import pytest
+
+from replay import read_varint, write_varint
+
+
+@pytest.mark.parametrize('value', [0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 2 ** 32 - 1, 2 ** 63 - 1, 2 ** 64])
+def test_varint_round_trip(value):
+    file = io.BytesIO()
+    write_varint(file, value)
+    data = file.getvalue()
+    # 7 bits per byte, and 0 still takes a byte
+    assert len(data) == max(1, -(-value.bit_length() // 7))
+    assert read_varint(data + b'\xff', 0) == (value, len(data))
+
+
+@pytest.mark.parametrize('value', [-1, -2, -0x80, -2 ** 63])
+def test_varint_rejects_negative_values(value):
+    file = io.BytesIO()
+    with pytest.raises(ValueError):
+        write_varint(file, value)
+    assert file.getvalue() == b''
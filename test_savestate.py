@@ -0,0 +1,126 @@
+import importlib.util
+import os
+
+# Headless games never open a window, but keep SDL off the real drivers all the same
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pytest
+
+from autopilot import ScriptedPilot
+from myshooter import Game
+from savestate import Autosaver, SavedGame, SnapshotRing, capture, restore, save, unpack
+from settings import Settings
+
+ENGINES = ['sprite', pytest.param('numpy', marks=pytest.mark.skipif(importlib.util.find_spec('numpy') is None,
+                                                                  reason="needs NumPy"))]
+
+
+def new_game(seed, entity_engine='sprite', **overrides):
+    settings = Settings()
+    settings.entity_engine = entity_engine
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    game = Game(headless=True, seed=seed, settings=settings)
+    game.save_high_score = False
+    return game
+
+
+def start(game):
+    game._restart_game_state()
+    return game
+
+
+def play(game, pilot, ticks):
+    """Play on and trace every tick, so two games can be compared tick for tick"""
+    trace = []
+    for _ in range(ticks):
+        if game.game_over:
+            break
+        pilot(game)
+        game.step()
+        trace.append((game.ticks, game.score, game.lives, len(game.aliens), len(game.bullets)))
+    return trace
+
+
+@pytest.mark.parametrize('spawn_mode', ['classic', 'waves', 'horde'])
+@pytest.mark.parametrize('saved_with', ENGINES)
+@pytest.mark.parametrize('restored_into', ENGINES)
+def test_a_restored_game_plays_on_exactly(spawn_mode, saved_with, restored_into):
+    original = start(new_game(3, saved_with, spawn_mode=spawn_mode))
+    # The scripted pilot only looks at the game, so each game can have its own
+    pilot = ScriptedPilot(3)
+    play(original, pilot, 240 * 8)
+    state = capture(original)
+
+    copy = start(new_game(99, restored_into, spawn_mode=spawn_mode))
+    restore(copy, state)
+    assert capture(copy) == state
+    assert play(copy, ScriptedPilot(3), 240 * 8) == play(original, pilot, 240 * 8)
+    assert capture(copy) == capture(original)
+
+
+def test_a_state_reads_back():
+    game = start(new_game(5, spawn_mode='waves'))
+    play(game, ScriptedPilot(5), 240 * 10)
+    fields = unpack(capture(game))
+    assert (fields['ticks'], fields['score'], fields['lives']) == (game.ticks, game.score, game.lives)
+    assert len(fields['aliens']['x']) == len(game.aliens)
+    assert fields['wave'][0] == game.director.wave
+    with pytest.raises(ValueError):
+        unpack(capture(game) + b'\0')
+
+
+def test_a_state_file_resumes_in_the_other_engine(tmp_path):
+    pytest.importorskip('numpy')
+    path = str(tmp_path / 'round.state')
+    game = start(new_game(8, spawn_mode='waves'))
+    play(game, ScriptedPilot(8), 240 * 5)
+    save(game, path)
+
+    saved = SavedGame.load(path)
+    assert saved.seed == 8
+    other = new_game(1, 'numpy', render_mode='dirty', history_size=4)
+    other.settings.spawn_mode = 'waves'
+    assert saved.matches(other.settings)
+    other.settings.alien_speed += 1
+    assert not saved.matches(other.settings)
+
+    resumed = new_game(1, 'numpy', spawn_mode='waves')
+    saved.restore(resumed)
+    assert resumed.seed == 8
+    assert capture(resumed) == capture(game)
+
+
+def test_the_ring_rolls_back():
+    game = start(new_game(2, spawn_mode='waves'))
+    ring = SnapshotRing(3)
+    pilot = ScriptedPilot(2)
+    states = []
+    for _ in range(5):
+        play(game, pilot, 240)
+        ring.push(game)
+        states.append(capture(game))
+    assert len(ring) == 3
+    assert ring.rewind(game) == unpack(states[-1])['ticks']
+    assert capture(game) == states[-1]
+    ring.rewind(game, steps=2)
+    assert capture(game) == states[-3]
+    assert ring.rewind(game) is None
+
+
+def test_the_autosaver_keeps_the_latest_state(tmp_path):
+    path = str(tmp_path / 'round.state')
+    game = start(new_game(6, spawn_mode='waves'))
+    autosaver = Autosaver(path)
+    pilot = ScriptedPilot(6)
+    for _ in range(5):
+        play(game, pilot, 60)
+        autosaver.save(game)
+    autosaver.close()
+    assert SavedGame.load(path).state == capture(game)
+
+    autosaver = Autosaver(path)
+    autosaver.discard()
+    autosaver.close()
+    assert not os.path.exists(path)
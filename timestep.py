@@ -0,0 +1,86 @@
+import time
+
+
+def interpolate(previous, current, alpha):
+    """
+    Blend between an entity's position at the previous simulation tick and at the current one
+    :param previous: The position at the previous tick
+    :param current: The position at the current tick
+    :param alpha: How far between the two ticks to draw, from 0 (previous) to 1 (current)
+    :return float: The position to draw at. With an alpha of 1 this is exactly the current position.
+    """
+    if alpha == 1.0:
+        return current
+    return previous + (current - previous) * alpha
+
+
+class FixedTimestep:
+    """
+    Decouples the simulation from the frame rate. Real time that passes between frames is collected in an accumulator
+    and spent in fixed ticks of dt seconds, so the game plays at the same speed whether it is drawn at 30, 60 or 500
+    frames per second. The time left over after the last whole tick gives the alpha used to draw entities between
+    their previous and current positions.
+
+    Attributes:
+
+    - dt :    :class:`float` --> The length of a simulation tick in seconds.
+    - max_frame_time :    :class:`float` --> The most real time a single frame may add, so a stall (e.g. dragging the
+      window) doesn't make the simulation run hundreds of ticks to catch up.
+    - accumulator :    :class:`float` --> The real time that hasn't been simulated yet, in seconds.
+    - last_time :    :class:`float` --> The time.perf_counter() reading of the previous frame, or None before the first.
+
+    Methods:
+
+    - advance() --> Add the real time since the previous frame to the accumulator. Returns the seconds that passed.
+    - consume() --> Take one tick out of the accumulator if there is enough time for it. Returns a boolean.
+    - reset() --> Throw away the time that hasn't been simulated and restart the clock. Returns None.
+    - alpha --> How far the next tick has progressed, from 0 to just below 1.
+    """
+
+    def __init__(self, tick_rate, max_frame_time=0.25):
+        """
+        Create the timestep
+        :param tick_rate: The number of simulation ticks per second
+        :param max_frame_time: The most real time, in seconds, a single frame may add
+        """
+        self.dt = 1 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self):
+        """
+        Add the real time since the previous call to the accumulator. The first call only starts the clock.
+        :return float: The seconds that passed since the previous call, capped at max_frame_time
+        """
+        now = time.perf_counter()
+        elapsed = 0.0 if self.last_time is None else min(now - self.last_time, self.max_frame_time)
+        self.last_time = now
+        self.accumulator += elapsed
+        return elapsed
+
+    def consume(self):
+        """
+        Take one tick out of the accumulator, if it holds enough time for one
+        :return bool: True if a tick should be simulated
+        """
+        if self.accumulator >= self.dt:
+            self.accumulator -= self.dt
+            return True
+        return False
+
+    def reset(self):
+        """
+        Throw away the time that hasn't been simulated and restart the clock, e.g. while the game waits on a menu
+        :return None:
+        """
+        self.accumulator = 0.0
+        self.last_time = time.perf_counter()
+
+    @property
+    def alpha(self):
+        """
+        How far the next tick has progressed, used to draw entities between their previous and current positions
+        :return float:
+        """
+        return self.accumulator / self.dt
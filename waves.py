@@ -0,0 +1,234 @@
+import math
+
+# The spawns of a tick without any, shared by every empty tick of every schedule
+NO_SPAWNS = ()
+
+
+class WaveDirector:
+    """
+    Decides when and where aliens appear. Each wave's spawn timeline is worked out in full when the wave starts, as one
+    slot per simulation tick, so the game only looks up the next slot on every tick. Waves take turns between three
+    patterns, each denser and faster than the last: Poisson bursts of aliens around a random height, V formations,
+    and streams down evenly spaced lanes. In horde mode every wave is a dense stream at random heights, sized to keep
+    a few thousand aliens on the screen at once.
+
+    All the randomness comes from the game's generator, so the spawns only depend on the game's seed.
+
+    Attributes:
+
+    - settings :    :class:`settings.Settings` --> The game settings. Uses the screen size, tick_rate, alien_frequency,
+      alien_speed and the wave settings.
+    - rng :    :class:`random.Random` --> The game's random number generator.
+    - alien_height :    :class:`int` --> The height of an alien in pixels, so aliens are placed inside the screen.
+    - alien_width :    :class:`int` --> The width of an alien in pixels, used to space out formations.
+    - horde :    :class:`bool` --> A boolean to indicate every wave is a horde.
+    - wave :    :class:`int` --> The number of the current wave, starting at 0, or -1 before the first.
+    - pattern :    :class:`str` --> The pattern of the current wave, or None before the first.
+    - schedule :    :class:`list` --> The spawns of each tick of the current wave, each a sequence of (top, speed) pairs.
+    - tick :    :class:`int` --> The next tick of the schedule.
+    - wave_state :    :class:`tuple` --> The state of the random number generator when the current wave was scheduled,
+      which is all it takes to schedule the wave again. None before the first.
+
+    Methods:
+
+    - reset() --> Start over from the first wave. Returns None.
+    - next_tick() --> Take the spawns of the next tick. Returns a sequence of (top, speed) pairs.
+    - finished() --> Check a horde round has played all its waves. Returns a boolean.
+    - restore() --> Pick up a wave where it was left, e.g. from a saved game. Returns None.
+    """
+
+    PATTERNS = ('bursts', 'formation', 'lanes')
+
+    def __init__(self, settings, rng, alien_width, alien_height, horde=False):
+        """
+        Create the director. The first wave is scheduled on the first tick.
+        :param settings: The game settings
+        :param rng: The game's random number generator
+        :param alien_width: The width of an alien in pixels
+        :param alien_height: The height of an alien in pixels
+        :param horde: Make every wave a horde
+        """
+        self.settings = settings
+        self.rng = rng
+        self.alien_width = alien_width
+        self.alien_height = alien_height
+        self.horde = horde
+        self.reset()
+
+    def reset(self):
+        """
+        Start over from the first wave, which is scheduled on the next tick
+        :return None:
+        """
+        self.wave = -1
+        self.pattern = None
+        self.schedule = []
+        self.tick = 0
+        self.wave_state = None
+
+    def next_tick(self):
+        """
+        Take the spawns of the next tick, scheduling the next wave once the current one is over
+        :return list: (top, speed) pairs, one per alien to spawn. Usually an empty tuple.
+        """
+        if self.tick >= len(self.schedule):
+            self.wave += 1
+            self._start_wave()
+        spawns = self.schedule[self.tick]
+        self.tick += 1
+        return spawns
+
+    def finished(self):
+        """
+        Check a horde round has played all of its horde_waves waves. The other modes go on until the lives run out.
+        :return bool:
+        """
+        return self.horde and self.wave >= self.settings.horde_waves - 1 and self.tick >= len(self.schedule)
+
+    def restore(self, wave, tick, wave_state):
+        """
+        Pick up a wave where it was left. The wave's schedule is worked out again from the state the random number
+        generator was in when it was first scheduled, so it comes out the same, and the generator is left as it was.
+        :param wave: The number of the wave, or -1 before the first
+        :param tick: The next tick of the wave's schedule
+        :param wave_state: The wave_state the wave was scheduled with
+        :return None:
+        """
+        self.reset()
+        if wave < 0:
+            return
+        state = self.rng.getstate()
+        self.rng.setstate(wave_state)
+        self.wave = wave
+        self._start_wave()
+        self.rng.setstate(state)
+        self.tick = tick
+
+    def _start_wave(self):
+        """
+        Work out the spawn timeline of the current wave
+        :return None:
+        """
+        # Everything random about the wave follows from this state
+        self.wave_state = self.rng.getstate()
+        settings = self.settings
+        # Each wave spawns more and faster aliens than the one before
+        rate = settings.alien_frequency * (1 + settings.wave_growth * self.wave)
+        speed = settings.alien_speed * (1 + settings.wave_speed_step * self.wave)
+        duration = round(settings.wave_duration * settings.tick_rate)
+        self.tick = 0
+        if self.horde:
+            self.pattern = 'horde'
+            # Aliens take (screen width + alien width) / speed seconds to cross, so this rate keeps horde_aliens on the
+            # screen once the first ones reach the left edge. Hordes run back to back.
+            rate = settings.horde_aliens * speed / (settings.screen_width + self.alien_width)
+            self.schedule = [NO_SPAWNS] * duration
+            self._schedule_horde(rate, speed)
+            return
+        self.pattern = self.PATTERNS[self.wave % len(self.PATTERNS)]
+        # A quiet spell at the end of every wave lets the player catch their breath
+        self.schedule = [NO_SPAWNS] * (duration + round(settings.wave_pause * settings.tick_rate))
+        getattr(self, '_schedule_' + self.pattern)(rate, speed, duration)
+
+    def _spawn(self, tick, top, speed):
+        """
+        Add a spawn to the schedule, keeping the alien inside the screen
+        :param tick: The tick of the wave the alien appears on
+        :param top: The top of the alien
+        :param speed: How many pixels per second the alien moves, before the speed factor
+        :return None:
+        """
+        if not 0 <= tick < len(self.schedule):
+            return
+        top = min(max(0, round(top)), self.settings.screen_height - self.alien_height)
+        if self.schedule[tick] is NO_SPAWNS:
+            self.schedule[tick] = []
+        self.schedule[tick].append((top, speed))
+
+    def _poisson_ticks(self, rate, duration):
+        """
+        Pick the ticks of a Poisson process: events that happen at random, rate times per second on average
+        :param rate: The average number of events per second
+        :param duration: The number of ticks to fill
+        :return list: The ticks, in order
+        """
+        ticks = []
+        if rate <= 0:
+            return ticks
+        tick_rate = self.settings.tick_rate
+        time = self.rng.expovariate(rate)
+        while time * tick_rate < duration:
+            ticks.append(int(time * tick_rate))
+            time += self.rng.expovariate(rate)
+        return ticks
+
+    def _schedule_bursts(self, rate, speed, duration):
+        """
+        Schedule bursts of aliens at random times, each bunched around a random height
+        :param rate: The average number of aliens per second
+        :param speed: The speed of the aliens
+        :param duration: The length of the wave in ticks
+        :return None:
+        """
+        mean_size = self.settings.wave_burst_size
+        spread = round(0.25 * self.settings.tick_rate)
+        for start in self._poisson_ticks(rate / mean_size, duration):
+            center = self.rng.uniform(0, self.settings.screen_height - self.alien_height)
+            # Burst sizes follow a geometric distribution with the configured mean
+            size = 1 + int(math.log(1 - self.rng.random()) / math.log(1 - 1 / mean_size)) if mean_size > 1 else 1
+            for _ in range(size):
+                self._spawn(start + self.rng.randint(0, spread), center + self.rng.uniform(-100, 100), speed)
+
+    def _schedule_formation(self, rate, speed, duration):
+        """
+        Schedule V formations: a leader with wings trailing behind it above and below
+        :param rate: The average number of aliens per second
+        :param speed: The speed of the aliens
+        :param duration: The length of the wave in ticks
+        :return None:
+        """
+        size = 7
+        count = max(1, round(rate * duration / self.settings.tick_rate / size))
+        spacing = self.alien_height * 1.2
+        # Each pair of wings starts a little over an alien's width behind the one before
+        gap = math.ceil(self.alien_width * 1.2 / speed * self.settings.tick_rate)
+        span = spacing * (size // 2)
+        for i in range(count):
+            start = round(i * duration / count)
+            center = self.rng.uniform(span, self.settings.screen_height - self.alien_height - span)
+            self._spawn(start, center, speed)
+            for rank in range(1, size // 2 + 1):
+                self._spawn(start + rank * gap, center - rank * spacing, speed)
+                self._spawn(start + rank * gap, center + rank * spacing, speed)
+
+    def _schedule_lanes(self, rate, speed, duration):
+        """
+        Schedule steady streams of aliens down evenly spaced lanes. Every other lane is half an interval behind, so
+        the streams form a checkerboard.
+        :param rate: The average number of aliens per second
+        :param speed: The speed of the aliens
+        :param duration: The length of the wave in ticks
+        :return None:
+        """
+        lanes = self.settings.wave_lanes
+        if rate <= 0:
+            return
+        interval = lanes / rate * self.settings.tick_rate
+        height = self.settings.screen_height - self.alien_height
+        for lane in range(lanes):
+            top = height * (lane + 0.5) / lanes
+            time = interval / 2 * (lane % 2)
+            while time < duration:
+                self._spawn(int(time), top, speed)
+                time += interval
+
+    def _schedule_horde(self, rate, speed):
+        """
+        Schedule a dense stream of aliens at random heights
+        :param rate: The average number of aliens per second
+        :param speed: The speed of the aliens
+        :return None:
+        """
+        height = self.settings.screen_height - self.alien_height
+        for tick in self._poisson_ticks(rate, len(self.schedule)):
+            self._spawn(tick, self.rng.uniform(0, height), speed)